@@ -8,14 +8,19 @@ def aggregate_by_gl(df, gl_col="GL", amount_col="Amount"):
     Aggregate data by GL (sum positive/negative and count).
     Returns dataframe with columns: GL, Positive_Total, Negative_Total, Net, Count
     """
-    df = df.copy()
-    df[gl_col] = pd.to_numeric(df[gl_col], errors="coerce")
-    df[amount_col] = pd.to_numeric(df[amount_col], errors="coerce")
-    df = df.dropna(subset=[gl_col, amount_col])
+    # only the two needed columns are converted; the caller's frame is not copied
+    gl = pd.to_numeric(df[gl_col], errors="coerce")
+    amount = pd.to_numeric(df[amount_col], errors="coerce")
+    keep = gl.notna() & amount.notna()
+    gl, amount = gl[keep], amount[keep]
 
     # per-row positive/negative
-    df["Positive"] = df[amount_col].apply(lambda x: x if x > 0 else 0)
-    df["Negative"] = df[amount_col].apply(lambda x: abs(x) if x < 0 else 0)
+    df = pd.DataFrame({
+        gl_col: gl,
+        amount_col: amount,
+        "Positive": amount.clip(lower=0),
+        "Negative": (-amount).clip(lower=0),
+    })
 
     agg = df.groupby(gl_col).agg(
         Positive_Total=("Positive", "sum"),
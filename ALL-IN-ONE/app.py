@@ -12,6 +12,19 @@ st.title("📊 GL Analyzer — Category-Based Anomaly Detection Dashboard")
 
 # -------------------- HELPERS --------------------
 
+# business-friendly labels for the leading GL digit
+GROUP_LABELS = {
+    1: "Assets",
+    2: "Liabilities",
+    3: "Equity",
+    4: "Revenue",
+    5: "Expenses",
+    6: "Cost of Goods Sold",
+    7: "Other Income",
+    8: "Other Expenses",
+    9: "Adjustments"
+}
+
 def aggregate_by_gl(df, gl_col="GL", amount_col="Amount"):
     """
     Group GL accounts by their leading digit (1-9) and aggregate totals.
@@ -26,19 +39,7 @@ def aggregate_by_gl(df, gl_col="GL", amount_col="Amount"):
     df = df[df["GL_Group"].notna()]
     df["GL_Group"] = pd.to_numeric(df["GL_Group"], errors="coerce").astype("Int64")
 
-    # business-friendly labels
-    labels = {
-        1: "Assets",
-        2: "Liabilities",
-        3: "Equity",
-        4: "Revenue",
-        5: "Expenses",
-        6: "Cost of Goods Sold",
-        7: "Other Income",
-        8: "Other Expenses",
-        9: "Adjustments"
-    }
-    df["Group_Name"] = df["GL_Group"].map(labels).fillna("Unknown")
+    df["Group_Name"] = df["GL_Group"].map(GROUP_LABELS).fillna("Unknown")
 
     df["Positive"] = df[amount_col].apply(lambda x: x if x > 0 else 0)
     df["Negative"] = df[amount_col].apply(lambda x: abs(x) if x < 0 else 0)
@@ -94,6 +95,51 @@ def detect_change_anomalies(curr_agg, prev_agg, gl_col="GL_Group", min_abs_chang
     return merged.sort_values(by="diff_Net", key=lambda x: x.abs(), ascending=False)
 
 
+@st.cache_data(show_spinner=False)
+def prepare_drilldown(df, gl_col="GL", amount_col="Amount"):
+    """
+    Numeric GL / Amount arrays plus the leading GL digit of every row,
+    computed once per uploaded file for the drill-down explorer.
+    """
+    gl = pd.to_numeric(df[gl_col], errors="coerce")
+    amount = pd.to_numeric(df[amount_col], errors="coerce")
+    keep = (gl > 0) & amount.notna()
+    gl = gl[keep].to_numpy(dtype=np.int64)
+    amount = amount[keep].to_numpy(dtype=np.float64)
+    # leading digit by integer arithmetic instead of string slicing
+    lead = gl // 10 ** np.floor(np.log10(gl)).astype(np.int64)
+    return gl, amount, lead
+
+
+def bin_amounts(amount, bins=60, signed_log=False):
+    """
+    Server-side histogram of a group's amounts; only the bins go to the chart.
+    signed_log bins sign(x) * log10(1 + |x|) to spread heavy-tailed balances.
+    """
+    values = np.sign(amount) * np.log10(1 + np.abs(amount)) if signed_log else amount
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame({"Bin_Start": edges[:-1], "Bin_End": edges[1:], "Count": counts})
+
+
+def top_gl_accounts(gl, amount, page=1, page_size=25):
+    """
+    Per-GL totals for one group, ranked by absolute total and paged.
+    Returns (page DataFrame, number of GL accounts in the group).
+    """
+    codes, inverse = np.unique(gl, return_inverse=True)
+    totals = np.bincount(inverse, weights=amount)
+    counts = np.bincount(inverse)
+    order = np.argsort(-np.abs(totals), kind="stable")
+    sl = order[(page - 1) * page_size: page * page_size]
+    ranked = pd.DataFrame({
+        "Rank": np.arange((page - 1) * page_size + 1, (page - 1) * page_size + len(sl) + 1),
+        "GL": codes[sl],
+        "Total": totals[sl],
+        "Rows": counts[sl],
+    })
+    return ranked, len(codes)
+
+
 def save_snapshot_to_db(conn_str, dbname, collname, doc):
     client = MongoClient(conn_str)
     db = client[dbname]
@@ -249,3 +295,49 @@ if st.button("🔍 Run Analysis"):
                 file_name="flagged_gl_groups.csv",
                 mime="text/csv"
             )
+
+
+# -------------------- DRILL-DOWN EXPLORER --------------------
+# Outside the "Run Analysis" block so its widgets keep working on rerun.
+st.header("🔎 GL Group Drill-down")
+dd_missing = [c for c in ("GL", "Amount") if c not in df_curr.columns]
+if dd_missing:
+    present = []
+    st.info(f"Drill-down needs GL and Amount columns; the uploaded file has no {' / '.join(dd_missing)}.")
+else:
+    dd_gl, dd_amount, dd_lead = prepare_drilldown(df_curr)
+    present = [g for g in GROUP_LABELS if np.any(dd_lead == g)]
+    if not present:
+        st.info("No numeric GL / Amount rows to explore.")
+if present:
+    col_a, col_b, col_c = st.columns(3)
+    dd_group = col_a.selectbox("GL group", present, format_func=lambda g: f"{g} - {GROUP_LABELS[g]}")
+    dd_bins = col_b.slider("Histogram bins", min_value=10, max_value=200, value=60, step=10)
+    dd_log = col_c.checkbox("Signed log scale", value=True)
+
+    in_group = dd_lead == dd_group
+    group_gl, group_amount = dd_gl[in_group], dd_amount[in_group]
+
+    hist = bin_amounts(group_amount, bins=dd_bins, signed_log=dd_log)
+    axis_title = "sign · log10(1 + |Amount|)" if dd_log else "Amount"
+    hist_chart = alt.Chart(hist).mark_bar().encode(
+        x=alt.X("Bin_Start:Q", title=axis_title),
+        x2="Bin_End:Q",
+        y=alt.Y("Count:Q", title="Rows"),
+        tooltip=[alt.Tooltip("Bin_Start:Q", format=",.2f"), alt.Tooltip("Bin_End:Q", format=",.2f"), "Count:Q"]
+    ).properties(height=300, title=f"Amount distribution — {GROUP_LABELS[dd_group]} ({len(group_amount):,} rows)")
+    st.altair_chart(hist_chart, use_container_width=True)
+
+    page_size = 25
+    n_pages = max(1, -(-len(np.unique(group_gl)) // page_size))
+    dd_page = st.number_input("Top accounts page", min_value=1, max_value=n_pages, value=1, step=1)
+    ranked, n_accounts = top_gl_accounts(group_gl, group_amount, page=int(dd_page), page_size=page_size)
+
+    top_chart = alt.Chart(ranked).mark_bar().encode(
+        x=alt.X("GL:N", sort=None, title="GL Account"),
+        y=alt.Y("Total:Q", title="Net Total"),
+        color=alt.condition(alt.datum.Total > 0, alt.value("#16a34a"), alt.value("#ef4444")),
+        tooltip=["Rank", "GL", alt.Tooltip("Total:Q", format=","), "Rows"]
+    ).properties(height=300, title=f"Top GL accounts by |total| — page {int(dd_page)} of {n_pages} ({n_accounts:,} accounts)")
+    st.altair_chart(top_chart, use_container_width=True)
+    st.dataframe(ranked, hide_index=True)
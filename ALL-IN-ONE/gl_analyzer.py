@@ -2,27 +2,61 @@ import pandas as pd
 import numpy as np
 
 class GLAnalyzer:
-    def __init__(self, df):
+    def __init__(self, df, threshold=3.0, robust=False, materialize_z=False):
+        """
+        df : pandas.DataFrame
+        threshold : absolute z-score above which a cell is an outlier
+        robust : use median/MAD instead of mean/std for standardization
+        materialize_z : add Z_<col> columns to the returned frame
+        """
         self.df = df
+        self.threshold = threshold
+        self.robust = robust
+        self.materialize_z = materialize_z
+
+    def _standardize(self, values):
+        """
+        Standardize every column of a 2-D float matrix in one pass.
+        Columns with zero spread come back as NaN (never flagged).
+        """
+        if self.robust:
+            center = np.nanmedian(values, axis=0)
+            # 1.4826 * MAD is a consistent estimator of the std for normal data
+            scale = 1.4826 * np.nanmedian(np.abs(values - center), axis=0)
+        else:
+            center = np.nanmean(values, axis=0)
+            scale = np.nanstd(values, axis=0)
+        scale = np.where(scale == 0, np.nan, scale)
+        return (values - center) / scale
 
     def run(self):
-        df = self.df.copy()
-        
         # Clean missing data
-        df = df.dropna(how='all')
+        df = self.df.dropna(how='all')
+
+        numeric = df.select_dtypes(include=[np.number])
+        numeric_cols = numeric.columns
+        values = numeric.to_numpy(dtype=float)
 
         # Basic summary
         summary_stats = {
             "total_gl_accounts": df["GL"].nunique() if "GL" in df.columns else 0,
-            "mean": float(df.select_dtypes(include=[np.number]).mean().mean()),
-            "variance": float(df.select_dtypes(include=[np.number]).var().mean()),
+            "mean": float(numeric.mean().mean()),
+            "variance": float(numeric.var().mean()),
         }
 
-        # Anomaly detection using z-score
-        anomalies = {}
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        for col in numeric_cols:
-            df[f"Z_{col}"] = (df[col] - df[col].mean()) / df[col].std(ddof=0)
-            anomalies[col] = df[df[f"Z_{col}"].abs() > 3][["GL", col, f"Z_{col}"]].to_dict(orient="records")
+        # Anomaly detection using z-score, all numeric columns in one matrix op
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = self._standardize(values) if values.size else values
+            rows, cols = np.nonzero(np.abs(z) > self.threshold)
+
+        # Sparse (row index, column, z) result instead of per-column record dicts
+        anomalies = pd.DataFrame({
+            "row": df.index.to_numpy()[rows],
+            "column": numeric_cols.to_numpy()[cols],
+            "z": z[rows, cols],
+        })
+
+        if self.materialize_z:
+            df = df.assign(**{f"Z_{col}": z[:, i] for i, col in enumerate(numeric_cols)})
 
         return df, anomalies, summary_stats
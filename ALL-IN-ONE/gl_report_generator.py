@@ -7,14 +7,14 @@ class GLReportGenerator:
                  gl_column="GL", amount_column="Amount", step=10_000_000):
         """
         cleaned_data : pandas.DataFrame
-        anomalies : dict
+        anomalies : pandas.DataFrame of (row, column, z) outliers, as GLAnalyzer.run returns
         summary_stats : dict
         gl_column : column name for GL numbers
         amount_column : column for debit/credit amounts
         step : GL range step size (default 10,000,000)
         """
-        self.cleaned_data = cleaned_data.copy()
-        self.anomalies = anomalies or {}
+        self.cleaned_data = cleaned_data  # read-only, never modified
+        self.anomalies = anomalies if anomalies is not None else pd.DataFrame(columns=["row", "column", "z"])
         self.summary_stats = summary_stats or {}
         self.gl_column = gl_column
         self.amount_column = amount_column
@@ -29,10 +29,11 @@ class GLReportGenerator:
         if gl_col not in df.columns or amt_col not in df.columns:
             raise ValueError(f"Columns '{gl_col}' or '{amt_col}' not found in data.")
 
-        # Clean + ensure numeric
-        df[gl_col] = pd.to_numeric(df[gl_col], errors="coerce")
-        df[amt_col] = pd.to_numeric(df[amt_col], errors="coerce")
-        df = df.dropna(subset=[gl_col, amt_col])
+        # Clean + ensure numeric on just the two needed columns (no full-frame copy)
+        gl = pd.to_numeric(df[gl_col], errors="coerce")
+        amount = pd.to_numeric(df[amt_col], errors="coerce")
+        keep = gl.notna() & amount.notna()
+        df = pd.DataFrame({gl_col: gl[keep], amt_col: amount[keep]})
 
         # Define GL range bins
         step = self.step
@@ -45,8 +46,8 @@ class GLReportGenerator:
         df["GL_Range"] = pd.cut(df[gl_col], bins=bins, labels=labels, include_lowest=True)
 
         # Calculate positive & negative totals (absolute)
-        df["Positive"] = df[amt_col].apply(lambda x: x if x > 0 else 0)
-        df["Negative"] = df[amt_col].apply(lambda x: abs(x) if x < 0 else 0)
+        df["Positive"] = df[amt_col].clip(lower=0)
+        df["Negative"] = (-df[amt_col]).clip(lower=0)
 
         grouped = (
             df.groupby("GL_Range", dropna=True)
@@ -66,6 +67,11 @@ class GLReportGenerator:
         self.extra_data["gl_range_comparison"] = grouped
         return grouped
 
+    @staticmethod
+    def _thousands(series):
+        """Format a numeric column as comma-grouped integers."""
+        return series.astype("int64").map("{:,}".format)
+
     def generate_markdown(self):
         grouped = self.generate_range_comparison()
 
@@ -82,8 +88,16 @@ class GLReportGenerator:
         md.write("## 📈 Positive vs Negative Totals per GL Range\n\n")
         md.write("| GL Range | Positive Total | Negative Total | Count |\n")
         md.write("|:----------|----------------:|----------------:|-------:|\n")
-        for _, row in grouped.iterrows():
-            md.write(f"| {row['GL_Range']} | {int(row['Positive_Total']):,} | {int(row['Negative_Total']):,} | {int(row['Count']):,} |\n")
+        # Render all rows column-wise instead of iterrows()
+        if not grouped.empty:
+            rows = (
+                "| " + grouped["GL_Range"].astype(str)
+                + " | " + self._thousands(grouped["Positive_Total"])
+                + " | " + self._thousands(grouped["Negative_Total"])
+                + " | " + self._thousands(grouped["Count"])
+                + " |\n"
+            )
+            md.write(rows.str.cat())
 
         md.write("\n---\n\n")
         md.write("## 🧠 Observations\n")
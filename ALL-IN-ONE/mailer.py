@@ -1,8 +1,15 @@
 # mailer.py
+import time
+import queue
 import smtplib
+import logging
+import threading
+from collections import defaultdict
 from email.message import EmailMessage
 from typing import List
 
+logger = logging.getLogger(__name__)
+
 def send_anomaly_email(smtp_host: str, smtp_port: int, username: str, password: str,
                        from_addr: str, to_addrs: List[str],
                        subject: str, body: str):
@@ -23,3 +30,168 @@ def send_anomaly_email(smtp_host: str, smtp_port: int, username: str, password:
         smtp.login(username, password)
         smtp.send_message(msg)
     return True
+
+
+# -------------------- DIGEST DISPATCHER --------------------
+
+def build_digest(from_addr: str, to_addr: str, anomalies: List[dict],
+                 subject_prefix: str = "GL anomaly digest") -> EmailMessage:
+    """
+    One email listing every anomaly for a single recipient.
+    anomalies: list of dicts, e.g. {"gl_code": 11211970, "gl_range": "10000000", "remark": "..."}
+    """
+    msg = EmailMessage()
+    msg["Subject"] = f"{subject_prefix}: {len(anomalies)} flagged GL(s)"
+    msg["From"] = from_addr
+    msg["To"] = to_addr
+
+    lines = [f"{len(anomalies)} GL account(s) need your review:", ""]
+    for a in anomalies:
+        line = f"- GL {a.get('gl_code')}"
+        if a.get("gl_range") is not None:
+            line += f" (range {a['gl_range']})"
+        if a.get("remark"):
+            line += f": {a['remark']}"
+        lines.append(line)
+    msg.set_content("\n".join(lines))
+    return msg
+
+
+class NotificationDispatcher:
+    """
+    Groups anomalies into one digest per recipient and delivers them on a
+    background thread over a single reused SMTP session.
+
+    dispatcher = NotificationDispatcher("smtp.example.com", 587, user, pwd, from_addr)
+    dispatcher.notify([{"to": "owner@x.com", "gl_code": 123, "gl_range": "10000000"}, ...])
+    dispatcher.close()   # waits for the queue to drain
+
+    For a local SMTP sink (e.g. `python -m aiosmtpd -n -l localhost:8025`)
+    pass starttls=False and no username.
+    """
+
+    def __init__(self, smtp_host: str, smtp_port: int, username: str = None, password: str = None,
+                 from_addr: str = None, starttls: bool = True, batch_size: int = 50,
+                 max_retries: int = 3, backoff: float = 1.0, timeout: float = 30.0,
+                 idle_timeout: float = 5.0):
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.username = username
+        self.password = password
+        self.from_addr = from_addr or username
+        self.starttls = starttls
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+
+        self.sent = 0
+        self.failed = []
+        self._smtp = None
+        self._session_sent = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="anomaly-mailer", daemon=True)
+        self._worker.start()
+
+    # ---------- public API ----------
+    def notify(self, anomalies: List[dict]) -> int:
+        """
+        Queue anomalies for delivery without blocking. Each anomaly dict needs a
+        "to" address (str or list of str). Returns the number of digests queued.
+        """
+        by_recipient = defaultdict(list)
+        for a in anomalies:
+            to = a.get("to")
+            for addr in ([to] if isinstance(to, str) else (to or [])):
+                by_recipient[addr].append(a)
+
+        for addr, items in by_recipient.items():
+            self._queue.put(build_digest(self.from_addr, addr, items))
+        return len(by_recipient)
+
+    def flush(self):
+        """Block until every queued digest has been sent or given up on."""
+        self._queue.join()
+
+    def close(self):
+        """Drain the queue, stop the worker and close the SMTP session."""
+        self._queue.put(None)
+        self._worker.join()
+
+    # ---------- SMTP session ----------
+    def _connect(self):
+        smtp = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def _session(self):
+        # rotate the connection every batch_size messages (per-connection server limits)
+        if self._smtp is not None and self._session_sent >= self.batch_size:
+            self._disconnect()
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._disconnect()
+        self._smtp = self._connect()
+        self._session_sent = 0
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    # ---------- worker ----------
+    @staticmethod
+    def _is_permanent(error: Exception) -> bool:
+        """5xx replies (bad recipient, rejected message) fail the same way on every retry."""
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return bool(error.recipients) and all(code >= 500 for code, _ in error.recipients.values())
+        return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+    def _send_with_retry(self, msg: EmailMessage):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._session().send_message(msg)
+                self._session_sent += 1
+                self.sent += 1
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                if self._is_permanent(e):
+                    # smtplib has already reset the transaction, the session stays usable
+                    logger.error("Digest to %s rejected: %s", msg["To"], e)
+                    self.failed.append((msg["To"], str(e)))
+                    return
+                self._disconnect()
+                if attempt == self.max_retries:
+                    logger.error("Giving up on digest to %s: %s", msg["To"], e)
+                    self.failed.append((msg["To"], str(e)))
+                    return
+                time.sleep(self.backoff * (2 ** attempt))
+
+    def _run(self):
+        while True:
+            try:
+                msg = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                # nothing to send for a while, release the connection
+                self._disconnect()
+                continue
+
+            try:
+                if msg is None:
+                    self._disconnect()
+                    return
+                self._send_with_retry(msg)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,49 @@
+import os
+import sys
+import socket
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SmtpSink:
+    """
+    aiosmtpd handler that records every accepted message and the client
+    port of the connection it arrived on. Replies queued in data_replies /
+    rcpt_replies are returned (one per command) before accepting again.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.peers = []
+        self.data_replies = []
+        self.rcpt_replies = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if self.rcpt_replies:
+            return self.rcpt_replies.pop(0)
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.data_replies:
+            return self.data_replies.pop(0)
+        self.messages.append(envelope)
+        self.peers.append(session.peer[1])
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def smtp_sink():
+    """A local SMTP server on a free port: yields (handler, host, port)."""
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    handler = SmtpSink()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        yield handler, "127.0.0.1", port
+    finally:
+        controller.stop()
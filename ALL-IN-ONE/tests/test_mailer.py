@@ -0,0 +1,94 @@
+from email import message_from_bytes
+
+import pytest
+
+import mailer
+from mailer import NotificationDispatcher
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of sleeping."""
+    delays = []
+    monkeypatch.setattr(mailer.time, "sleep", delays.append)
+    return delays
+
+
+def dispatcher_for(sink, **kwargs):
+    _, host, port = sink
+    return NotificationDispatcher(host, port, from_addr="alerts@example.com", starttls=False, **kwargs)
+
+
+def test_digest_per_recipient(smtp_sink):
+    handler = smtp_sink[0]
+    dispatcher = dispatcher_for(smtp_sink)
+    queued = dispatcher.notify([
+        {"to": "a@example.com", "gl_code": 11211970, "gl_range": "10000000", "remark": "Sign flip"},
+        {"to": "b@example.com", "gl_code": 22000001},
+        {"to": ["a@example.com", "b@example.com"], "gl_code": 33000002},
+    ])
+    dispatcher.close()
+
+    assert queued == 2
+    assert dispatcher.sent == 2 and dispatcher.failed == []
+    by_rcpt = {env.rcpt_tos[0]: message_from_bytes(env.content) for env in handler.messages}
+    assert sorted(by_rcpt) == ["a@example.com", "b@example.com"]
+    body_a = by_rcpt["a@example.com"].get_payload()
+    assert "2 flagged GL(s)" in by_rcpt["a@example.com"]["Subject"]
+    assert "GL 11211970 (range 10000000): Sign flip" in body_a and "GL 33000002" in body_a
+    assert "GL 22000001" not in body_a
+
+
+def test_session_reused_and_rotated(smtp_sink):
+    handler = smtp_sink[0]
+    dispatcher = dispatcher_for(smtp_sink, batch_size=3)
+    dispatcher.notify([{"to": f"owner{i}@example.com", "gl_code": i} for i in range(7)])
+    dispatcher.close()
+
+    assert dispatcher.sent == 7
+    # 7 digests over sessions of at most 3 messages: 3 + 3 + 1
+    connections = [handler.peers.count(p) for p in dict.fromkeys(handler.peers)]
+    assert connections == [3, 3, 1]
+
+
+def test_transient_failure_retried_with_backoff(smtp_sink, sleeps):
+    handler = smtp_sink[0]
+    handler.data_replies = ["451 Try again later", "421 Service busy"]
+    dispatcher = dispatcher_for(smtp_sink, backoff=0.5)
+    dispatcher.notify([{"to": "a@example.com", "gl_code": 1}])
+    dispatcher.close()
+
+    assert dispatcher.sent == 1 and dispatcher.failed == []
+    assert len(handler.messages) == 1
+    assert sleeps == [0.5, 1.0]
+
+
+def test_gives_up_after_max_retries(smtp_sink, sleeps):
+    handler = smtp_sink[0]
+    handler.data_replies = ["451 Try again later"] * 10
+    dispatcher = dispatcher_for(smtp_sink, max_retries=2, backoff=1.0)
+    dispatcher.notify([{"to": "a@example.com", "gl_code": 1}])
+    dispatcher.close()
+
+    assert dispatcher.sent == 0
+    assert [to for to, _ in dispatcher.failed] == ["a@example.com"]
+    assert sleeps == [1.0, 2.0]
+    assert len(handler.data_replies) == 7
+
+
+@pytest.mark.parametrize("reply_field, reply", [
+    ("data_replies", "554 Message rejected"),
+    ("rcpt_replies", "550 No such user"),
+])
+def test_permanent_failure_not_retried(smtp_sink, sleeps, reply_field, reply):
+    handler = smtp_sink[0]
+    getattr(handler, reply_field).append(reply)
+    dispatcher = dispatcher_for(smtp_sink)
+    dispatcher.notify([{"to": "gone@example.com", "gl_code": 1}, {"to": "b@example.com", "gl_code": 2}])
+    dispatcher.close()
+
+    assert [to for to, _ in dispatcher.failed] == ["gone@example.com"]
+    assert sleeps == []
+    # the next digest goes out on the same session
+    assert [env.rcpt_tos for env in handler.messages] == [["b@example.com"]]
+    assert dispatcher.sent == 1
@@ -11,11 +11,15 @@ class GLReportGenerator:
         genai.configure(api_key=self.api_key)
         return genai.GenerativeModel("gemini-2.5-flash")
 
-    def generate_report(self, processed_gl_info: str, username: str) -> str:
-        # 1️⃣ Build prompt and generate report text
+    def generate_markdown(self, processed_gl_info: str) -> str:
+        # Build prompt and return the generated Markdown text (nothing written to disk)
         prompt = self._build_prompt(processed_gl_info)
         response = self.model.generate_content(prompt)
-        markdown_text = response.text.strip()
+        return response.text.strip()
+
+    def generate_report(self, processed_gl_info: str, username: str) -> str:
+        # 1️⃣ Build prompt and generate report text
+        markdown_text = self.generate_markdown(processed_gl_info)
 
         project_root = os.path.abspath(os.getcwd())
         base_dir = os.path.join(project_root, "Report", username)
@@ -46,6 +50,9 @@ class GLReportGenerator:
         - Statistics
         - Sign Anomalies
         - Z-Score Anomalies
+        - Duplicate and Reversal Postings
+        - Benford's Law Conformity
+        - Debit and Credit Reconciliation
         - Missing Data
         - Key Trends
         - Recommendations
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from Team_Rocket_Modules.Detectors import register
+
+# Nigrini MAD conformity bands and chi-square 5% critical values
+MAD_BANDS = {
+    1: [(0.006, "close"), (0.012, "acceptable"), (0.015, "marginal")],
+    2: [(0.0012, "close"), (0.0018, "acceptable"), (0.0022, "marginal")],
+}
+CHI2_CRITICAL = {1: 15.507, 2: 112.022}   # df = 8 and 89
+
+
+def leading_digits(values, n_digits: int = 1) -> np.ndarray:
+    """
+    First (n_digits=1) or first-two (n_digits=2) significant digits of |values|
+    by pure arithmetic. Zero / non-finite values give 0.
+    """
+    x = np.abs(np.asarray(values, dtype=np.float64))
+    ok = np.isfinite(x) & (x > 0)
+    out = np.zeros(x.shape, dtype=np.int64)
+    x = x[ok]
+
+    def digits(x, exp):
+        # amounts are decimals held in binary (0.29 is 0.28999...): round off
+        # the representation error before taking the integer part
+        return np.floor(np.round(x / 10.0 ** exp, 9))
+
+    exp = np.floor(np.log10(x)) - (n_digits - 1)
+    d = digits(x, exp)
+    # log10 rounding can put d one decade off; fix those rows
+    hi, lo = 10 ** n_digits, 10 ** (n_digits - 1)
+    d = np.where(d >= hi, digits(x, exp + 1), d)
+    d = np.where(d < lo, digits(x, exp - 1), d)
+    out[ok] = d.astype(np.int64)
+    return out
+
+
+def expected(n_digits: int = 1) -> np.ndarray:
+    digits = np.arange(10 ** (n_digits - 1), 10 ** n_digits)
+    return np.log10(1 + 1 / digits)
+
+
+def conformity(mad, n_digits: int = 1):
+    labels = np.full(np.shape(mad), "nonconformity", dtype=object)
+    for limit, label in reversed(MAD_BANDS[n_digits]):
+        labels[np.asarray(mad) <= limit] = label
+    return labels
+
+
+def benford_table(amounts, entities=None, n_digits: int = 1, min_count: int = 1) -> pd.DataFrame:
+    """
+    Per-entity Benford test in one pass: a single bincount over
+    (entity, digit) builds every histogram, then chi-square and MAD are
+    computed for all entities at once.
+
+    amounts  : array-like of amounts
+    entities : array-like of entity labels (None = one entity)
+    n_digits : 1 for first digit, 2 for first-two digits (amounts < 10 skipped)
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if entities is None:
+        codes, names = np.zeros(len(amounts), dtype=np.int64), np.array(["all"], dtype=object)
+    else:
+        codes, names = pd.factorize(pd.Series(entities), use_na_sentinel=True)
+        names = np.asarray(names, dtype=object)
+
+    digits = leading_digits(amounts, n_digits)
+    low, width = 10 ** (n_digits - 1), 9 * 10 ** (n_digits - 1)
+    keep = (digits >= low) & (codes >= 0)
+    if n_digits == 2:
+        keep &= np.abs(amounts) >= 10
+
+    n_entities = len(names)
+    flat = codes[keep] * width + (digits[keep] - low)
+    counts = np.bincount(flat, minlength=n_entities * width).reshape(n_entities, width)
+
+    n = counts.sum(axis=1)
+    p = expected(n_digits)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        observed = counts / n[:, None]
+        exp_counts = n[:, None] * p
+        chi2 = ((counts - exp_counts) ** 2 / exp_counts).sum(axis=1)
+        mad = np.abs(observed - p).mean(axis=1)
+
+    table = pd.DataFrame({
+        "entity": names,
+        "n": n,
+        "chi2": chi2,
+        "mad": mad,
+        "conformity": conformity(mad, n_digits),
+        "chi2_reject": chi2 > CHI2_CRITICAL[n_digits],
+    })
+    return table[table["n"] >= max(min_count, 1)].reset_index(drop=True)
+
+
+@register("benford", columns=("Amount",), optional=("Entity",))
+class BenfordDetector:
+    """
+    First-digit and first-two-digit Benford screening of Amount, per entity
+    when entity_col is present in the frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, entity_col: str = "Entity", min_count: int = 50):
+        self.df = df
+        self.entity_col = entity_col if entity_col in df.columns else None
+        self.min_count = min_count
+        self.text = ""
+        self.tables = {}
+
+    def getTables(self):
+        return self.tables
+
+    def getFlagged(self):
+        """Entities whose first-digit test is marginal or nonconforming."""
+        first = self.tables.get(1)
+        if first is None:
+            return []
+        bad = first["conformity"].isin(["marginal", "nonconformity"])
+        return first.loc[bad, "entity"].tolist()
+
+    def getFindings(self):
+        return {"benford": {
+            "first_digit": self.tables[1].to_dict(orient="records"),
+            "first_two_digits": self.tables[2].to_dict(orient="records"),
+        }}
+
+    def run(self):
+        amounts = pd.to_numeric(self.df['Amount'], errors="coerce").to_numpy(dtype=np.float64)
+        entities = self.df[self.entity_col].to_numpy() if self.entity_col else None
+
+        for n_digits in (1, 2):
+            self.tables[n_digits] = benford_table(amounts, entities, n_digits, self.min_count)
+
+        first = self.tables[1]
+        if first.empty:
+            self.text += f"Benford test skipped: fewer than {self.min_count} non-zero amounts\n"
+            return self.text
+
+        if self.entity_col is None:
+            row = first.iloc[0]
+            two = self.tables[2]
+            two_part = f", first-two digits MAD {two.iloc[0]['mad']:.4f} ({two.iloc[0]['conformity']})" if not two.empty else ""
+            self.text += (f"Benford first digit: MAD {row['mad']:.4f} ({row['conformity']}), "
+                          f"chi-square {row['chi2']:.2f}{two_part}\n")
+        else:
+            flagged = self.getFlagged()
+            self.text += f"Benford first digit: {len(flagged)} of {len(first)} entities marginal or nonconforming {flagged[:50]}\n"
+        return self.text
@@ -0,0 +1,105 @@
+import os
+import re
+import csv
+import glob
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# FX tables: one CSV per period, <FX_ROOT>/<YYYY-MM>.csv with a
+# "currency,rate" header; rate is the value of one unit of the currency in
+# the table's base currency (any base, as long as the reporting currency is listed).
+FX_ROOT = os.getenv("FX_ROOT", os.path.join(os.getenv("STORAGE_ROOT", "."), "FX"))
+REPORTING_CURRENCY = os.getenv("REPORTING_CURRENCY", "USD").upper()
+CURRENCY_COLUMN = "Currency"
+PERIOD_RE = re.compile(r"\d{4}-\d{2}")   # table files are <period>.csv, nothing else is looked up
+
+
+class FxError(ValueError):
+    pass
+
+
+class FxTable:
+    """Rates of one period, as a code → position map over one float array."""
+
+    def __init__(self, period: str, path: str, codes, rates):
+        self.period = period
+        self.path = path
+        self.codes = list(codes)
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+    def factors(self, currencies, reporting: str) -> np.ndarray:
+        """Multiplier into `reporting` for each of `currencies` (NaN when a rate is missing)."""
+        if reporting not in self.index:
+            raise FxError(f"No {reporting} rate in {self.path}")
+        base = self.rates[self.index[reporting]]
+        positions = np.array([self.index.get(str(c).strip().upper(), -1) for c in currencies], dtype=np.int64)
+        return np.append(self.rates, np.nan)[positions] / base
+
+
+@lru_cache(maxsize=64)
+def _read_table(path: str, mtime: float, period: str) -> FxTable:
+    # mtime is part of the key so an edited file is read again
+    codes, rates = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            codes.append(row["currency"].strip().upper())
+            rates.append(float(row["rate"]))
+    return FxTable(period, path, codes, rates)
+
+
+def rates_for(period: str, root: str = None) -> FxTable:
+    """
+    FX table for a period ("YYYY-MM"): its own file, else the latest earlier
+    one. Tables are parsed once per file version.
+    """
+    if not PERIOD_RE.fullmatch(str(period)):
+        raise FxError(f"Invalid FX period: {period!r}")
+    root = root or FX_ROOT
+    path = os.path.join(root, f"{period}.csv")
+    if not os.path.exists(path):
+        earlier = sorted(p for p in glob.glob(os.path.join(root, "*.csv"))
+                         if os.path.basename(p)[:-4] <= period)
+        if not earlier:
+            raise FxError(f"No FX table for {period} in {root}")
+        path = earlier[-1]
+    return _read_table(path, os.path.getmtime(path), os.path.basename(path)[:-4])
+
+
+def to_reporting_currency(df: pd.DataFrame, period: str, reporting: str = None, root: str = None):
+    """
+    Convert Amount into the reporting currency using the row's Currency.
+    Currency codes index a per-category rate array, so the conversion is
+    one gather and one multiply over the column. Rows without a currency
+    are taken to be in the reporting currency already; rows whose currency
+    has no rate get a null Amount. Returns (frame, summary for the report).
+    """
+    reporting = (reporting or REPORTING_CURRENCY).upper()
+    currency = df[CURRENCY_COLUMN]
+    if not isinstance(currency.dtype, pd.CategoricalDtype):
+        currency = currency.astype("category")
+    categories = list(currency.cat.categories)
+
+    if all(str(c).strip().upper() == reporting for c in categories):
+        # single-currency sheet: no FX table needed
+        table, factors = None, np.ones(len(categories) + 1)
+    else:
+        table = rates_for(period, root)
+        # one extra slot for code -1 (no currency given): factor 1
+        factors = np.append(table.factors(categories, reporting), 1.0)
+    codes = currency.cat.codes.to_numpy()
+
+    amount = df["Amount"].to_numpy(dtype=np.float64) * factors[codes]
+    # the other columns are shared with df, not copied
+    converted = pd.DataFrame({**{c: df[c] for c in df.columns}, "Amount": amount}, index=df.index, copy=False)
+
+    summary = {
+        "reporting_currency": reporting,
+        "fx_period": table.period if table else None,
+        "rates": {str(c): float(f) for c, f in zip(categories, factors) if not np.isnan(f)},
+        # rows are only counted for the (rare) currencies without a rate
+        "unconverted": {str(c): int((codes == i).sum()) for i, (c, f) in enumerate(zip(categories, factors))
+                        if np.isnan(f)},
+    }
+    return converted, summary
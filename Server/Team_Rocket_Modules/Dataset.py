@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# Columns the analysis reads from a trial balance sheet
+N_COLUMNS = 7
+# Extra columns kept wherever they sit in the sheet (multi-entity workbooks)
+OPTIONAL_COLUMNS = ("Entity", "Currency", "Region", "Department")
+UINT32_MAX = np.iinfo(np.uint32).max
+
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compact ingest schema: GL as uint32 (int64 if it does not fit), Amount as
+    float64 and every text column (GL names, FS groupings) as a categorical,
+    so repeated strings are stored once.
+    """
+    columns = {}
+    for col in df.columns:
+        s = df[col]
+        if col == "GL":
+            s = pd.to_numeric(s, errors="coerce")
+            if s.notna().all() and len(s):
+                s = s.astype(np.uint32 if 0 <= s.min() and s.max() <= UINT32_MAX else np.int64)
+        elif col == "Amount":
+            s = pd.to_numeric(s, errors="coerce").astype(np.float64)
+        elif not pd.api.types.is_numeric_dtype(s):
+            s = s.astype("category")
+        columns[col] = s
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def read_excel(f) -> pd.DataFrame:
+    """
+    Parse an uploaded trial balance workbook (two banner rows, first 7 columns
+    plus any OPTIONAL_COLUMNS) into the normalized schema.
+    """
+    raw = pd.read_excel(f, skiprows=2)
+    columns = list(raw.columns[:N_COLUMNS])
+    columns += [c for c in OPTIONAL_COLUMNS if c in raw.columns and c not in columns]
+    return normalize(raw[columns])
+
+
+def save_columnar(storage, key: str, df: pd.DataFrame) -> str:
+    """
+    Cache a parsed frame as an uncompressed Arrow IPC (Feather v2) file in
+    one record batch, written straight into the storage object, so it can
+    be memory-mapped back without parsing.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with storage.writer(key) as f:
+        feather.write_feather(table, f, compression="uncompressed", chunksize=max(len(df), 1))
+    return key
+
+
+def load_columnar(storage, key: str) -> pd.DataFrame:
+    """
+    Load a frame cached by save_columnar. Local files are memory-mapped and
+    their numeric columns (GL, Amount) become read-only views of the map;
+    categorical codes are still copied. Remote backends are read into one
+    buffer.
+    """
+    import pyarrow as pa
+
+    path = storage.local_path(key)
+    if path is not None:
+        source = pa.memory_map(path, "r")
+    else:
+        source = pa.BufferReader(storage.read(key))
+    table = pa.ipc.open_file(source).read_all()
+    # one block per column: a consolidated block would copy every column into it
+    return table.to_pandas(split_blocks=True)
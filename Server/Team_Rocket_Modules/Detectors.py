@@ -0,0 +1,213 @@
+import os
+import time
+import inspect
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# name → detector class, in registration order (the order of the report text)
+REGISTRY = {}
+# modules whose detectors register themselves on import
+DETECTOR_MODULES = ("Process", "Duplicates", "Benford", "Reconcile")
+POOL = os.getenv("DETECTOR_POOL", "thread")          # thread | process
+MAX_WORKERS = int(os.getenv("DETECTOR_WORKERS", 4))
+
+
+def register(name: str, columns, optional=()):
+    """
+    Class decorator adding a detector to REGISTRY. A detector is built as
+    cls(df, **params) on a frame holding only `columns` (required) and the
+    `optional` columns present, and exposes run() → text and
+    getFindings() → {"fault": {range: [GL, ...]}, <report fields>...}.
+    """
+    def wrap(cls):
+        cls.NAME = name
+        cls.COLUMNS = tuple(columns)
+        cls.OPTIONAL_COLUMNS = tuple(optional)
+        REGISTRY[name] = cls
+        return cls
+    return wrap
+
+
+def load():
+    for module in DETECTOR_MODULES:
+        importlib.import_module(f"Team_Rocket_Modules.{module}")
+    return REGISTRY
+
+
+def _kwargs(cls, params: dict) -> dict:
+    """The analysis params this detector's constructor accepts."""
+    accepted = inspect.signature(cls.__init__).parameters
+    return {k: v for k, v in params.items() if k in accepted}
+
+
+def _run_one(name: str, frame, params: dict, columns=None):
+    """
+    Run one detector; returns (text, findings, seconds). frame is a DataFrame
+    or a SharedFrame, of which only `columns` are mapped.
+    """
+    load()
+    cls = REGISTRY[name]
+    shared = frame if isinstance(frame, SharedFrame) else None
+    start = time.perf_counter()
+    try:
+        df = shared.attach(columns) if shared else frame
+        detector = cls(df, **_kwargs(cls, params))
+        text = detector.run()
+        findings = detector.getFindings()
+    finally:
+        if shared:
+            shared.close()
+    return text, findings, time.perf_counter() - start
+
+
+class SharedFrame:
+    """
+    Picklable handle on a frame copied once into one shared-memory block, so
+    process-pool workers map the columns instead of receiving pickled copies.
+    Categoricals travel as codes plus their (small) category list; columns
+    that are not plain numeric arrays are pickled as they are.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        from multiprocessing import shared_memory
+
+        self.layout = []
+        arrays = []
+        offset = 0
+        for col in df.columns:
+            s = df[col]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                arr, extra = s.cat.codes.to_numpy(), ("category", list(s.cat.categories))
+            elif isinstance(s.dtype, np.dtype) and s.dtype.kind in "biuf":
+                arr, extra = s.to_numpy(), ("numeric", None)
+            else:
+                self.layout.append((col, "pickled", None, None, s))
+                continue
+            self.layout.append((col, extra[0], arr.dtype.str, offset, extra[1]))
+            arrays.append((offset, arr))
+            offset += arr.nbytes
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.name = self.shm.name
+        self.rows = len(df)
+        for start, arr in arrays:
+            np.ndarray(arr.shape, arr.dtype, buffer=self.shm.buf, offset=start)[:] = arr
+
+    def __getstate__(self):
+        return {"name": self.name, "rows": self.rows, "layout": self.layout}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = None
+
+    def attach(self, names=None) -> pd.DataFrame:
+        """The frame (or its `names` columns) as read-only views on the shared block."""
+        from multiprocessing import shared_memory
+
+        if self.shm is None:
+            self.shm = shared_memory.SharedMemory(name=self.name)
+        columns = {}
+        for col, kind, dtype, offset, extra in self.layout:
+            if names is not None and col not in names:
+                continue
+            if kind == "pickled":
+                columns[col] = extra
+                continue
+            arr = np.ndarray(self.rows, np.dtype(dtype), buffer=self.shm.buf, offset=offset)
+            arr.flags.writeable = False
+            columns[col] = pd.Categorical.from_codes(arr, extra) if kind == "category" else arr
+        return pd.DataFrame(columns, copy=False)
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+
+    def unlink(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def _pool(kind: str):
+    """One executor per kind for the life of the process."""
+    with _pool_lock:
+        if kind not in _pools:
+            if kind == "process":
+                import multiprocessing
+                _pools[kind] = ProcessPoolExecutor(MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                _pools[kind] = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="detector")
+        return _pools[kind]
+
+
+def select(names=None):
+    """Registered detectors to run: all of them, or the given names in registry order."""
+    load()
+    if not names:
+        return list(REGISTRY)
+    unknown = set(names) - set(REGISTRY)
+    if unknown:
+        raise ValueError(f"Unknown detector(s): {sorted(unknown)}")
+    return [name for name in REGISTRY if name in names]
+
+
+def run_detectors(df: pd.DataFrame, params: dict, names=None, pool: str = None) -> dict:
+    """
+    Run the selected detectors concurrently over one parsed frame and merge
+    their output:
+        {"text": report text in registry order,
+         "fault": merged fault map,
+         "fields": other report fields from every detector,
+         "timings": {detector: seconds, "total": seconds},
+         "skipped": {detector: missing columns}}
+    Threads share df's arrays directly; pool="process" maps them from
+    shared memory.
+    """
+    pool = pool or POOL
+    start = time.perf_counter()
+    names = select(names)
+
+    skipped, jobs = {}, {}
+    for name in names:
+        cls = REGISTRY[name]
+        missing = [c for c in cls.COLUMNS if c not in df.columns]
+        if missing:
+            skipped[name] = missing
+            continue
+        jobs[name] = list(cls.COLUMNS) + [c for c in cls.OPTIONAL_COLUMNS if c in df.columns]
+
+    shared = None
+    if pool == "process" and jobs:
+        needed = {c for cols in jobs.values() for c in cols}
+        shared = SharedFrame(df[[c for c in df.columns if c in needed]])
+    try:
+        executor = _pool(pool)
+        futures = {
+            # column subsets of df share its data (no copy); workers get the shared block
+            name: executor.submit(_run_one, name, shared, params, cols) if shared
+            else executor.submit(_run_one, name, df[cols], params)
+            for name, cols in jobs.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+    finally:
+        if shared:
+            shared.unlink()
+
+    text, fault, fields, timings = "", {}, {}, {}
+    for name in names:
+        if name in skipped:
+            text += f"{name} skipped: missing column(s) {skipped[name]}\n"
+            continue
+        part, findings, seconds = results[name]
+        text += part if part.endswith("\n") else part + "\n"
+        fault.update(findings.pop("fault", {}))
+        fields.update(findings)
+        timings[name] = round(seconds, 4)
+    timings["total"] = round(time.perf_counter() - start, 4)
+    return {"text": text, "fault": fault, "fields": fields, "timings": timings, "skipped": skipped}
@@ -0,0 +1,56 @@
+import numpy as np
+from Team_Rocket_Modules.GLIndex import to_gl   # noqa: F401  (re-exported for callers)
+
+# review statuses that still need work and move to the next period
+OPEN_REVIEW_STATUSES = ("waiting", "submitted", "rejected")
+
+
+def sorted_codes(codes) -> np.ndarray:
+    """
+    GL codes as a sorted, duplicate-free int64 array. Lists that are already
+    stored sorted (new reports) skip the sort.
+    """
+    arr = np.asarray(codes, dtype=np.int64)
+    if arr.size > 1 and not np.all(arr[1:] > arr[:-1]):
+        arr = np.unique(arr)
+    return arr
+
+
+def sorted_fault(fault: dict) -> dict:
+    """range → sorted unique GL list, the form reports store their fault map in."""
+    return {gl_range: sorted_codes(codes).tolist() for gl_range, codes in fault.items()}
+
+
+def member(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Boolean mask of a's elements found in sorted array b, by binary search."""
+    if b.size == 0:
+        return np.zeros(a.size, dtype=bool)
+    idx = np.searchsorted(b, a)
+    idx[idx == b.size] = b.size - 1
+    return b[idx] == a
+
+
+def diff_codes(prev: np.ndarray, curr: np.ndarray) -> dict:
+    """new / persisting / resolved GLs between two sorted unique arrays."""
+    in_prev = member(curr, prev)
+    return {
+        "new": curr[~in_prev],
+        "persisting": curr[in_prev],
+        "resolved": prev[~member(prev, curr)],
+    }
+
+
+def diff_faults(prev_fault: dict, curr_fault: dict) -> dict:
+    """
+    Per GL range diff of two fault maps. Returns
+    {range: {"new": [...], "persisting": [...], "resolved": [...]}}.
+    """
+    empty = np.empty(0, dtype=np.int64)
+    result = {}
+    for gl_range in sorted(set(prev_fault) | set(curr_fault), key=lambda r: (len(r), r)):
+        parts = diff_codes(
+            sorted_codes(prev_fault.get(gl_range, empty)),
+            sorted_codes(curr_fault.get(gl_range, empty)),
+        )
+        result[gl_range] = {k: v.tolist() for k, v in parts.items()}
+    return result
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from Team_Rocket_Modules.Detectors import register
+
+
+@register("duplicates", columns=("GL", "Amount"), optional=("FS Grouping Main Head",))
+class DuplicateDetector:
+    """
+    Finds, on (GL, |Amount|, optional grouping):
+    - exact duplicate postings (same GL, same signed amount, same grouping)
+    - reversal pairs (a +x and a -x posting on the same key)
+    - near-duplicates (same GL, amounts within `tolerance` but not equal)
+    Every row is packed into one int64 key, so each check is a single
+    argsort plus linear passes over runs of equal keys; near-duplicates
+    compare each row with the next `window` rows of the same GL.
+    """
+
+    def __init__(self, df: pd.DataFrame, group_col: str = "FS Grouping Main Head",
+                 use_grouping: bool = True, tolerance: float = 1.0, window: int = 3,
+                 max_listed: int = 100):
+        self.df = df
+        self.group_col = group_col
+        self.use_grouping = use_grouping and group_col in df.columns
+        self.tolerance = tolerance
+        self.window = window
+        self.max_listed = max_listed
+        self.text = ""
+        self.duplicates = []
+        self.reversals = []
+        self.near_duplicates = []
+        self.reversal_pairs = 0
+
+    def getDuplicates(self):
+        return self.duplicates
+
+    def getReversals(self):
+        return self.reversals
+
+    def getNearDuplicates(self):
+        return self.near_duplicates
+
+    def getFault(self):
+        """Non-empty findings as extra fault-map entries (name → GL list)."""
+        fault = {
+            "duplicate": self.duplicates,
+            "reversal": self.reversals,
+            "near_duplicate": self.near_duplicates,
+        }
+        return {name: codes for name, codes in fault.items() if codes}
+
+    def getFindings(self):
+        return {"fault": self.getFault()}
+
+    def _prepare(self):
+        gl = pd.to_numeric(self.df['GL'], errors="coerce").to_numpy(dtype=np.float64)
+        amount = pd.to_numeric(self.df['Amount'], errors="coerce").to_numpy(dtype=np.float64)
+        valid = ~np.isnan(gl) & ~np.isnan(amount) & (amount != 0)
+
+        gl = gl[valid].astype(np.int64)
+        amount = amount[valid]
+        cents = np.rint(np.abs(amount) * 100).astype(np.int64)
+        if self.use_grouping:
+            grouping = self.df[self.group_col]
+            if isinstance(grouping.dtype, pd.CategoricalDtype):
+                group, size = grouping.cat.codes.to_numpy()[valid].astype(np.int64), len(grouping.cat.categories)
+            else:
+                group, labels = pd.factorize(grouping[valid])
+                group, size = group.astype(np.int64), len(labels)
+            group = np.where(group < 0, size, group)   # missing grouping gets its own bucket
+        else:
+            group = np.zeros(len(gl), dtype=np.int64)
+        return gl, amount, cents, group
+
+    @staticmethod
+    def _combine(*parts):
+        """
+        Non-negative int arrays → one int64 key per row (mixed radix, first
+        part most significant), or None if the key could overflow.
+        """
+        key = np.zeros(len(parts[0]), dtype=np.int64)
+        span = 1
+        for part in parts:
+            size = int(part.max()) + 1 if len(part) else 1
+            if span * size >= 1 << 61:
+                return None
+            key = key * size + part
+            span *= size
+        return key
+
+    @staticmethod
+    def _run_ids(sorted_key):
+        """Id of the run of equal values each element of a sorted array belongs to."""
+        start = np.empty(len(sorted_key), dtype=bool)
+        start[:1] = True
+        np.not_equal(sorted_key[1:], sorted_key[:-1], out=start[1:])
+        return np.cumsum(start) - 1
+
+    @staticmethod
+    def _codes(sorted_gl):
+        """Distinct GLs of an already sorted array, as a list."""
+        if len(sorted_gl) == 0:
+            return []
+        keep = np.empty(len(sorted_gl), dtype=bool)
+        keep[0] = True
+        np.not_equal(sorted_gl[1:], sorted_gl[:-1], out=keep[1:])
+        return sorted_gl[keep].tolist()
+
+    def _exact(self, gl, amount, cents, group):
+        # (GL, |Amount|, grouping) key, GL-major, so sorting also sorts by GL
+        base = self._combine(gl - gl.min(), cents, group) if len(gl) else np.zeros(0, dtype=np.int64)
+        if base is None:
+            key = pd.DataFrame({"gl": gl, "cents": cents, "group": group})
+            base = key.groupby(["gl", "cents", "group"], sort=True).ngroup().to_numpy()
+        signed = base * 2 + (amount > 0)
+
+        order = np.argsort(signed)
+        sk, sgl = signed[order], gl[order]
+
+        # exact duplicates: runs of the same signed key
+        run = self._run_ids(sk)
+        dup_rows = np.bincount(run)[run] >= 2 if len(run) else np.zeros(0, dtype=bool)
+
+        # reversals: runs of the same unsigned key holding both signs
+        urun = self._run_ids(sk >> 1)
+        total = np.bincount(urun) if len(urun) else np.zeros(0, dtype=np.int64)
+        pos = np.bincount(urun, weights=sk & 1).astype(np.int64) if len(urun) else total
+        neg = total - pos
+        rev_keys = (pos > 0) & (neg > 0)
+
+        self.duplicates = self._codes(sgl[dup_rows])
+        self.reversals = self._codes(sgl[rev_keys[urun]])
+        self.reversal_pairs = int(np.minimum(pos, neg)[rev_keys].sum())
+        return int(dup_rows.sum())
+
+    def _near(self, gl, amount, cents):
+        signed = np.where(amount > 0, cents, -cents)
+        # sort by (GL, signed cents) through a single int64 key when it fits
+        key = self._combine(gl - gl.min(), signed - signed.min()) if len(gl) else None
+        order = np.argsort(key) if key is not None else np.lexsort((signed, gl))
+        g, c = gl[order], signed[order]
+        limit = int(round(self.tolerance * 100))
+        near = np.zeros(len(g), dtype=bool)
+        for k in range(1, self.window + 1):
+            if k >= len(g):
+                break
+            hit = (g[k:] == g[:-k]) & (np.abs(c[k:] - c[:-k]) <= limit) & (c[k:] != c[:-k])
+            near[k:] |= hit
+            near[:-k] |= hit
+        self.near_duplicates = self._codes(g[near])
+
+    def _describe(self, label, codes):
+        listed = codes[:self.max_listed]
+        more = f" and {len(codes) - len(listed)} more" if len(codes) > len(listed) else ""
+        return f"{label}: {len(codes)} GL(s) {listed}{more}\n"
+
+    def run(self):
+        gl, amount, cents, group = self._prepare()
+        dup_rows = self._exact(gl, amount, cents, group)
+        self._near(gl, amount, cents)
+
+        if not (self.duplicates or self.reversals or self.near_duplicates):
+            self.text += "No duplicate, reversal or near-duplicate postings found\n"
+            return self.text
+        if self.duplicates:
+            self.text += self._describe(f"Duplicate postings ({dup_rows} rows)", self.duplicates)
+        if self.reversals:
+            self.text += self._describe(f"Reversal pairs ({self.reversal_pairs} pairs)", self.reversals)
+        if self.near_duplicates:
+            self.text += self._describe(f"Near-duplicate postings (within {self.tolerance})", self.near_duplicates)
+        return self.text
@@ -0,0 +1,167 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 50_000
+READ_BYTES = 1 << 20
+XLSX_MAX_ROWS = 1_048_576   # rows per worksheet, header included; xlsxwriter ignores rows past it
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+# -------------------- TABLE SOURCES --------------------
+def iter_fault_frames(fault: dict, chunk_rows: int = CHUNK_ROWS):
+    """
+    Yield the range → GL fault map as DataFrames of at most chunk_rows rows
+    with columns Range, GL.
+    """
+    empty = True
+    for gl_range, codes in fault.items():
+        codes = np.asarray(codes, dtype=np.int64)
+        for start in range(0, len(codes), chunk_rows):
+            part = codes[start:start + chunk_rows]
+            empty = False
+            yield pd.DataFrame({
+                "Range": np.repeat(str(gl_range), len(part)),
+                "GL": part,
+            })
+    if empty:
+        yield pd.DataFrame({"Range": pd.Series(dtype=str), "GL": pd.Series(dtype=np.int64)})
+
+
+def iter_outlier_frames(outliers: list, chunk_rows: int = CHUNK_ROWS):
+    """
+    Yield [[GL, Z_score], ...] outlier pairs as DataFrames of at most
+    chunk_rows rows with columns GL, Z_score.
+    """
+    if not outliers:
+        yield pd.DataFrame({"GL": pd.Series(dtype=np.int64), "Z_score": pd.Series(dtype=float)})
+    for start in range(0, len(outliers), chunk_rows):
+        part = np.asarray(outliers[start:start + chunk_rows], dtype=float).reshape(-1, 2)
+        yield pd.DataFrame({
+            "GL": part[:, 0].astype(np.int64),
+            "Z_score": part[:, 1],
+        })
+
+
+# -------------------- STREAMING WRITERS --------------------
+def stream_csv(frames):
+    """
+    Yield CSV bytes one chunk at a time; only one chunk is ever in memory.
+    """
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+class TempFileStream:
+    """
+    Iterate a temp file in READ_BYTES blocks and delete it once the last
+    block is read or close() is called, whichever comes first. Register
+    close() with response.call_on_close so the file also goes when the
+    client disconnects before (or while) the body is sent.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        try:
+            with open(self.path, "rb") as f:
+                while True:
+                    block = f.read(READ_BYTES)
+                    if not block:
+                        break
+                    yield block
+        finally:
+            self.close()
+
+    def close(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def stream_xlsx(frames, sheet_name="Export", max_rows: int = XLSX_MAX_ROWS):
+    """
+    Write rows to a temp workbook in xlsxwriter constant_memory mode (each row
+    is flushed to disk as soon as the next one starts) and stream the file back.
+    A sheet that reaches max_rows is continued on "<sheet_name> (2)", ... under
+    the same header row.
+
+    Unlike CSV, nothing is sent until the whole workbook is written: the
+    archive's shared parts and directory are only complete on close().
+    """
+    import xlsxwriter
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        sheet, header, row = None, None, max_rows
+        for frame in frames:
+            if header is None:
+                header = list(frame.columns)
+            for values in frame.itertuples(index=False, name=None):
+                if row == max_rows:
+                    n_sheets = len(workbook.worksheets()) + 1
+                    sheet = workbook.add_worksheet(sheet_name if n_sheets == 1 else f"{sheet_name} ({n_sheets})")
+                    sheet.write_row(0, 0, header)
+                    row = 1
+                sheet.write_row(row, 0, values)
+                row += 1
+        if sheet is None:
+            # no rows: one sheet with the header only
+            workbook.add_worksheet(sheet_name).write_row(0, 0, header or [])
+        workbook.close()
+    except BaseException:
+        os.remove(path)
+        raise
+    return TempFileStream(path)
+
+
+def stream_parquet(frames):
+    """
+    Write each chunk as its own Parquet row group to a temp file and stream it back.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    writer = None
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        os.remove(path)
+        raise
+    return TempFileStream(path)
+
+
+def stream_export(frames, fmt: str):
+    """
+    Dispatch to the streaming writer for fmt ("csv", "xlsx" or "parquet").
+    The result has close(); call it when the response closes.
+    """
+    if fmt == "csv":
+        return stream_csv(frames)
+    if fmt == "xlsx":
+        return stream_xlsx(frames)
+    if fmt == "parquet":
+        return stream_parquet(frames)
+    raise ValueError(f"Unsupported export format: {fmt}")
@@ -0,0 +1,62 @@
+import zlib
+import numpy as np
+from bson import Binary
+
+# fault_schema on a report document:
+#   missing / 1 : fault = {range: [GL, ...]}           (plain lists)
+#   2           : fault = {range: Binary(encoded)}     (see encode_codes)
+#                 fault_counts = {range: number of GLs}
+FAULT_SCHEMA = 2
+
+
+def encode_codes(codes) -> Binary:
+    """
+    Sorted unique GL codes → delta-encoded, zlib-compressed bytes.
+    Layout: 1 byte delta width (1/2/4/8) + zlib(little-endian unsigned deltas).
+    """
+    arr = np.asarray(codes, dtype=np.int64)
+    deltas = np.diff(arr, prepend=0) if arr.size else arr
+    top = int(deltas.max()) if deltas.size else 0
+    if deltas.size and deltas.min() < 0:
+        top = 1 << 63   # negative first code: keep full width
+    width = next(w for w in (1, 2, 4, 8) if top < 1 << (8 * w) or w == 8)
+    payload = deltas.astype(f"<u{width}").tobytes()
+    return Binary(bytes([width]) + zlib.compress(payload))
+
+
+def decode_codes(blob) -> np.ndarray:
+    width = blob[0]
+    deltas = np.frombuffer(zlib.decompress(bytes(blob[1:])), dtype=f"<u{width}")
+    return np.cumsum(deltas, dtype=np.int64)
+
+
+def encode_fault(fault: dict) -> dict:
+    """
+    Report document fields for a fault map whose lists are sorted and unique
+    (see Diff.sorted_fault).
+    """
+    return {
+        "fault_schema": FAULT_SCHEMA,
+        "fault": {gl_range: encode_codes(codes) for gl_range, codes in fault.items()},
+        "fault_counts": {gl_range: len(codes) for gl_range, codes in fault.items()},
+    }
+
+
+def decode_arrays(report: dict) -> dict:
+    """range → int64 array for any schema version."""
+    fault = report.get("fault") or {}
+    if report.get("fault_schema", 1) >= 2:
+        return {gl_range: decode_codes(blob) for gl_range, blob in fault.items()}
+    return {gl_range: np.asarray(codes, dtype=np.int64) for gl_range, codes in fault.items()}
+
+
+def decode_fault(report: dict) -> dict:
+    """range → list of GL ints for any schema version (the API shape)."""
+    return {gl_range: codes.tolist() for gl_range, codes in decode_arrays(report).items()}
+
+
+def fault_counts(report: dict) -> dict:
+    """range → number of faulty GLs, without decoding when the counts are stored."""
+    if "fault_counts" in report:
+        return report["fault_counts"]
+    return {gl_range: len(codes) for gl_range, codes in (report.get("fault") or {}).items()}
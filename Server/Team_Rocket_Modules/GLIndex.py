@@ -0,0 +1,98 @@
+from datetime import datetime
+
+# gl_index documents, one per (gl_code, report_id, range) of a report's fault map:
+#   {gl_code: int, report_id: str, range: str, username, period: "YYYY-MM",
+#    uploaded_at, status: "unreviewed" | review status}
+UNREVIEWED = "unreviewed"
+PERIOD_LENGTH = 7   # uploaded_at prefix: month, for reports without a period
+
+
+def to_gl(code) -> int:
+    """GL code as int whether a client sent it as number or string (-1 if unusable)."""
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return -1
+
+
+def gl_query(gl_code: int):
+    """Match a stored gl_code written as int (current) or as string (older reviews)."""
+    return {"$in": [gl_code, str(gl_code)]}
+
+
+def create_indexes(collection):
+    collection.create_index([("gl_code", 1), ("report_id", 1), ("range", 1)], unique=True)
+    collection.create_index([("gl_code", 1), ("uploaded_at", -1)])
+    collection.create_index([("report_id", 1), ("gl_code", 1)])
+
+
+def index_report(collection, report_id: str, username, uploaded_at: str, fault: dict, statuses: dict = None,
+                 period: str = None):
+    """
+    Add a report's fault map (range → GL codes) to the index. statuses maps
+    GL code → review status for GLs that already have a review. period is
+    the report's reporting period (default: its upload month).
+    """
+    statuses = statuses or {}
+    period = period or uploaded_at[:PERIOD_LENGTH]
+    docs = [
+        {
+            "gl_code": int(code),
+            "report_id": report_id,
+            "range": gl_range,
+            "username": username,
+            "period": period,
+            "uploaded_at": uploaded_at,
+            "status": statuses.get(int(code), UNREVIEWED),
+        }
+        for gl_range, codes in fault.items()
+        for code in codes
+    ]
+    if docs:
+        collection.insert_many(docs, ordered=False)
+    return len(docs)
+
+
+def status_update(report_id: str, gl_codes, status: str):
+    """(filter, update) mirroring a review status change onto the report's index entries."""
+    return ({"report_id": report_id, "gl_code": {"$in": [int(c) for c in gl_codes]}},
+            {"$set": {"status": status, "status_updated": datetime.utcnow().isoformat()}})
+
+
+def set_status(collection, report_id: str, gl_codes, status: str):
+    """Mirror a review status change onto the report's index entries for gl_codes."""
+    if not gl_codes:
+        return 0
+    return collection.update_many(*status_update(report_id, gl_codes, status)).modified_count
+
+
+def history(collection, gl_code: int, username=None, limit: int = 1000):
+    """Index entries for gl_code, newest report first; username=None covers every user."""
+    query = {"gl_code": gl_code}
+    if username is not None:
+        query["username"] = username
+    return list(collection.find(query, {"_id": 0, "gl_code": 0}).sort("uploaded_at", -1).limit(limit))
+
+
+def backfill(reports_collection, reviews_collection, collection):
+    """
+    Index every report not indexed yet (run once for reports created before
+    the index existed). Returns the number of reports added.
+    """
+    from Team_Rocket_Modules import FaultCodec
+
+    indexed = set(collection.distinct("report_id"))
+    added = 0
+    for report in reports_collection.find({}, {"username": 1, "uploaded_at": 1, "period": 1,
+                                               "fault": 1, "fault_schema": 1}):
+        report_id = str(report["_id"])
+        if report_id in indexed:
+            continue
+        statuses = {
+            to_gl(r.get("gl_code")): r.get("status")
+            for r in reviews_collection.find({"report_id": report_id}, {"gl_code": 1, "status": 1})
+        }
+        index_report(collection, report_id, report.get("username"), str(report.get("uploaded_at", "")),
+                     FaultCodec.decode_fault(report), statuses, report.get("period"))
+        added += 1
+    return added
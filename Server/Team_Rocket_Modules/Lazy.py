@@ -0,0 +1,28 @@
+import threading
+
+
+class Lazy:
+    """
+    Stand-in for an object that is expensive to create (Mongo connection and
+    indexes, storage backend, Gemini model). factory() runs once, on the
+    first attribute access, under a lock so concurrent first requests share
+    the same instance; afterwards attributes are forwarded to it.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._obj = None
+
+    def get(self):
+        if self._obj is None:
+            with self._lock:
+                if self._obj is None:
+                    self._obj = self._factory()
+        return self._obj
+
+    def ready(self) -> bool:
+        return self._obj is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
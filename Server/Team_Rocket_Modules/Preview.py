@@ -0,0 +1,234 @@
+import os
+import math
+import time
+import numpy as np
+import pandas as pd
+
+SAMPLE_ROWS = int(os.getenv("PREVIEW_SAMPLE_ROWS", 50_000))
+MIN_PER_RANGE = 200   # every non-empty GL range gets at least this many rows (or all of them)
+Z95 = 1.959964
+# report fields that hold estimates until the full analysis replaces them
+PROVISIONAL_FIELDS = ["fault", "stats", "sign_ranges", "z_outliers"]
+
+
+def stratified_sample(codes: np.ndarray, sample_rows: int = None, seed: int = 0):
+    """
+    Size-weighted stratified sample over stratum codes (GL range per row):
+    each stratum gets a share of sample_rows proportional to its row count,
+    and at least MIN_PER_RANGE rows. Rows are drawn independently at their
+    stratum's rate, so this is one pass with no sort.
+    Returns (mask of sampled rows, rows per stratum, sampled rows per stratum).
+    """
+    sample_rows = sample_rows or SAMPLE_ROWS
+    sizes = np.bincount(codes)
+    alloc = np.minimum(sizes, np.maximum(np.ceil(sample_rows * sizes / max(len(codes), 1)), MIN_PER_RANGE))
+    rate = np.divide(alloc, sizes, out=np.zeros(len(sizes)), where=sizes > 0)
+    mask = np.random.default_rng(seed).random(len(codes)) < rate[codes]
+    taken = np.bincount(codes[mask], minlength=len(sizes))
+    return mask, sizes, taken
+
+
+def wilson(successes: float, n: float, z: float = Z95):
+    """95% Wilson score interval for a proportion."""
+    if n <= 0:
+        return 0.0, 1.0
+    p = successes / n
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _weighted_median(values: np.ndarray, weights: np.ndarray, fpc: float = 1.0):
+    """
+    Weighted median with a 95% interval from the order statistics around it;
+    fpc (1 - sampling fraction) narrows it to nothing for a full sample.
+    """
+    if len(values) == 0:
+        return float("nan"), [float("nan"), float("nan")]
+    order = np.argsort(values)
+    values, cum = values[order], np.cumsum(weights[order]) / weights.sum()
+    n_eff = weights.sum() ** 2 / (weights ** 2).sum()
+    half = Z95 * 0.5 * math.sqrt(fpc / n_eff)
+
+    def quantile(q):
+        return float(values[min(np.searchsorted(cum, q), len(values) - 1)])
+    return quantile(0.5), [quantile(max(0.0, 0.5 - half)), quantile(min(1.0, 0.5 + half))]
+
+
+class PreviewAnalyzer:
+    """
+    Approximate GLAnalyzer results from a stratified sample (strata are the
+    GL ranges): range sign findings, statistics and z-score outlier
+    candidates, each with 95% bounds. getResult() has the shape of
+    Detectors.run_detectors, so ReportTemplate renders it unchanged.
+
+    Only the analysis is sampled: the workbook is still parsed in full (and
+    cached as Arrow) before the preview runs, so the first answer on a large
+    upload takes the parse time plus this step.
+    """
+
+    def __init__(self, df: pd.DataFrame, step_size: int = 10_000_000, z_threshold: float = 3,
+                 sample_rows: int = None, seed: int = 0):
+        self.df = df
+        self.step_size = step_size
+        self.z_threshold = z_threshold
+        self.sample_rows = sample_rows or SAMPLE_ROWS
+        self.seed = seed
+        self.text = ""
+        self.fault = {}
+        self.stats = {}
+        self.bounds = {}
+        self.sign_ranges = []
+        self.outliers = []
+        self.outlier_counts = {}
+        self.sampled = 0
+        self.grouping = None
+        self.seconds = 0.0
+
+    def getResult(self):
+        fields = {
+            "stats": self.stats,
+            "sign_ranges": self.sign_ranges,
+            "z_outliers": self.outliers,
+            "confidence": {
+                "sample_rows": self.sampled,
+                "rows": len(self.df),
+                "level": 0.95,
+                "stats": self.bounds,
+                "z_outliers": self.outlier_counts,
+                "seconds": round(self.seconds, 4),
+            },
+        }
+        return {"text": self.text, "fault": self.fault, "fields": fields,
+                "timings": {"preview": round(self.seconds, 4), "total": round(self.seconds, 4)}, "skipped": {}}
+
+    def _sample(self):
+        # rows without a GL (e.g. a blank total row, which leaves the column float)
+        # belong to no range; GLAnalyzer skips them too
+        gl = self.df["GL"].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(gl)
+        gl = gl[valid].astype(np.int64)
+        amount = self.df["Amount"].to_numpy(dtype=np.float64)[valid]
+        self.grouping = self.df["FS Grouping Main Head"].to_numpy()[valid]
+        # range index as in GLAnalyzer: range k covers [k * step, (k + 1) * step - 1]
+        base = int(gl.min()) // self.step_size if len(gl) else 0
+        codes = gl // self.step_size - base
+        mask, sizes, taken = stratified_sample(codes, self.sample_rows, self.seed)
+        self.sampled = int(mask.sum())
+        return gl, amount, codes, mask, sizes, taken, base
+
+    def _statistics(self, amount, codes, mask, sizes, taken):
+        values, strata = amount[mask], codes[mask]
+        present = ~np.isnan(values)
+        values, strata = values[present], strata[present]
+        # each sampled row stands for N_h / n_h rows of its stratum
+        weights = np.divide(sizes, taken, out=np.zeros(len(sizes)), where=taken > 0)[strata]
+        total = weights.sum()
+        if total == 0:
+            self.stats.update(mean=float("nan"), median=float("nan"), std=float("nan"))
+            return
+
+        mean = float((weights * values).sum() / total)
+        # stratified variance of the mean: Σ W_h² (1 - f_h) s_h² / n_h
+        n_h = np.bincount(strata, minlength=len(sizes)).astype(float)
+        sum_h = np.bincount(strata, values, minlength=len(sizes))
+        sq_h = np.bincount(strata, values * values, minlength=len(sizes))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var_h = np.where(n_h > 1, (sq_h - sum_h * sum_h / n_h) / (n_h - 1), 0.0)
+            w_h = sizes / sizes.sum()
+            fpc = np.where(sizes > 0, 1 - taken / np.maximum(sizes, 1), 0.0)
+            se_mean = math.sqrt(np.nansum(np.where(n_h > 0, w_h * w_h * fpc * var_h / np.maximum(n_h, 1), 0.0)))
+
+        dev = values - mean
+        var = float((weights * dev * dev).sum() / total)
+        m4 = float((weights * dev ** 4).sum() / total)
+        n_eff = total ** 2 / float((weights ** 2).sum())
+        # finite-population correction: a fully sampled sheet gives exact values
+        overall_fpc = max(0.0, 1 - float(taken.sum()) / max(float(sizes.sum()), 1.0))
+        se_var = math.sqrt(max(m4 - var * var, 0.0) * overall_fpc / n_eff)
+        median, median_bounds = _weighted_median(values, weights, overall_fpc)
+
+        std = math.sqrt(var)
+        self.stats.update(mean=mean, median=median, std=std)
+        self.bounds = {
+            "mean": [mean - Z95 * se_mean, mean + Z95 * se_mean],
+            "median": median_bounds,
+            "std": [math.sqrt(max(var - Z95 * se_var, 0.0)), math.sqrt(var + Z95 * se_var)],
+        }
+        self.text += (f"Mean: {mean} (95% {self.bounds['mean'][0]} to {self.bounds['mean'][1]}), "
+                      f"Median: {median}, Standard Deviation: {std} (estimated from {self.sampled} rows)\n")
+
+    def _ranges(self, gl, amount, codes, mask, sizes, taken, base):
+        sample = pd.DataFrame({
+            "code": codes[mask],
+            "GL": gl[mask],
+            "Amount": amount[mask],
+            "FS Grouping Main Head": self.grouping[mask],
+        })
+        for code, temp in sample.groupby("code", sort=True):
+            start = (int(code) + base) * self.step_size
+            if start < self.step_size:
+                continue   # GLAnalyzer's ranges start at step_size
+            end = start + self.step_size - 1
+            pos = int((temp["Amount"] > 0).sum())
+            neg = int((temp["Amount"] < 0).sum())
+            if pos + neg == 0:
+                continue
+
+            scale = sizes[code] / taken[code]
+            share_low, share_high = wilson(pos, pos + neg)
+            if taken[code] == sizes[code]:
+                share_low = share_high = pos / (pos + neg)   # whole range sampled: exact
+            expected = "negative" if pos / (pos + neg) < 0.5 else "positive"
+            minority = temp[temp["Amount"] > 0] if expected == "negative" else temp[temp["Amount"] < 0]
+            # minority share bounds → estimated faulty rows in the whole range
+            low, high = (share_low, share_high) if expected == "negative" else (1 - share_high, 1 - share_low)
+            signed = (pos + neg) * scale
+
+            # sorted unique, like the full analysis stores (Diff.sorted_fault)
+            self.fault[str(start)] = np.unique(minority["GL"].to_numpy(dtype=np.int64)).tolist()
+            self.sign_ranges.append({
+                "range": str(start), "start": start, "end": end,
+                "grouping": str(temp["FS Grouping Main Head"].value_counts().idxmax()).strip(),
+                "expected": expected, "positives": int(round(pos * scale)), "negatives": int(round(neg * scale)),
+                "faults": int(round(len(minority) * scale)),
+                "faults_bounds": [int(math.floor(low * signed)), int(math.ceil(high * signed))],
+                # sign is settled when the interval does not cross 50%
+                "confident": bool(share_high < 0.5 or share_low > 0.5),
+                "sampled": int(taken[code]), "rows": int(sizes[code]),
+            })
+            self.text += (f"{self.sign_ranges[-1]['grouping']} (ranges {start}-{end} likely {expected}). "
+                          f"Estimated faults: {self.sign_ranges[-1]['faults']}, sampled fault GLs {self.fault[str(start)]}\n")
+
+    def _outliers(self, gl, amount):
+        """Candidates over every row: |Amount - mean| beyond z × std, at the std estimate and its bounds."""
+        std = self.stats.get("std")
+        if not std or math.isnan(std):
+            return
+        dev = np.abs(amount - self.stats["mean"])
+        std_low, std_high = self.bounds["std"]
+        candidate = dev > self.z_threshold * std
+        self.outliers = [[int(g), float(z)] for g, z in
+                         zip(gl[candidate], (amount[candidate] - self.stats["mean"]) / std)]
+        self.outlier_counts = {
+            "estimate": int(candidate.sum()),
+            # beyond the threshold even at the upper std bound / only at the lower one
+            "low": int((dev > self.z_threshold * std_high).sum()),
+            "high": int((dev > self.z_threshold * std_low).sum()) if std_low > 0 else len(amount),
+        }
+        self.text += (f"Z-score outlier candidates beyond ±{self.z_threshold}: {self.outlier_counts['estimate']} "
+                      f"(95% {self.outlier_counts['low']} to {self.outlier_counts['high']})\n")
+
+    def run(self):
+        start = time.perf_counter()
+        total_gl = int(self.df["GL"].nunique())
+        nulls = int(self.df["Amount"].isna().sum())
+        self.stats.update(total_gl=total_gl, rows=len(self.df), nulls=nulls)
+        self.text += f"Preview from a stratified sample; Total GL: {total_gl}\n"
+        if len(self.df):
+            gl, amount, codes, mask, sizes, taken, base = self._sample()
+            self._ranges(gl, amount, codes, mask, sizes, taken, base)
+            self._statistics(amount, codes, mask, sizes, taken)
+            self._outliers(gl, amount)
+        self.seconds = time.perf_counter() - start
+        return self.text
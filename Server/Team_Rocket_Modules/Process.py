@@ -1,13 +1,38 @@
 import pandas as pd
+from Team_Rocket_Modules.Detectors import register
 
+MAX_RANGES = 10_000   # each range is a scan of the frame; more would hang a worker
+
+
+class RangeError(ValueError):
+    pass
+
+
+def check_ranges(max_gl: int, step_size: int) -> int:
+    """Number of GL ranges step_size cuts [step_size, max_gl] into; RangeError past MAX_RANGES."""
+    if step_size <= 0:
+        raise RangeError(f"step_size must be positive, got {step_size}")
+    count = max(int(max_gl) // step_size, 0)
+    if count > MAX_RANGES:
+        raise RangeError(f"step_size {step_size:,} splits GLs up to {int(max_gl):,} into {count:,} ranges "
+                         f"(at most {MAX_RANGES:,})")
+    return count
+
+@register("gl_ranges", columns=("GL", "Amount", "FS Grouping Main Head"))
 class GLAnalyzer:
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
+    def __init__(self, df: pd.DataFrame, step_size: int = 10_000_000, z_threshold: float = 3):
+        # df is only read, never modified, so no defensive copy is taken
+        self.df = df
+        self.step_size = step_size
+        self.z_threshold = z_threshold
         self.fault = {}
         self.text = ""
         self.data = []
         self.ranges = []
         self.z_score = []
+        self.outliers = []
+        self.stats = {}
+        self.sign_ranges = []
 
     def getFault(self):
         return self.fault
@@ -15,8 +40,17 @@ class GLAnalyzer:
     def getZscore(self):
         return self.z_score
 
-    def _generate_ranges(self, step_size=10_000_000):
+    def getOutliers(self):
+        return self.outliers
+
+    def getFindings(self):
+        return {"fault": self.fault, "z_score": self.z_score, "z_outliers": self.outliers,
+                "stats": self.stats, "sign_ranges": self.sign_ranges}
+
+    def _generate_ranges(self, step_size=None):
+        step_size = step_size or self.step_size
         max_gl = int(self.df['GL'].max())
+        check_ranges(max_gl, step_size)
         current = step_size
         while current <= max_gl:
             end = current + step_size - 1
@@ -40,16 +74,24 @@ class GLAnalyzer:
 
             percentage = (pos_count / total) * 100
             if percentage < 50:
+                expected = "negative"
                 self.fault[str(start)] = temp[temp['Amount'] > 0]['GL'].tolist()
                 note = f"{most_occured_name} (ranges {start}-{end} should be negative). Positives: {pos_count} and list of fault is in GL {self.fault[str(start)]}\n"
             else:
+                expected = "positive"
                 self.fault[str(start)] = temp[temp['Amount'] < 0]['GL'].tolist()
                 note = f"{most_occured_name} (ranges {start}-{end} should be positive). Negatives: {neg_count} and list of fault is in GL {self.fault[str(start)]}\n"
 
+            self.sign_ranges.append({
+                "range": str(start), "start": start, "end": end, "grouping": str(most_occured_name).strip(),
+                "expected": expected, "positives": int(pos_count), "negatives": int(neg_count),
+                "faults": len(self.fault[str(start)]),
+            })
             self.text += note
 
     def _check_nulls(self):
         nullVal = int(self.df['Amount'].isna().sum())
+        self.stats["nulls"] = nullVal
         if nullVal:
             self.text += f"Null found in Amount: {nullVal}\n"
         else:
@@ -61,15 +103,18 @@ class GLAnalyzer:
             float(self.df['Amount'].median()),
             float(self.df['Amount'].std())
         ]
+        self.stats.update(mean=self.data[0], median=self.data[1], std=self.data[2])
         self.text += f"Mean: {self.data[0]}, Median: {self.data[1]}, Standard Deviation:{self.data[2]}, Variance: {self.data[2]**2}\n"
 
     def _compute_z_scores(self):
         std = self.df['Amount'].std()
-        self.df.loc[:, 'Z_score'] = (self.df['Amount'] - self.data[0]) / std
-        critical_gls = self.df.loc[(self.df['Z_score'] > 3) | (self.df['Z_score'] < -3), ['GL', 'Z_score']].values.tolist()
-        self.z_score = self.df['Z_Score'].tolist()
+        z = (self.df['Amount'] - self.data[0]) / std
+        critical = (z > self.z_threshold) | (z < -self.z_threshold)
+        critical_gls = list(zip(self.df['GL'][critical].tolist(), z[critical].tolist()))
+        self.z_score = z.tolist()
+        self.outliers = [[int(gl), float(score)] for gl, score in critical_gls]
         if not critical_gls:
-            self.text += "Z Score of amount is in the range of -3 to 3"
+            self.text += f"Z Score of amount is in the range of -{self.z_threshold} to {self.z_threshold}"
         else:
             self.text += "Z score of amount is more than the critical range here is the list of GL : Z_score\n"
             for values in critical_gls:
@@ -77,6 +122,7 @@ class GLAnalyzer:
 
     def run_analysis(self):
         total_gl = self.df['GL'].nunique()
+        self.stats.update(total_gl=int(total_gl), rows=len(self.df))
         self.text += f'Total GL: {total_gl}\n'
         self._generate_ranges()
         self._analyze_ranges()
@@ -84,3 +130,6 @@ class GLAnalyzer:
         self._compute_statistics()
         self._compute_z_scores()
         return self.text
+
+    def run(self):
+        return self.run_analysis()
@@ -0,0 +1,131 @@
+import os
+import hashlib
+import tempfile
+from datetime import datetime, timedelta
+
+MAX_PROOF_BYTES = int(os.getenv("MAX_PROOF_BYTES", 25 << 20))   # per file
+READ_BYTES = 1 << 20
+GC_GRACE = timedelta(hours=1)   # unreferenced blobs are kept this long before deletion
+
+# proof_blobs documents: {_id: sha256 hex, key, size, content_type, refs, created_at, released_at}
+
+
+class ProofTooLarge(ValueError):
+    pass
+
+
+def blob_key(sha256: str) -> str:
+    return f"Proofs/sha256/{sha256[:2]}/{sha256}"
+
+
+def create_indexes(collection):
+    collection.create_index([("refs", 1), ("released_at", 1)])
+
+
+class HashingFile:
+    """
+    Temp file the multipart parser writes an uploaded proof into (see
+    server.ApiRequest): the bytes are hashed and counted as they arrive, so
+    store() moves the file into storage without reading it again. Readable
+    and seekable like the parser's own temp files; close() removes it
+    unless store() has moved it.
+    """
+
+    def __init__(self, tmp_dir: str = None):
+        fd, self.path = tempfile.mkstemp(prefix="proof-", suffix=".tmp", dir=tmp_dir)
+        self.file = os.fdopen(fd, "w+b")
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        # read, readline, seek, tell, flush, ...
+        return getattr(self.file, name)
+
+    def finish(self, limit: int):
+        """Close the file and return (path, sha256, size); ProofTooLarge past limit bytes."""
+        self.file.close()
+        if self.size > limit:
+            self.close()
+            raise ProofTooLarge(f"Proof file exceeds {limit} bytes")
+        return self.path, self.digest.hexdigest(), self.size
+
+    def close(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _spool(stream, limit: int, tmp_dir: str = None):
+    """
+    Copy stream to a temp file while hashing it. Returns (path, sha256, size);
+    raises ProofTooLarge (temp file removed) once more than limit bytes arrive.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="proof-", suffix=".tmp", dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for block in iter(lambda: stream.read(READ_BYTES), b""):
+                size += len(block)
+                if size > limit:
+                    raise ProofTooLarge(f"Proof file exceeds {limit} bytes")
+                digest.update(block)
+                f.write(block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest(), size
+
+
+def store(storage, collection, stream, content_type: str = None, limit: int = None, tmp_dir: str = None):
+    """
+    Store a proof once per distinct content and add a reference to it. A
+    HashingFile is already hashed and is moved as is; any other stream is
+    copied to a temp file while it is hashed.
+    Returns {"sha256", "key", "size", "content_type"}.
+    """
+    if isinstance(stream, HashingFile):
+        path, sha256, size = stream.finish(limit or MAX_PROOF_BYTES)
+    else:
+        path, sha256, size = _spool(stream, limit or MAX_PROOF_BYTES, tmp_dir)
+    key = blob_key(sha256)
+    try:
+        blob = collection.find_one_and_update(
+            {"_id": sha256},
+            {"$inc": {"refs": 1},
+             "$unset": {"released_at": ""},
+             "$setOnInsert": {"key": key, "size": size, "content_type": content_type or "application/octet-stream",
+                              "created_at": datetime.utcnow()}},
+            upsert=True,
+            return_document=True   # ReturnDocument.AFTER
+        )
+        # same content → same key, so writing it again is harmless
+        if blob["refs"] == 1 or not storage.exists(key):
+            storage.save_file(key, path)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    return {"sha256": sha256, "key": key, "size": size, "content_type": blob["content_type"]}
+
+
+def release(collection, sha256: str):
+    """Drop one reference; the blob itself goes in collect_garbage after GC_GRACE."""
+    collection.update_one({"_id": sha256, "refs": {"$gt": 0}},
+                          {"$inc": {"refs": -1}, "$set": {"released_at": datetime.utcnow()}})
+
+
+def collect_garbage(storage, collection, grace: timedelta = GC_GRACE) -> int:
+    """Delete blobs nobody has referenced for longer than grace."""
+    cutoff = datetime.utcnow() - grace
+    removed = 0
+    for blob in collection.find({"refs": {"$lte": 0}, "released_at": {"$lt": cutoff}}, {"key": 1}):
+        # re-check: a new reference may have arrived since the find
+        if collection.delete_one({"_id": blob["_id"], "refs": {"$lte": 0}}).deleted_count:
+            storage.delete(blob["key"])
+            removed += 1
+    return removed
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+from Team_Rocket_Modules.Detectors import register
+
+
+def _factorize(series: pd.Series):
+    """Integer codes (-1 for missing) and labels, reusing categorical codes when present."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), np.asarray(series.cat.categories, dtype=object)
+    codes, labels = pd.factorize(series, use_na_sentinel=True)
+    return codes.astype(np.int64), np.asarray(labels, dtype=object)
+
+
+def _sums(codes, size, debit, credit):
+    """Debit and credit totals per code, one bincount each."""
+    return (np.bincount(codes, weights=debit, minlength=size),
+            np.bincount(codes, weights=credit, minlength=size))
+
+
+@register("reconciliation", columns=("GL", "Amount"), optional=("Entity", "FS Grouping Main Head"))
+class BalanceReconciler:
+    """
+    Trial balance check: debits (positive Amount), credits (negative Amount)
+    and imbalance per entity, per (entity, FS grouping) and per
+    (entity, GL range), each from one bincount over packed integer keys.
+    Entities whose imbalance exceeds `tolerance` are flagged and the
+    difference is attributed to the GL ranges whose net balance moves in
+    the same direction the most.
+    """
+
+    def __init__(self, df: pd.DataFrame, entity_col: str = "Entity",
+                 group_col: str = "FS Grouping Main Head", step_size: int = 10_000_000,
+                 tolerance: float = 1.0, top_n: int = 3):
+        self.df = df
+        self.entity_col = entity_col if entity_col in df.columns else None
+        self.group_col = group_col if group_col in df.columns else None
+        self.step_size = step_size
+        self.tolerance = tolerance
+        self.top_n = top_n
+        self.text = ""
+        self.totals = {}
+        self.entities = pd.DataFrame()
+        self.groupings = pd.DataFrame()
+        self.attribution = {}
+
+    def getTotals(self):
+        return self.totals
+
+    def getEntities(self):
+        return self.entities
+
+    def getGroupings(self):
+        return self.groupings
+
+    def getAttribution(self):
+        return self.attribution
+
+    def getFindings(self):
+        return {
+            **self.totals,   # total_debits, total_credits, balance_difference
+            "reconciliation": {
+                "entities": self.entities.to_dict(orient="records"),
+                "groupings": self.groupings.to_dict(orient="records"),
+                "attribution": self.attribution,
+            },
+        }
+
+    def getFlagged(self):
+        if self.entities.empty:
+            return []
+        return self.entities.loc[~self.entities["balanced"], "entity"].tolist()
+
+    def _prepare(self):
+        gl = pd.to_numeric(self.df['GL'], errors="coerce").to_numpy(dtype=np.float64)
+        amount = pd.to_numeric(self.df['Amount'], errors="coerce").to_numpy(dtype=np.float64)
+        valid = ~np.isnan(gl) & ~np.isnan(amount)
+
+        if self.entity_col:
+            entity, entity_names = _factorize(self.df[self.entity_col])
+            valid &= entity >= 0
+        else:
+            entity, entity_names = np.zeros(len(gl), dtype=np.int64), np.array(["all"], dtype=object)
+        if self.group_col:
+            group, group_names = _factorize(self.df[self.group_col])
+            group = np.where(group < 0, len(group_names), group)   # missing grouping gets its own bucket
+            group_names = np.append(group_names, "(none)")
+        else:
+            group, group_names = np.zeros(len(gl), dtype=np.int64), np.array(["(none)"], dtype=object)
+
+        amount = amount[valid]
+        gl_range = (gl[valid] // self.step_size).astype(np.int64)
+        return entity[valid], entity_names, group[valid], group_names, gl_range, amount
+
+    def _attribute(self, entity, gl_range, amount, flagged, imbalance, entity_names):
+        """Top contributing GL ranges of each flagged entity."""
+        pick = np.isin(entity, flagged)
+        if not pick.any():
+            return {}
+        # dense (flagged entity × range) net matrix; flagged entities are re-coded 0..k-1
+        row = np.searchsorted(flagged, entity[pick])
+        ranges, col = np.unique(gl_range[pick], return_inverse=True)
+        net = np.bincount(row * len(ranges) + col, weights=amount[pick],
+                          minlength=len(flagged) * len(ranges)).reshape(len(flagged), len(ranges))
+
+        diff = imbalance[flagged]
+        contribution = net * np.sign(diff)[:, None]
+        order = np.argsort(-contribution, axis=1)[:, :self.top_n]
+
+        attribution = {}
+        for i, e in enumerate(flagged):
+            top = [j for j in order[i] if contribution[i, j] > 0]
+            attribution[str(entity_names[e])] = [
+                {"range": str(int(ranges[j]) * self.step_size),
+                 "net": float(net[i, j]),
+                 "share": float(net[i, j] / diff[i])}
+                for j in top
+            ]
+        return attribution
+
+    def run(self):
+        entity, entity_names, group, group_names, gl_range, amount = self._prepare()
+        debit = np.where(amount > 0, amount, 0.0)
+        credit = np.where(amount < 0, -amount, 0.0)
+
+        # per entity
+        n_entities, n_groups = len(entity_names), len(group_names)
+        ent_debit, ent_credit = _sums(entity, n_entities, debit, credit)
+        imbalance = ent_debit - ent_credit
+        balanced = np.abs(imbalance) <= self.tolerance
+        rows = np.bincount(entity, minlength=n_entities)
+        present = rows > 0
+
+        self.entities = pd.DataFrame({
+            "entity": entity_names.astype(str),
+            "rows": rows,
+            "debits": ent_debit,
+            "credits": ent_credit,
+            "imbalance": imbalance,
+            "balanced": balanced,
+        })[present].reset_index(drop=True)
+
+        # per (entity, grouping)
+        grp_debit, grp_credit = _sums(entity * n_groups + group, n_entities * n_groups, debit, credit)
+        grp = pd.DataFrame({
+            "entity": np.repeat(entity_names.astype(str), n_groups),
+            "grouping": np.tile(group_names.astype(str), n_entities),
+            "debits": grp_debit,
+            "credits": grp_credit,
+            "net": grp_debit - grp_credit,
+        })
+        self.groupings = grp[(grp["debits"] != 0) | (grp["credits"] != 0)].reset_index(drop=True)
+
+        flagged = np.flatnonzero(present & ~balanced)
+        self.attribution = self._attribute(entity, gl_range, amount, flagged, imbalance, entity_names)
+
+        self.totals = {
+            "total_debits": float(ent_debit.sum()),
+            "total_credits": float(ent_credit.sum()),
+            "balance_difference": float(imbalance.sum()),
+        }
+        self._describe(flagged, entity_names, imbalance)
+        return self.text
+
+    def _describe(self, flagged, entity_names, imbalance):
+        t = self.totals
+        self.text += (f"Total Debits: {t['total_debits']:.2f}, Total Credits: {t['total_credits']:.2f}, "
+                      f"Balance Difference: {t['balance_difference']:.2f}\n")
+        if not len(flagged):
+            self.text += f"Trial balance balances for all {len(self.entities)} entities (tolerance {self.tolerance})\n"
+            return
+        self.text += f"Out of balance: {len(flagged)} of {len(self.entities)} entities\n"
+        for e in flagged[:50]:
+            name = str(entity_names[e])
+            ranges = ", ".join(f"{a['range']} (net {a['net']:.2f})" for a in self.attribution.get(name, []))
+            self.text += f"{name}: difference {imbalance[e]:.2f}, largest contributing GL ranges {ranges}\n"
+        if len(flagged) > 50:
+            self.text += f"and {len(flagged) - 50} more entities\n"
@@ -0,0 +1,142 @@
+import io
+import math
+
+MAX_LISTED = 25   # GLs / rows shown per table; the full lists stay on the report document
+
+
+def _num(value, digits: int = 2) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "N/A"
+    return f"{value:,.{digits}f}"
+
+
+def _codes(codes, limit: int = MAX_LISTED) -> str:
+    shown = ", ".join(str(c) for c in codes[:limit])
+    return shown + (f" and {len(codes) - limit} more" if len(codes) > limit else "")
+
+
+def render(result: dict, meta: dict) -> str:
+    """
+    Markdown report from the merged detector output of Detectors.run_detectors
+    (result["fault"] and result["fields"]). meta: filename, generated_at,
+    params. Pure string formatting over already-aggregated data.
+    """
+    fields = result.get("fields", {})
+    fault = result.get("fault", {})
+    stats = fields.get("stats", {})
+    sign_ranges = fields.get("sign_ranges", [])
+    outliers = fields.get("z_outliers", [])
+    params = meta.get("params", {})
+    confidence = fields.get("confidence", {})
+    bounds = confidence.get("stats", {})
+
+    md = io.StringIO()
+    md.write("# GL Balance Sheet Assurance Report\n\n")
+    md.write(f"**File:** {meta.get('filename') or 'N/A'}  \n")
+    md.write(f"**Generated on:** {meta.get('generated_at')}\n\n")
+    if meta.get("provisional"):
+        md.write(f"> **Provisional:** estimated from a stratified sample of {confidence.get('sample_rows', 'N/A')} "
+                 f"of {confidence.get('rows', 'N/A')} rows with 95% bounds. The full analysis replaces this "
+                 "report when it finishes.\n\n")
+
+    # Summary
+    sign_faults = sum(r["faults"] for r in sign_ranges)
+    md.write("## Summary\n\n")
+    md.write(f"- Total GL accounts: **{stats.get('total_gl', 'N/A')}** across {stats.get('rows', 'N/A')} rows\n")
+    md.write(f"- Sign anomalies: **{sign_faults}** in {sum(1 for r in sign_ranges if r['faults'])} GL range(s)\n")
+    md.write(f"- Z-score anomalies: **{len(outliers)}** beyond ±{params.get('z_threshold', 3)}\n")
+    if "balance_difference" in fields:
+        md.write(f"- Balance difference: **{_num(fields['balance_difference'])}**\n")
+    md.write(f"- Missing amounts: **{stats.get('nulls', 'N/A')}**\n")
+    fx = fields.get("currency")
+    if fx:
+        period = f", FX rates of {fx['fx_period']}" if fx.get("fx_period") else ""
+        md.write(f"- Amounts in **{fx['reporting_currency']}** from {len(fx['rates'])} currency(ies){period}\n")
+    md.write("\n")
+
+    # Statistics
+    if stats:
+        md.write("## Statistics\n\n")
+        if bounds:
+            md.write("| Measure | Estimate | 95% interval |\n|:--|--:|--:|\n")
+        else:
+            md.write("| Measure | Value |\n|:--|--:|\n")
+        for label, key in (("Mean", "mean"), ("Median", "median"), ("Standard deviation", "std")):
+            interval = f" {_num(bounds[key][0])} to {_num(bounds[key][1])} |" if key in bounds else ""
+            md.write(f"| {label} | {_num(stats.get(key))} |{interval}\n")
+        md.write("\n")
+
+    # Sign anomalies
+    if sign_ranges:
+        md.write("## Sign Anomalies\n\n")
+        md.write(f"GL ranges of {params.get('step_size', 10_000_000):,}; each range is expected to carry the sign "
+                 "most of its postings have.\n\n")
+        md.write("| GL Range | Grouping | Expected | Positives | Negatives | Faulty GLs |\n")
+        md.write("|:--|:--|:--|--:|--:|:--|\n")
+        for r in sign_ranges:
+            expected = r["expected"] if r.get("confident", True) else f"{r['expected']} (uncertain)"
+            md.write(f"| {r['start']}-{r['end']} | {r['grouping']} | {expected} | {r['positives']} "
+                     f"| {r['negatives']} | {_codes(fault.get(r['range'], [])) or '-'} |\n")
+        md.write("\n")
+
+    # Z-score anomalies
+    if "z_outliers" in fields:
+        md.write("## Z-Score Anomalies\n\n")
+        if not outliers:
+            md.write(f"All amounts are within ±{params.get('z_threshold', 3)} standard deviations.\n\n")
+        else:
+            top = sorted(outliers, key=lambda o: abs(o[1]), reverse=True)[:MAX_LISTED]
+            counts = confidence.get("z_outliers")
+            if counts:
+                md.write(f"Estimated mean and standard deviation; 95% range {counts['low']} to {counts['high']} postings.\n\n")
+            md.write(f"{len(outliers)} posting(s); largest {len(top)} by |z|:\n\n| GL | Z-score |\n|:--|--:|\n")
+            md.write("".join(f"| {gl} | {_num(z, 3)} |\n" for gl, z in top))
+            md.write("\n")
+
+    # Duplicates
+    labels = {"duplicate": "Duplicate postings", "reversal": "Reversal pairs", "near_duplicate": "Near-duplicates"}
+    if any(k in fault for k in labels):
+        md.write("## Duplicate and Reversal Postings\n\n")
+        for key, label in labels.items():
+            if fault.get(key):
+                md.write(f"- {label}: {len(fault[key])} GL(s): {_codes(fault[key])}\n")
+        md.write("\n")
+
+    # Benford
+    first = fields.get("benford", {}).get("first_digit", [])
+    if first:
+        md.write("## Benford's Law Conformity\n\n| Entity | Amounts | MAD | Conformity | Chi-square |\n")
+        md.write("|:--|--:|--:|:--|--:|\n")
+        flagged = [r for r in first if r["conformity"] in ("marginal", "nonconformity")]
+        for r in (flagged if len(first) > MAX_LISTED else first)[:MAX_LISTED]:
+            md.write(f"| {r['entity']} | {r['n']} | {_num(r['mad'], 4)} | {r['conformity']} | {_num(r['chi2'])} |\n")
+        md.write("\n")
+
+    # Reconciliation
+    recon = fields.get("reconciliation")
+    if recon:
+        out = [e for e in recon["entities"] if not e["balanced"]]
+        md.write("## Debit and Credit Reconciliation\n\n")
+        md.write(f"- Total debits: **{_num(fields.get('total_debits'))}**, total credits: "
+                 f"**{_num(fields.get('total_credits'))}**\n")
+        md.write(f"- Out-of-balance entities: **{len(out)}** of {len(recon['entities'])}\n\n")
+        if out:
+            md.write("| Entity | Difference | Largest contributing GL ranges |\n|:--|--:|:--|\n")
+            for e in sorted(out, key=lambda e: abs(e["imbalance"]), reverse=True)[:MAX_LISTED]:
+                ranges = ", ".join(a["range"] for a in recon["attribution"].get(e["entity"], []))
+                md.write(f"| {e['entity']} | {_num(e['imbalance'])} | {ranges or '-'} |\n")
+            md.write("\n")
+
+    # Missing data
+    md.write("## Missing Data\n\n")
+    nulls = stats.get("nulls")
+    if nulls is None:
+        md.write("Not checked.\n")
+    else:
+        md.write("No missing amounts.\n" if nulls == 0 else f"{nulls} row(s) have no amount.\n")
+    for code, rows in (fx or {}).get("unconverted", {}).items():
+        md.write(f"- {rows} row(s) in {code} have no FX rate and were left without an amount\n")
+    skipped = result.get("skipped", {})
+    for name, columns in skipped.items():
+        md.write(f"- Check `{name}` skipped: missing column(s) {', '.join(columns)}\n")
+    return md.getvalue()
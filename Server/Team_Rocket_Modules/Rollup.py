@@ -0,0 +1,188 @@
+from datetime import datetime
+
+# rollups documents, one per (username, level, key, period):
+#   {username, period: "YYYY-MM", level, key, entity, region, department, category,
+#    rows, debits, credits, net, fault_rows, updated_at}
+# level "cell" is the finest grain (entity × region × department × GL category,
+# key "entity|region|department|category", plus report_id); every other level
+# is a maintained sum over the cells, keyed by its one dimension ("" for total).
+DIMENSIONS = {
+    "entity": "Entity",
+    "region": "Region",
+    "department": "Department",
+    "category": "FS Grouping Main Head",
+}
+LEVELS = ("entity", "region", "department", "category", "total")
+MEASURES = ("rows", "debits", "credits", "net", "fault_rows")
+UNASSIGNED = "Unassigned"   # label for rows (or sheets) without the dimension
+# numpy / pandas are imported inside cells(), which only runs with an
+# analysis; the read side is plain Mongo queries.
+
+
+def create_indexes(collection):
+    collection.create_index([("username", 1), ("level", 1), ("key", 1), ("period", 1)], unique=True)
+    collection.create_index([("username", 1), ("period", 1), ("level", 1), ("entity", 1)])
+
+
+def _codes(df, column: str):
+    """
+    Integer codes and labels for one dimension. Labels are stripped before
+    codes are assigned, so " Current Liabilities" and "Current Liabilities"
+    share one code; missing or blank values (or column) → UNASSIGNED.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=np.int64), np.array([UNASSIGNED], dtype=object)
+    s = df[column]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, raw = s.cat.codes.to_numpy().astype(np.int64), s.cat.categories
+    else:
+        codes, raw = pd.factorize(s, use_na_sentinel=True)
+        codes = codes.astype(np.int64)
+    # normalize the (few) distinct labels, then merge the ones that became equal
+    stripped = pd.Series([str(label).strip() for label in raw], dtype=object).replace("", None)
+    merged, labels = pd.factorize(stripped, use_na_sentinel=True)
+    labels = np.array(list(labels) + [UNASSIGNED], dtype=object)
+    merged = np.where(merged < 0, len(labels) - 1, merged).astype(np.int64)
+    # code -1 (missing) picks the UNASSIGNED slot appended at the end
+    return np.append(merged, len(labels) - 1)[codes], labels
+
+
+def cell_key(cell: dict) -> str:
+    return "|".join(cell[dim] for dim in DIMENSIONS)
+
+
+def cells(df, fault_gls=()) -> list:
+    """
+    Cube cells of one analyzed frame: measures per (entity, region,
+    department, category), from one factorize of the packed dimension codes
+    and one bincount per measure. fault_rows counts rows whose GL is in
+    fault_gls.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if df.empty:
+        return []
+    key = np.zeros(len(df), dtype=np.int64)
+    labels = []
+    for column in DIMENSIONS.values():
+        codes, names = _codes(df, column)
+        key = key * len(names) + codes
+        labels.append(names)
+    group, uniques = pd.factorize(key, sort=True)
+    size = len(uniques)
+
+    amount = np.nan_to_num(df["Amount"].to_numpy(dtype=np.float64))
+    debits = np.bincount(group, weights=np.where(amount > 0, amount, 0.0), minlength=size)
+    credits = np.bincount(group, weights=np.where(amount < 0, -amount, 0.0), minlength=size)
+    rows = np.bincount(group, minlength=size)
+    faulty = np.isin(df["GL"].to_numpy(), np.fromiter((int(g) for g in fault_gls), dtype=np.int64))
+    fault_rows = np.bincount(group, weights=faulty, minlength=size)
+
+    # unpack each group's key back into its dimension labels
+    out = []
+    for i, packed in enumerate(uniques):
+        parts = []
+        for names in reversed(labels):
+            packed, code = divmod(int(packed), len(names))
+            parts.append(names[code])
+        cell = dict(zip(DIMENSIONS, reversed(parts)))
+        cell.update(rows=int(rows[i]), debits=float(debits[i]), credits=float(credits[i]),
+                    net=float(debits[i] - credits[i]), fault_rows=int(fault_rows[i]))
+        out.append(cell)
+    return out
+
+
+def update(collection, username, period: str, new_cells: list, report_id: str = None):
+    """
+    Replace the cube slice of the entities in new_cells for (username,
+    period) and move every rollup level by the difference between the new
+    and the replaced cells, so a re-upload of one entity touches only that
+    entity's cells and the rollup documents they fall in.
+    """
+    from pymongo import DeleteMany, UpdateOne
+
+    entities = sorted({c["entity"] for c in new_cells})
+    if not entities:
+        return 0
+    base = {"username": username, "period": period}
+    slice_query = {**base, "level": "cell", "entity": {"$in": entities}}
+    old_cells = list(collection.find(slice_query, {"_id": 0, **{f: 1 for f in (*DIMENSIONS, *MEASURES)}}))
+
+    deltas = {}
+    for sign, docs in ((-1, old_cells), (1, new_cells)):
+        for cell in docs:
+            for level in LEVELS:
+                key = "" if level == "total" else cell[level]
+                delta = deltas.setdefault((level, key), dict.fromkeys(MEASURES, 0))
+                for m in MEASURES:
+                    delta[m] += sign * cell[m]
+
+    now = datetime.utcnow()
+    ops = [DeleteMany(slice_query)]
+    # cells are upserted with $inc by key: cells sharing a key add up instead
+    # of colliding on the unique index, and the deltas above count them the same way
+    ops += [
+        UpdateOne({**base, "level": "cell", "key": cell_key(c)},
+                  {"$inc": {m: c[m] for m in MEASURES},
+                   "$set": {**{d: c[d] for d in DIMENSIONS}, "report_id": report_id, "updated_at": now}},
+                  upsert=True)
+        for c in new_cells
+    ]
+    ops += [
+        UpdateOne({**base, "level": level, "key": key},
+                  {"$inc": delta, "$set": {"updated_at": now, **({level: key} if level != "total" else {})}},
+                  upsert=True)
+        for (level, key), delta in deltas.items()
+        if any(delta.values())
+    ]
+    collection.bulk_write(ops, ordered=True)
+    # rollups whose last cell moved to another key
+    collection.delete_many({**base, "level": {"$ne": "cell"}, "rows": {"$lte": 0}})
+    return len(new_cells)
+
+
+def rebuild(collection, username, period: str):
+    """Recompute every rollup level of (username, period) from its cells (repair / backfill)."""
+    base = {"username": username, "period": period}
+    collection.delete_many({**base, "level": {"$ne": "cell"}})
+    now = datetime.utcnow()
+    for level in LEVELS:
+        total = level == "total"
+        docs = [
+            {**base, "level": level, "key": "" if total else row["_id"], **({} if total else {level: row["_id"]}),
+             **{m: row[m] for m in MEASURES}, "updated_at": now}
+            for row in collection.aggregate([
+                {"$match": {**base, "level": "cell"}},
+                {"$group": {"_id": None if total else f"${level}", **{m: {"$sum": f"${m}"} for m in MEASURES}}},
+            ])
+        ]
+        if docs:
+            collection.insert_many(docs)
+
+
+def read(collection, username, level: str, period: str = None, key: str = None, limit: int = 5000):
+    """Rollup documents of one level: all keys of a period, or the periods of one key (newest first)."""
+    query = {"username": username, "level": level}
+    if period is not None:
+        query["period"] = period
+    if key is not None:
+        query["key"] = key
+    projection = {"_id": 0, "username": 0, "updated_at": 0}
+    return list(collection.find(query, projection).sort([("period", -1), ("key", 1)]).limit(limit))
+
+
+def variance(current: list, previous: list) -> list:
+    """Join two periods of one level by key: net change and its share of the previous net."""
+    before = {doc["key"]: doc for doc in previous}
+    out = []
+    for doc in current:
+        prior = before.get(doc["key"], {})
+        prior_net = prior.get("net", 0.0)
+        change = doc["net"] - prior_net
+        out.append({**doc, "previous_net": prior_net, "change": change,
+                    "change_pct": (change / abs(prior_net) * 100) if prior_net else None})
+    return out
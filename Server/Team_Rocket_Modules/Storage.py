@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+import contextlib
+
+COPY_BYTES = 1 << 20
+
+
+class LocalStorage:
+    """
+    Files under a root directory, addressed by '/'-separated keys
+    (e.g. "Report/<username>/GL_Report_x.md"). Safe for several workers on
+    one host, or several hosts when root is a shared volume.
+    """
+
+    def __init__(self, root: str = "."):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, *key.split("/")))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def save(self, key: str, data) -> str:
+        """
+        Store bytes or a readable binary file object under key. The write goes
+        to a temp file first so readers never see a half-written object.
+        """
+        with self.writer(key) as f:
+            if isinstance(data, (bytes, bytearray)):
+                f.write(data)
+            else:
+                shutil.copyfileobj(data, f, COPY_BYTES)
+        return key
+
+    @contextlib.contextmanager
+    def writer(self, key: str):
+        """
+        Writable binary file that becomes key when the block exits cleanly,
+        for producers that write a file themselves; discarded on error.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # unique per call (threads of one worker included), same directory so the rename is atomic
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def save_file(self, key: str, src_path: str) -> str:
+        """
+        Move a finished local file under key. A rename when src_path is on
+        the same filesystem as root, a copy otherwise; src_path is gone after.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.move(src_path, path)
+        return key
+
+    def open(self, key: str):
+        return open(self._path(key), "rb")
+
+    def local_path(self, key: str) -> str:
+        """Filesystem path of key (lets callers memory-map it)."""
+        return self._path(key)
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class GridFSStorage:
+    """
+    Same interface backed by MongoDB GridFS, so every worker on every node
+    sees the same files as long as they share the database.
+    """
+
+    def __init__(self, db, bucket_name: str = "storage"):
+        import gridfs
+
+        self.bucket = gridfs.GridFSBucket(db, bucket_name=bucket_name)
+        self.files = db[f"{bucket_name}.files"]
+        self.files.create_index("filename")
+
+    def save(self, key: str, data) -> str:
+        # upload the new revision first, then drop older ones
+        self._drop_older(key, self.bucket.upload_from_stream(key, data))
+        return key
+
+    @contextlib.contextmanager
+    def writer(self, key: str):
+        """Upload stream that becomes key's current revision when the block exits cleanly."""
+        stream = self.bucket.open_upload_stream(key)
+        try:
+            yield stream
+        except BaseException:
+            stream.abort()
+            raise
+        stream.close()
+        self._drop_older(key, stream._id)
+
+    def _drop_older(self, key: str, new_id):
+        for old in self.files.find({"filename": key, "_id": {"$ne": new_id}}, {"_id": 1}):
+            self.bucket.delete(old["_id"])
+
+    def save_file(self, key: str, src_path: str) -> str:
+        """Upload a finished local file under key, then remove src_path."""
+        with open(src_path, "rb") as f:
+            self.save(key, f)
+        os.remove(src_path)
+        return key
+
+    def open(self, key: str):
+        import gridfs
+
+        try:
+            return self.bucket.open_download_stream_by_name(key)
+        except gridfs.errors.NoFile:
+            raise FileNotFoundError(key)
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def local_path(self, key: str):
+        """GridFS files have no local path."""
+        return None
+
+    def exists(self, key: str) -> bool:
+        return self.files.find_one({"filename": key}, {"_id": 1}) is not None
+
+    def delete(self, key: str):
+        for doc in self.files.find({"filename": key}, {"_id": 1}):
+            self.bucket.delete(doc["_id"])
+
+
+def get_storage(db=None):
+    """
+    Pick the backend from STORAGE_BACKEND ("local" or "gridfs").
+    Local files live under STORAGE_ROOT (default: current directory).
+    """
+    backend = os.getenv("STORAGE_BACKEND", "local").lower()
+    if backend == "gridfs":
+        if db is None:
+            raise ValueError("GridFS storage needs a database handle")
+        return GridFSStorage(db)
+    return LocalStorage(os.getenv("STORAGE_ROOT", "."))
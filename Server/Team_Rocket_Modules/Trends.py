@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+# uploaded_at is stored as "YYYY-MM-DD HH:MM:SS", so a prefix is a period
+PERIOD_LENGTH = {"day": 10, "month": 7, "year": 4}
+
+
+def window_start(days: int) -> str:
+    return (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def fault_trend_pipeline(username, days: int, period: str = "month"):
+    """
+    Aggregation pipeline over report documents: number of faulty GLs per
+    (username, period, GL range) plus the number of reports behind each bucket.
+    username=None covers every user.
+    """
+    match = {"uploaded_at": {"$gte": window_start(days)}, "fault": {"$type": "object"}}
+    if username is not None:
+        match["username"] = username
+
+    return [
+        {"$match": match},
+        {"$project": {
+            "username": 1,
+            "period": {"$substr": ["$uploaded_at", 0, PERIOD_LENGTH[period]]},
+            # per-range counts: stored directly since fault_schema 2, list sizes before
+            "fault": {"$cond": [
+                {"$ifNull": ["$fault_counts", False]},
+                {"$objectToArray": "$fault_counts"},
+                {"$map": {
+                    "input": {"$objectToArray": "$fault"},
+                    "as": "f",
+                    "in": {"k": "$$f.k", "v": {"$size": "$$f.v"}},
+                }},
+            ]},
+        }},
+        {"$unwind": "$fault"},
+        {"$group": {
+            "_id": {"username": "$username", "period": "$period", "range": "$fault.k"},
+            "faults": {"$sum": "$fault.v"},
+            "reports": {"$addToSet": "$_id"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "username": "$_id.username",
+            "period": "$_id.period",
+            "range": "$_id.range",
+            "faults": 1,
+            "reports": {"$size": "$reports"},
+        }},
+        {"$sort": {"username": 1, "period": 1, "range": 1}},
+    ]
+
+
+def cache_key(username, days: int, period: str) -> dict:
+    return {"username": username or "*", "days": days, "period": period}
+
+
+def get_trends(reports_collection, cache_collection, username, days: int, period: str = "month"):
+    """
+    Trend rows for (username, window, period), served from cache_collection
+    when present, otherwise computed with one aggregate() call and cached.
+    """
+    key = cache_key(username, days, period)
+    cached = cache_collection.find_one(key, {"_id": 0, "rows": 1})
+    if cached is not None:
+        return cached["rows"], True
+
+    rows = list(reports_collection.aggregate(fault_trend_pipeline(username, days, period)))
+    cache_collection.replace_one(key, {**key, "rows": rows, "computed_at": datetime.utcnow()}, upsert=True)
+    return rows, False
+
+
+def invalidate(cache_collection, username):
+    """Drop cached trends that include username's reports (its own and the all-users ones)."""
+    cache_collection.delete_many({"username": {"$in": [username, "*"]}})
@@ -0,0 +1,200 @@
+import os
+import json
+import hashlib
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 2 << 30))      # 2 GiB per workbook
+MAX_CHUNK_BYTES = int(os.getenv("MAX_CHUNK_BYTES", 64 << 20))       # 64 MiB per request
+MIN_CHUNK_BYTES = 256 << 10
+DEFAULT_CHUNK_BYTES = 8 << 20
+READ_BYTES = 1 << 20
+
+
+class UploadError(ValueError):
+    """A chunk or upload that breaks the protocol (size, order, hash)."""
+
+
+def plan(size: int, chunk_size: int = None):
+    """
+    Validate an upload request and return (chunk_size, n_chunks). Every chunk
+    is chunk_size bytes except the last one.
+    """
+    chunk_size = int(chunk_size or DEFAULT_CHUNK_BYTES)
+    if size <= 0:
+        raise UploadError("size must be positive")
+    if size > MAX_UPLOAD_BYTES:
+        raise UploadError(f"File too large: {size} bytes (limit {MAX_UPLOAD_BYTES})")
+    if not MIN_CHUNK_BYTES <= chunk_size <= MAX_CHUNK_BYTES:
+        raise UploadError(f"chunk_size must be between {MIN_CHUNK_BYTES} and {MAX_CHUNK_BYTES}")
+    return chunk_size, -(-size // chunk_size)
+
+
+def chunk_length(size: int, chunk_size: int, index: int) -> int:
+    return min(chunk_size, size - index * chunk_size)
+
+
+class UploadStaging:
+    """
+    Staging files for chunked uploads: one preallocated file per upload,
+    each chunk written in place at its offset, so finished uploads need no
+    assembly step. Keep root on the same filesystem as LocalStorage's root
+    so completed files can be moved into storage with a rename.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, upload_id: str) -> str:
+        return os.path.join(self.root, f"{upload_id}.part")
+
+    def create(self, upload_id: str, size: int, chunk_size: int):
+        # sparse on most filesystems: no bytes are written up front
+        with open(self.path(upload_id), "wb") as f:
+            f.truncate(size)
+
+    def exists(self, upload_id: str) -> bool:
+        return os.path.exists(self.path(upload_id))
+
+    def write_chunk(self, upload_id: str, offset: int, length: int, stream, sha256: str = None) -> str:
+        """
+        Copy exactly length bytes from stream to offset, hashing as they go.
+        Raises UploadError on a short body or a hash mismatch; returns the
+        chunk's sha256 hex digest.
+        """
+        digest = hashlib.sha256()
+        remaining = length
+        with open(self.path(upload_id), "r+b") as f:
+            f.seek(offset)
+            while remaining:
+                block = stream.read(min(READ_BYTES, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                f.write(block)
+                remaining -= len(block)
+        if remaining or stream.read(1):
+            raise UploadError(f"Chunk must be exactly {length} bytes")
+        if sha256 and digest.hexdigest() != sha256.lower():
+            raise UploadError("Chunk sha256 mismatch")
+        return digest.hexdigest()
+
+    def sha256(self, upload_id: str) -> str:
+        """Whole-file sha256, read once from disk."""
+        digest = hashlib.sha256()
+        with open(self.path(upload_id), "rb") as f:
+            for block in iter(lambda: f.read(READ_BYTES), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def commit(self, upload_id: str, storage, key: str) -> str:
+        """Move the finished file into storage under key (a rename on local storage)."""
+        return storage.save_file(key, self.path(upload_id))
+
+    def discard(self, upload_id: str):
+        try:
+            os.remove(self.path(upload_id))
+        except FileNotFoundError:
+            pass
+
+
+class _ChunkReader:
+    """Reads at most length bytes of stream, hashing them as they pass."""
+
+    def __init__(self, stream, length: int):
+        self.stream = stream
+        self.remaining = length
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        block = self.stream.read(min(size, READ_BYTES)) if size else b""
+        self.digest.update(block)
+        self.remaining -= len(block)
+        return block
+
+
+class _ConcatReader:
+    """One readable stream over several storage objects, in order."""
+
+    def __init__(self, storage, keys):
+        self.storage = storage
+        self.keys = iter(keys)
+        self.current = None
+
+    def read(self, size: int = -1) -> bytes:
+        size = READ_BYTES if size is None or size < 0 else size
+        while True:
+            if self.current is None:
+                key = next(self.keys, None)
+                if key is None:
+                    return b""
+                self.current = self.storage.open(key)
+            block = self.current.read(size)
+            if block:
+                return block
+            self.current.close()
+            self.current = None
+
+
+class StorageStaging:
+    """
+    Same interface as UploadStaging, with every chunk stored as its own
+    object in the storage backend (Uploads/<upload_id>/<offset>) instead of
+    on node-local disk. Chunk PUTs and /complete can then reach any node,
+    which the GridFS backend needs.
+    """
+
+    root = None   # no local directory: proofs spool to the system temp dir
+
+    def __init__(self, storage, prefix: str = "Uploads"):
+        self.storage = storage
+        self.prefix = prefix
+
+    def _key(self, upload_id: str, name: str) -> str:
+        return f"{self.prefix}/{upload_id}/{name}"
+
+    def _chunk_keys(self, upload_id: str):
+        plan = json.loads(self.storage.read(self._key(upload_id, "plan.json")))
+        return [self._key(upload_id, f"{offset:016d}.part")
+                for offset in range(0, plan["size"], plan["chunk_size"])]
+
+    def create(self, upload_id: str, size: int, chunk_size: int):
+        plan = {"size": size, "chunk_size": chunk_size}
+        self.storage.save(self._key(upload_id, "plan.json"), json.dumps(plan).encode("utf-8"))
+
+    def exists(self, upload_id: str) -> bool:
+        return self.storage.exists(self._key(upload_id, "plan.json"))
+
+    def write_chunk(self, upload_id: str, offset: int, length: int, stream, sha256: str = None) -> str:
+        """Store exactly length bytes of stream as the chunk at offset; see UploadStaging.write_chunk."""
+        key = self._key(upload_id, f"{offset:016d}.part")
+        reader = _ChunkReader(stream, length)
+        self.storage.save(key, reader)
+        if reader.remaining or stream.read(1):
+            self.storage.delete(key)
+            raise UploadError(f"Chunk must be exactly {length} bytes")
+        if sha256 and reader.digest.hexdigest() != sha256.lower():
+            self.storage.delete(key)
+            raise UploadError("Chunk sha256 mismatch")
+        return reader.digest.hexdigest()
+
+    def sha256(self, upload_id: str) -> str:
+        digest = hashlib.sha256()
+        reader = _ConcatReader(self.storage, self._chunk_keys(upload_id))
+        for block in iter(lambda: reader.read(READ_BYTES), b""):
+            digest.update(block)
+        return digest.hexdigest()
+
+    def commit(self, upload_id: str, storage, key: str) -> str:
+        """Write the chunks, in order, to key as one object and drop them."""
+        storage.save(key, _ConcatReader(self.storage, self._chunk_keys(upload_id)))
+        self.discard(upload_id)
+        return key
+
+    def discard(self, upload_id: str):
+        if not self.exists(upload_id):
+            return
+        for key in self._chunk_keys(upload_id):
+            self.storage.delete(key)
+        self.storage.delete(self._key(upload_id, "plan.json"))
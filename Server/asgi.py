@@ -0,0 +1,243 @@
+"""
+ASGI serving mode. The read and review endpoints that reviewers poll
+(/session-check, /user-reports, /get-report, /my-reviews, /report-reviews,
+/review-log, /request-review, /update-review-status) run natively async on
+pymongo's AsyncMongoClient with file reads in worker threads, so a waiting
+request holds no thread. Every other route is the Flask app from server.py,
+served through a2wsgi on its own WSGI_WORKERS thread pool, so uploads and
+analysis never block the event loop or the polling endpoints.
+
+Both modes share the database, the storage backend, the response builders
+and the Flask session cookie (same SECRET_KEY and signature).
+
+    cd Server && uvicorn asgi:app --workers 4
+"""
+import os
+import contextlib
+from datetime import datetime
+import anyio
+from bson import ObjectId
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Route, Match
+
+import server
+from Team_Rocket_Modules.Lazy import Lazy
+from Team_Rocket_Modules import GLIndex
+
+WSGI_WORKERS = int(os.getenv("WSGI_WORKERS", 8))   # threads for the Flask routes (uploads, analysis, exports)
+
+
+def init_async_db():
+    from pymongo import AsyncMongoClient
+    return AsyncMongoClient(server.MONGO_URI)["Finnovate"]
+
+
+adb = Lazy(init_async_db)
+reports_collection = Lazy(lambda: adb.get()["reports"])
+reviews_collection = Lazy(lambda: adb.get()["reviews"])
+gl_index_collection = Lazy(lambda: adb.get()["gl_index"])
+
+
+# -------------------- HELPERS --------------------
+def jsonify(payload, status: int = 200):
+    """Same body as Flask's jsonify (server.app's JSON provider)."""
+    return Response(server.app.json.dumps(payload), status_code=status, media_type="application/json")
+
+
+def get_session(request):
+    """The Flask session from the request cookie, opened by server.app's own session interface."""
+    return server.app.session_interface.open_session(server.app, request) or {}
+
+
+# -------------------- AUTH --------------------
+async def session_check(request):
+    session = get_session(request)
+    if 'username' in session:
+        return jsonify({"logged_in": True, "username": session['username']})
+    else:
+        return jsonify({"logged_in": False})
+
+
+# -------------------- REPORTS --------------------
+async def get_user_reports(request):
+    session = get_session(request)
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}, 401)
+
+    reports = await reports_collection.find({"username": session['username']}, server.REPORT_SUMMARY_FIELDS).to_list()
+    formatted_reports = [server.report_summary(r) for r in reports]
+    return jsonify({
+        "status": "success",
+        "count": len(formatted_reports),
+        "reports": formatted_reports
+    })
+
+
+async def get_report_by_id(request):
+    session = get_session(request)
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}, 401)
+
+    counts_only = request.query_params.get("fault") == "counts"
+    report_id = request.path_params["report_id"]
+
+    try:
+        report = await reports_collection.find_one({"_id": ObjectId(report_id)}, server.report_projection(counts_only))
+        if not report:
+            return jsonify({"status": "fail", "message": "Report not found"}, 404)
+        if server.needs_fault_lists(report, counts_only):
+            report.update(await reports_collection.find_one({"_id": report["_id"]}, {"fault": 1}) or {})
+
+        # file reads (local disk or GridFS) and the z-score parse run in one worker-thread hop
+        markdown_content, z_score = await anyio.to_thread.run_sync(server.read_report_files, report)
+        if markdown_content is None:
+            return jsonify({"status": "fail", "message": f"File not found at {report.get('report_path')}"}, 404)
+
+        return jsonify(server.report_payload(report, markdown_content, z_score, counts_only))
+
+    except Exception as e:
+        return jsonify({
+            "status": "fail",
+            "message": f"Error fetching report file: {str(e)}"
+        }, 500)
+
+
+# -------------------- REVIEWS --------------------
+async def request_review(request):
+    session = get_session(request)
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}, 401)
+
+    data = await request.json()
+    report_id = data.get("report_id")
+    gl_code = data.get("gl_code")
+    gl_range = data.get("gl_range")
+    remark = data.get("remark", "Inconsistency in Value")
+    username = session['username']
+
+    if not report_id or gl_code is None:
+        return jsonify({"status": "fail", "message": "Missing report_id or gl_code"}, 400)
+    # GL codes are stored as int, whatever type the client sends
+    gl_code = GLIndex.to_gl(gl_code)
+    if gl_code < 0:
+        return jsonify({"status": "fail", "message": "gl_code must be a number"}, 400)
+
+    existing = await reviews_collection.find_one({"report_id": report_id, "gl_code": GLIndex.gl_query(gl_code)}, {"_id": 1})
+    timestamp = datetime.utcnow().isoformat()
+
+    if existing:
+        await reviews_collection.update_one(
+            {"_id": existing["_id"]},
+            server.review_status_update("waiting", "ask_for_review", username, gl_code, timestamp)
+        )
+    else:
+        await reviews_collection.insert_one(server.new_review(report_id, username, gl_range, gl_code, remark, timestamp))
+
+    await gl_index_collection.update_many(*GLIndex.status_update(report_id, [gl_code], "waiting"))
+    return jsonify({"status": "success", "gl_code": gl_code, "new_status": "waiting"})
+
+
+async def get_my_reviews(request):
+    session = get_session(request)
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}, 401)
+
+    assigned_reviews = await reviews_collection.find({"assigned_to": session['username']}).to_list()
+    for r in assigned_reviews:
+        r["_id"] = str(r["_id"])
+
+    return jsonify({"status": "success", "reviews": assigned_reviews})
+
+
+async def update_review_status(request):
+    session = get_session(request)
+    data = await request.json()
+    report_id = data.get("report_id")
+    decision = data.get("decision")  # granted | rejected
+    reviewer = session.get("username", "reviewer")
+
+    timestamp = datetime.utcnow().isoformat()
+    gl_code = GLIndex.to_gl(data.get("gl_code"))
+
+    result = await reviews_collection.update_one(
+        {"report_id": report_id, "gl_code": GLIndex.gl_query(gl_code)},
+        server.review_status_update(decision, decision, reviewer, gl_code, timestamp)
+    )
+    if result.modified_count == 0:
+        return jsonify({"status": "fail", "message": "Review not found"}, 404)
+
+    await gl_index_collection.update_many(*GLIndex.status_update(report_id, [gl_code], decision))
+    return jsonify({"status": "success", "decision": decision})
+
+
+async def get_review_log(request):
+    report_id = request.path_params["report_id"]
+    gl_code = GLIndex.to_gl(request.path_params["gl_code"])
+    review = await reviews_collection.find_one(
+        {"report_id": report_id, "gl_code": GLIndex.gl_query(gl_code)},
+        {"_id": 0}
+    )
+    if not review:
+        return jsonify({"status": "fail", "message": "No review found"}, 404)
+
+    return jsonify({
+        "status": "success",
+        "gl_code": gl_code,
+        "logs": review.get("logs", []),
+        "current_status": review.get("status", "unknown")
+    })
+
+
+async def get_report_reviews(request):
+    reviews = await reviews_collection.find({"report_id": request.path_params["report_id"]}, {"_id": 0}).to_list()
+    return jsonify({"status": "success", "count": len(reviews), "reviews": reviews})
+
+
+# -------------------- APP --------------------
+ROUTES = [
+    Route("/session-check", session_check, methods=["GET"]),
+    Route("/user-reports", get_user_reports, methods=["GET"]),
+    Route("/get-report/{report_id}", get_report_by_id, methods=["GET"]),
+    Route("/request-review", request_review, methods=["POST"]),
+    Route("/my-reviews", get_my_reviews, methods=["GET"]),
+    Route("/update-review-status", update_review_status, methods=["POST"]),
+    Route("/review-log/{report_id}/{gl_code}", get_review_log, methods=["GET"]),
+    Route("/report-reviews/{report_id}", get_report_reviews, methods=["GET"]),
+]
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # indexes are created by the sync connection's first use; do it before serving
+    await anyio.to_thread.run_sync(server.db.get)
+    yield
+
+
+def create_app():
+    """
+    ASGI app: the async routes (with CORS as flask_cors sets it up for the
+    Flask app) and the Flask app for every other path.
+    """
+    reads = Starlette(
+        routes=ROUTES,
+        lifespan=lifespan,
+        middleware=[Middleware(CORSMiddleware, allow_origin_regex=".*", allow_credentials=True,
+                               allow_methods=["*"], allow_headers=["*"])],
+    )
+    flask = WSGIMiddleware(server.app, workers=WSGI_WORKERS)
+
+    async def app(scope, receive, send):
+        # lifespan and any path an async route matches (OPTIONS preflights included) → Starlette
+        if scope["type"] != "http" or any(route.matches(scope)[0] != Match.NONE for route in ROUTES):
+            await reads(scope, receive, send)
+        else:
+            await flask(scope, receive, send)
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,12 @@
+"""
+One-off: index the fault maps of reports uploaded before the gl_index
+collection existed (safe to re-run, indexed reports are skipped).
+
+    cd Server && python backfill_gl_index.py
+"""
+import server
+from Team_Rocket_Modules import GLIndex
+
+if __name__ == "__main__":
+    added = GLIndex.backfill(server.reports_collection, server.reviews_collection, server.gl_index_collection)
+    print(f"Indexed {added} report(s)")
@@ -0,0 +1,98 @@
+"""
+Peak-RSS comparison of the raw ingest (object text columns + a defensive copy
+of the frame, as GLAnalyzer used to take) against the normalized schema from
+Dataset.normalize analyzed copy-free.
+
+The synthetic trial balance is written once to Arrow files (one per schema);
+each mode then loads its file and runs GLAnalyzer in a fresh process.
+
+    cd Server && python -m benchmarks.ingest_memory --rows 3000000
+"""
+import os
+import sys
+import argparse
+import resource
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+
+HEADS = ["Current Assets", "Current Liabilities", "Equity", "Revenue", "Expenses",
+         "Non Current Assets", "Non Current Liabilities", "Other Income"]
+
+
+def synthetic_trial_balance(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Frame shaped like pd.read_excel output for a trial balance sheet."""
+    rng = np.random.default_rng(seed)
+    gl = rng.integers(10_000_000, 60_000_000, rows)
+    heads = np.array(HEADS, dtype=object)[(gl // 10_000_000) % len(HEADS)]
+    return pd.DataFrame({
+        "GL": gl,
+        "GL Name": np.array([f"GL {g}" for g in gl[:1000]], dtype=object)[rng.integers(0, 1000, rows)],
+        "Gr GL": gl // 1000,
+        "Gr GL Name": heads,
+        "Amount": rng.normal(0, 1e6, rows),
+        "FS Grouping Main Head": heads,
+        "FS Grouping Main Sub Head": heads,
+    }).astype({c: object for c in ["GL Name", "Gr GL Name", "FS Grouping Main Head", "FS Grouping Main Sub Head"]})
+
+
+def peak_rss_mb() -> float:
+    # VmHWM is reset on exec; ru_maxrss (KiB on Linux) is inherited across fork+exec
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_once(mode: str, path: str):
+    from Team_Rocket_Modules.Process import GLAnalyzer
+    from Team_Rocket_Modules.Storage import LocalStorage
+    from Team_Rocket_Modules.Dataset import load_columnar
+
+    storage = LocalStorage(os.path.dirname(path))
+    df = load_columnar(storage, os.path.basename(path))
+    if mode == "normalized":
+        analyzer = GLAnalyzer(df)
+    else:
+        analyzer = GLAnalyzer(df.copy())
+    analyzer.run_analysis()
+    frame_mb = df.memory_usage(deep=True).sum() / 2**20
+    print(f"{mode:>10}: frame {frame_mb:9.1f} MB  peak RSS {peak_rss_mb():9.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--mode", choices=["raw", "normalized"])
+    parser.add_argument("--path")
+    args = parser.parse_args()
+
+    if args.mode:
+        run_once(args.mode, args.path)
+        return
+
+    from Team_Rocket_Modules.Storage import LocalStorage
+    from Team_Rocket_Modules.Dataset import normalize, save_columnar
+
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = LocalStorage(tmp)
+        df = synthetic_trial_balance(args.rows)
+        save_columnar(storage, "raw.arrow", df)
+        save_columnar(storage, "normalized.arrow", normalize(df))
+        del df
+
+        print(f"{args.rows:,} rows")
+        # each mode in its own process so peak RSS is not shared
+        for mode in ("raw", "normalized"):
+            subprocess.run([sys.executable, "-m", "benchmarks.ingest_memory", "--mode", mode,
+                            "--path", os.path.join(tmp, f"{mode}.arrow")], cwd=here, check=True)
+
+
+if __name__ == "__main__":
+    main()
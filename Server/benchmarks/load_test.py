@@ -0,0 +1,344 @@
+"""
+End-to-end load test of server.py.
+
+The app runs in a child process: on werkzeug's threaded server (--server
+wsgi), as the Flask app on uvicorn through a2wsgi (--server a2wsgi), or on
+uvicorn with asgi.py (--server asgi). It talks to a real MongoDB (--mongo URI)
+or to mongomock, a shared in-memory stand-in for both the sync and the async
+client (benchmarks/mock_mongo.py) that adds --db-latency seconds to every
+call. The Gemini model is a stub that sleeps --model-latency seconds per call.
+Client threads then replay a mix of scenarios at increasing concurrency:
+
+    signin   POST /signin
+    upload   POST /upload-excel with a synthetic workbook
+    list     GET  /user-reports
+    fetch    GET  /get-report/<id>
+    review   POST /request-review + POST /update-review-status + GET /report-reviews/<id>
+    poll     GET  /my-reviews
+
+For every concurrency level it prints throughput and p50/p95/p99 latency per
+route, then the saturation point: the last level whose throughput is more
+than --gain above the previous one. --background-uploads N keeps N more
+clients uploading workbooks throughout each level (not counted).
+
+    cd Server && python -m benchmarks.load_test --levels 1,2,4,8,16 --duration 10
+    cd Server && python -m benchmarks.load_test --server asgi --mongo mongodb://127.0.0.1:27017
+
+WSGI against ASGI for the polling routes, both on uvicorn, 50 ms per Mongo call:
+
+    python -m benchmarks.load_test --server a2wsgi --db-latency 0.05 --levels 64 --rows 1000 --mix poll=1,fetch=1,list=1
+    python -m benchmarks.load_test --server asgi --db-latency 0.05 --levels 64 --rows 1000 --mix poll=1,fetch=1,list=1
+
+and the same at --db-latency 0.01 --background-uploads 2. On one CPU with
+--duration 10 these gave 137 -> 490 req/s (p95 ~460 -> ~140 ms) at 50 ms,
+and 95 -> 115 req/s at 10 ms with the uploads running.
+"""
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+import numpy as np
+
+SCENARIOS = {"signin": 10, "upload": 5, "list": 25, "fetch": 25, "review": 20, "poll": 15}
+
+
+# -------------------- SERVER PROCESS --------------------
+def serve(port: int, model_latency: float, mode: str, mongo: str = None, db_latency: float = 0.0):
+    import types
+
+    if not mongo:
+        from benchmarks import mock_mongo
+
+        mock_mongo.install(db_latency)
+
+    import google.generativeai as genai
+
+    class StubModel:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def generate_content(self, prompt):
+            time.sleep(model_latency)
+            return types.SimpleNamespace(text="# Stub report\n\n" + prompt[-500:])
+
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = StubModel
+
+    if mode == "asgi":
+        import uvicorn
+        import asgi
+
+        uvicorn.run(asgi.app, host="127.0.0.1", port=port, log_level="warning")
+    elif mode == "a2wsgi":
+        # the Flask app alone on the same uvicorn loop and thread pool asgi.py uses for it
+        import uvicorn
+        from a2wsgi import WSGIMiddleware
+        import asgi
+        import server
+
+        uvicorn.run(WSGIMiddleware(server.app, workers=asgi.WSGI_WORKERS), host="127.0.0.1", port=port,
+                    log_level="warning")
+    else:
+        from werkzeug.serving import make_server
+        import server
+
+        make_server("127.0.0.1", port, server.app, threaded=True).serve_forever()
+
+
+def start_server(args, tmp: str):
+    port = args.port
+    env = dict(os.environ, STORAGE_ROOT=tmp, STORAGE_BACKEND="local", KEY="stub",
+               REPORT_ENRICHMENT="on" if args.enrich else "off")
+    command = [sys.executable, "-m", "benchmarks.load_test", "--serve", str(port), "--server", args.server,
+               "--model-latency", str(args.model_latency), "--db-latency", str(args.db_latency)]
+    if args.mongo:
+        env["MONGO"] = args.mongo
+        command += ["--mongo", args.mongo]
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen(command, cwd=here, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # ready once the port accepts connections
+    deadline = time.time() + 60
+    while time.time() < deadline and proc.poll() is None:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server process failed to start")
+
+
+# -------------------- CLIENT --------------------
+def synthetic_workbook(rows: int, seed: int) -> bytes:
+    """Trial balance .xlsx shaped like the real uploads (two banner rows)."""
+    import pandas as pd
+    from benchmarks.ingest_memory import synthetic_trial_balance
+
+    df = synthetic_trial_balance(max(rows, 1000), seed)
+    out = io.BytesIO()
+    with pd.ExcelWriter(out, engine="openpyxl") as writer:
+        pd.DataFrame([["Trial Balance"], ["Synthetic"]]).to_excel(writer, header=False, index=False)
+        df.to_excel(writer, startrow=2, index=False)
+    return out.getvalue()
+
+
+class Client:
+    """One keep-alive connection with its own session cookie."""
+
+    def __init__(self, port: int):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+        self.cookie = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.conn.close()
+            return 599, {}
+        cookie = response.getheader("Set-Cookie")
+        if cookie:
+            self.cookie = cookie.split(";", 1)[0]
+        try:
+            return response.status, json.loads(data or b"{}")
+        except ValueError:
+            return response.status, {}
+
+    def upload(self, filename: str, payload: bytes):
+        boundary = uuid.uuid4().hex
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+                f"Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n"
+                ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+        return self.request("POST", "/upload-excel", body,
+                            {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}   # route → [latency seconds]
+        self.errors = {}
+
+    def timed(self, route, call):
+        start = time.perf_counter()
+        status, body = call()
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples.setdefault(route, []).append(elapsed)
+            if status >= 400:
+                self.errors[route] = self.errors.get(route, 0) + 1
+        return status, body
+
+
+def run_scenario(name, client, state, rec, rng):
+    username = state["username"]
+    if name == "signin":
+        rec.timed("POST /signin", lambda: client.request("POST", "/signin", {"username": username, "password": "load"}))
+    elif name == "upload":
+        status, body = rec.timed("POST /upload-excel", lambda: client.upload("load.xlsx", state["workbook"]))
+        if status == 200:
+            state["reports"].append(body["report_id"])
+    elif name == "list":
+        rec.timed("GET /user-reports", lambda: client.request("GET", "/user-reports"))
+    elif name == "fetch":
+        report_id = rng.choice(state["reports"])
+        rec.timed("GET /get-report", lambda: client.request("GET", f"/get-report/{report_id}"))
+    elif name == "review":
+        report_id = rng.choice(state["reports"])
+        gl_code = int(rng.choice(state["fault_gls"]))
+        rec.timed("POST /request-review", lambda: client.request(
+            "POST", "/request-review", {"report_id": report_id, "gl_code": gl_code, "gl_range": "10000000"}))
+        rec.timed("POST /update-review-status", lambda: client.request(
+            "POST", "/update-review-status",
+            {"report_id": report_id, "gl_code": gl_code, "decision": rng.choice(["granted", "rejected"])}))
+        rec.timed("GET /report-reviews", lambda: client.request("GET", f"/report-reviews/{report_id}"))
+    elif name == "poll":
+        rec.timed("GET /my-reviews", lambda: client.request("GET", "/my-reviews"))
+
+
+def run_level(port, concurrency, duration, weights, state, seed, background_uploads=0):
+    rec = Recorder()
+    names, probs = zip(*weights.items())
+    stop = time.perf_counter() + duration
+    done = [0]
+    lock = threading.Lock()
+
+    def uploader():
+        client = Client(port)
+        client.request("POST", "/signin", {"username": state["username"], "password": "load"})
+        while time.perf_counter() < stop:
+            client.upload("load.xlsx", state["workbook"])
+
+    def worker(i):
+        rng = random.Random(seed * 1000 + i)
+        client = Client(port)
+        client.request("POST", "/signin", {"username": state["username"], "password": "load"})
+        while time.perf_counter() < stop:
+            run_scenario(rng.choices(names, probs)[0], client, state, rec, rng)
+            with lock:
+                done[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    threads += [threading.Thread(target=uploader) for _ in range(background_uploads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    requests = sum(len(v) for v in rec.samples.values())
+    routes = {
+        route: {
+            "count": len(lat),
+            "errors": rec.errors.get(route, 0),
+            **{f"p{q}": float(np.percentile(lat, q) * 1000) for q in (50, 95, 99)},
+        }
+        for route, lat in sorted(rec.samples.items())
+    }
+    return {"concurrency": concurrency, "seconds": elapsed, "requests": requests,
+            "throughput": requests / elapsed, "scenarios": done[0], "routes": routes}
+
+
+def saturation_point(levels, gain: float):
+    """Last concurrency level that still raised throughput by more than `gain`."""
+    best = levels[0]
+    for prev, curr in zip(levels, levels[1:]):
+        if curr["throughput"] < prev["throughput"] * (1 + gain):
+            return best
+        best = curr
+    return best
+
+
+def print_level(level):
+    print(f"\nconcurrency {level['concurrency']}: {level['throughput']:.1f} req/s "
+          f"({level['requests']} requests, {level['scenarios']} scenarios in {level['seconds']:.1f} s)")
+    print(f"    {'route':<28}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, r in level["routes"].items():
+        print(f"    {route:<28}{r['count']:>7}{r['errors']:>8}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--server", choices=("wsgi", "a2wsgi", "asgi"), default="wsgi")
+    parser.add_argument("--mongo", help="MongoDB URI to test against instead of mongomock")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="mongomock seconds per Mongo call")
+    parser.add_argument("--background-uploads", type=int, default=0, help="extra clients uploading non-stop")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--rows", type=int, default=2000, help="rows per synthetic workbook")
+    parser.add_argument("--model-latency", type=float, default=2.0, help="stub model seconds per call")
+    parser.add_argument("--enrich", action="store_true", help="run background Gemini enrichment (stubbed)")
+    parser.add_argument("--mix", default=None, help="scenario weights, e.g. signin=10,upload=5,list=30")
+    parser.add_argument("--gain", type=float, default=0.10, help="throughput gain below which a level saturates")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.model_latency, args.server, args.mongo, args.db_latency)
+        return
+    if args.mongo and args.db_latency:
+        parser.error("--db-latency only applies to the mongomock stand-in")
+
+    weights = dict(SCENARIOS)
+    if args.mix:
+        weights = {k: float(v) for k, v in (item.split("=") for item in args.mix.split(","))}
+        unknown = set(weights) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"unknown scenario(s): {sorted(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = start_server(args, tmp)
+        try:
+            # one user with one report, so fetch / review have something to hit
+            state = {"username": "load", "workbook": synthetic_workbook(args.rows, args.seed), "reports": []}
+            setup = Client(args.port)
+            setup.request("POST", "/signup", {"username": "load", "password": "load"})
+            setup.request("POST", "/signin", {"username": "load", "password": "load"})
+            status, body = setup.upload("load.xlsx", state["workbook"])
+            if status != 200:
+                raise RuntimeError(f"setup upload failed: {body}")
+            state["reports"].append(body["report_id"])
+            _, report = setup.request("GET", f"/get-report/{body['report_id']}")
+            state["fault_gls"] = [gl for gls in report.get("fault", {}).values() for gl in gls] or [10000000]
+
+            print(f"{args.server} server, mix {weights}, {args.rows}-row workbooks, model latency {args.model_latency}s, "
+                  f"enrichment {'on' if args.enrich else 'off'}, "
+                  f"{args.mongo or f'mongomock with {args.db_latency}s per call'}, "
+                  f"{args.background_uploads} background uploader(s)")
+            levels = []
+            for concurrency in (int(c) for c in args.levels.split(",")):
+                levels.append(run_level(args.port, concurrency, args.duration, weights, state, args.seed,
+                                        args.background_uploads))
+                print_level(levels[-1])
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    sat = saturation_point(levels, args.gain)
+    print(f"\nsaturation point: concurrency {sat['concurrency']} at {sat['throughput']:.1f} req/s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "levels": levels, "saturation": sat["concurrency"]}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+In-memory Mongo stand-ins for the load test: one shared mongomock client
+behind both pymongo.MongoClient and pymongo.AsyncMongoClient, with an
+optional round-trip latency added to every call (a blocking sleep for the
+sync client, an asyncio sleep for the async one), so the WSGI and ASGI
+serving modes can be compared without a mongod.
+
+    from benchmarks import mock_mongo
+    mock_mongo.install(latency=0.05)   # before server / asgi open a connection
+"""
+import time
+import asyncio
+
+
+class LatencyCollection:
+    """Sync collection whose every method call waits `latency` seconds first."""
+
+    def __init__(self, collection, latency: float):
+        self._collection = collection
+        self._latency = latency
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr) or not self._latency:
+            return attr
+
+        def call(*args, **kwargs):
+            time.sleep(self._latency)
+            return attr(*args, **kwargs)
+        return call
+
+
+class AsyncCursor:
+    def __init__(self, cursor, latency: float):
+        self._cursor = cursor
+        self._latency = latency
+
+    async def to_list(self, length=None):
+        await asyncio.sleep(self._latency)
+        return list(self._cursor)
+
+
+class AsyncCollection:
+    """The subset of AsyncCollection asgi.py uses, over a mongomock collection."""
+
+    def __init__(self, collection, latency: float):
+        self._collection = collection
+        self._latency = latency
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs), self._latency)
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(self._latency)
+            return method(*args, **kwargs)
+        return call
+
+
+class Database:
+    def __init__(self, db, wrap, latency: float):
+        self._db = db
+        self._wrap = wrap
+        self._latency = latency
+
+    def __getitem__(self, name):
+        return self._wrap(self._db[name], self._latency)
+
+
+class Client:
+    def __init__(self, client, wrap, latency: float):
+        self._client = client
+        self._wrap = wrap
+        self._latency = latency
+
+    def __getitem__(self, name):
+        return Database(self._client[name], self._wrap, self._latency)
+
+
+def install(latency: float = 0.0):
+    """Point pymongo's sync and async clients at one shared mongomock client; returns it."""
+    import mongomock
+    import mongomock.collection
+    import pymongo
+
+    shared = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *args, **kwargs: Client(shared, LatencyCollection, latency)
+    pymongo.AsyncMongoClient = lambda *args, **kwargs: Client(shared, AsyncCollection, latency)
+
+    # mongomock's bulk_write predates the sort option pymongo's UpdateOne passes
+    builder = mongomock.collection.BulkOperationBuilder
+    add_update = builder.add_update
+    builder.add_update = lambda self, *args, sort=None, **kwargs: add_update(self, *args, **kwargs)
+    return shared
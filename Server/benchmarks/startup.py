@@ -0,0 +1,73 @@
+"""
+Cold-start cost of the API process, from `python -X importtime`.
+
+Each measurement runs in a fresh interpreter: importing `server` (what a
+worker does on spawn), then serving /session-check and /logout through the
+test client to confirm the auth endpoints leave the analysis stack, Mongo
+and the Gemini model untouched. For comparison the analysis modules are
+imported on their own.
+
+    cd Server && python -m benchmarks.startup --repeat 5
+"""
+import sys
+import argparse
+import statistics
+import subprocess
+
+HEAVY = ["numpy", "pandas", "pyarrow", "google.generativeai", "pymongo"]
+
+AUTH_PROBE = """
+import sys, server
+c = server.app.test_client()
+c.get('/session-check')
+c.post('/logout')
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+print(server.db.ready(), server.reporter.ready())
+"""
+
+ANALYSIS = ("import Team_Rocket_Modules.Agent, Team_Rocket_Modules.Process, Team_Rocket_Modules.Dataset, "
+            "Team_Rocket_Modules.Duplicates, Team_Rocket_Modules.Benford, Team_Rocket_Modules.Reconcile")
+
+
+def import_times(code: str):
+    """(total µs of the top-level imports, {module: cumulative µs}) for one run of code."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, check=True)
+    cumulative = {}
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum_us, name = line[len("import time:"):].split("|")
+        name = name.rstrip()[1:]
+        cum = int(cum_us)
+        cumulative[name.strip()] = cum
+        if not name.startswith(" "):   # not nested under another import
+            total += cum
+    return total, cumulative, proc.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, code in (("import server", "import server"), ("analysis stack", ANALYSIS)):
+        runs = [import_times(code) for _ in range(args.repeat)]
+        totals = [r[0] / 1000 for r in runs]
+        print(f"{label}: median {statistics.median(totals):.1f} ms over {args.repeat} runs "
+              f"(min {min(totals):.1f}, max {max(totals):.1f})")
+        slowest = sorted(runs[-1][1].items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        for name, cum in slowest:
+            print(f"    {cum / 1000:8.1f} ms  {name}")
+
+    _, _, out = import_times(AUTH_PROBE.format(heavy=HEAVY))
+    loaded, ready = out.splitlines()[-2:]
+    db_ready, model_ready = ready.split()
+    print(f"after /session-check and /logout: heavy modules loaded = [{loaded}], "
+          f"mongo initialised = {db_ready}, model initialised = {model_ready}")
+
+
+if __name__ == "__main__":
+    main()
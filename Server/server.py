@@ -1,42 +1,114 @@
-from flask import Flask, request, jsonify, session, send_file
+from flask import Flask, Blueprint, Request, request, jsonify, session, send_file, Response, stream_with_context
 from flask_cors import CORS
-from pymongo import MongoClient
+from werkzeug.exceptions import RequestEntityTooLarge
 from bson import ObjectId
 from dotenv import load_dotenv
-import pandas as pd
 import os
-from datetime import datetime
-from Team_Rocket_Modules.Agent import GLReportGenerator
-from Team_Rocket_Modules.Process import GLAnalyzer
-from bson import ObjectId
+import re
+import json
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from Team_Rocket_Modules.Lazy import Lazy
+from Team_Rocket_Modules.Storage import get_storage
+from Team_Rocket_Modules import Trends
+from Team_Rocket_Modules import Upload
+from Team_Rocket_Modules import GLIndex
+from Team_Rocket_Modules import Proofs
+from Team_Rocket_Modules import Rollup
+
+# pandas / numpy, the analysis modules and google.generativeai are imported
+# inside the routes that need them, so auth and listing requests never load
+# them. `python -m benchmarks.startup` measures the import cost.
 
 # -------------------- CONFIG --------------------
 load_dotenv()
 MONGO_URI = os.getenv("MONGO")
 api_key = os.getenv("KEY")
+# Gemini rewrites the template report in the background when enabled
+REPORT_ENRICHMENT = os.getenv("REPORT_ENRICHMENT", "on" if api_key else "off").lower() == "on"
+
+
+def init_db():
+    """Connect to Mongo and create indexes; runs once, on first database use."""
+    from pymongo import MongoClient
+
+    db = MongoClient(MONGO_URI)["Finnovate"]
+    db["reviews"].create_index("report_id")
+    db["reviews"].create_index("gl_code")
+    db["reviews"].create_index("username")
+    db["reviews"].create_index("status")
+    db["reports"].create_index([("username", 1), ("uploaded_at", -1)])
+    db["reports"].create_index("uploaded_at")
+    db["trend_cache"].create_index([("username", 1), ("days", 1), ("period", 1)], unique=True)
+    db["trend_cache"].create_index("computed_at", expireAfterSeconds=3600)
+    GLIndex.create_indexes(db["gl_index"])
+    Proofs.create_indexes(db["proof_blobs"])
+    Rollup.create_indexes(db["rollups"])
+    db["uploads"].create_index([("username", 1), ("filename", 1), ("size", 1), ("sha256", 1), ("status", 1)])
+    return db
+
+
+def init_storage():
+    # only the GridFS backend needs the database
+    gridfs = os.getenv("STORAGE_BACKEND", "local").lower() == "gridfs"
+    return get_storage(db.get() if gridfs else None)
+
+
+def init_reporter():
+    """One configured Gemini model per process, shared by every upload."""
+    from Team_Rocket_Modules.Agent import GLReportGenerator
+    return GLReportGenerator(api_key)
+
+
+db = Lazy(init_db)
+users_collection = Lazy(lambda: db.get()["users"])
+reports_collection = Lazy(lambda: db.get()["reports"])
+reviews_collection = Lazy(lambda: db.get()["reviews"])
+trend_cache_collection = Lazy(lambda: db.get()["trend_cache"])
+uploads_collection = Lazy(lambda: db.get()["uploads"])
+gl_index_collection = Lazy(lambda: db.get()["gl_index"])
+proof_blobs_collection = Lazy(lambda: db.get()["proof_blobs"])
+rollup_collection = Lazy(lambda: db.get()["rollups"])
+
+# All per-report files (datasets, markdown, z-scores, proofs) go through the
+# storage backend so any worker / node can serve any report.
+storage = Lazy(init_storage)
+reporter = Lazy(init_reporter)
+enricher = Lazy(lambda: ThreadPoolExecutor(int(os.getenv("ENRICH_WORKERS", 2)), thread_name_prefix="enrich"))
+# full analyses that replace a provisional preview report
+analyzer = Lazy(lambda: ThreadPoolExecutor(int(os.getenv("ANALYSIS_WORKERS", 2)), thread_name_prefix="analysis"))
+
+
+def init_staging():
+    """
+    Chunked uploads are staged as files under UPLOAD_ROOT (default: on the
+    storage volume, so completed files move into storage with a rename), or
+    as chunk objects in the storage backend (UPLOAD_STAGING=storage, the
+    default with GridFS) so chunks and /complete can reach any node. With
+    local staging on several nodes, UPLOAD_ROOT must be a shared volume.
+    """
+    backend = os.getenv("STORAGE_BACKEND", "local").lower()
+    if os.getenv("UPLOAD_STAGING", "storage" if backend == "gridfs" else "local").lower() == "storage":
+        return Upload.StorageStaging(storage.get())
+    return Upload.UploadStaging(os.getenv("UPLOAD_ROOT") or os.path.join(os.getenv("STORAGE_ROOT", "."), "Uploads"))
 
-app = Flask(__name__)
-app.secret_key = os.getenv("SECRET_KEY", "default-secret")
-CORS(app, supports_credentials=True)
 
-client = MongoClient(MONGO_URI)
-db = client["Finnovate"]
-users_collection = db["users"]
-reports_collection = db["reports"]
-reviews_collection = db["reviews"]
-reviews_collection.create_index("report_id")
-reviews_collection.create_index("gl_code")
-reviews_collection.create_index("username")
-reviews_collection.create_index("status")
+staging = Lazy(init_staging)
+PREVIEW_MIN_ROWS = int(os.getenv("PREVIEW_MIN_ROWS", 200_000))   # preview="auto" threshold
+UPLOAD_TTL = timedelta(hours=int(os.getenv("UPLOAD_TTL_HOURS", 24)))
+PROOF_MAX_AGE = 365 * 24 * 3600   # proofs are content-addressed, so a cached copy never goes stale
+PROOF_FORM_OVERHEAD = 1 << 20     # multipart headers and the text field, on top of MAX_PROOF_BYTES
 
-z_score = []
+DATASET_FOLDER = "Dataset"
+REPORT_FOLDER = "Report"
+ZSCORE_FOLDER = "ZScores"
+COLUMNAR_FOLDER = "Columnar"
 
-DATASET_FOLDER = "./Dataset"
-os.makedirs(DATASET_FOLDER, exist_ok=True)
+api = Blueprint("api", __name__)
 
 
 # -------------------- AUTH ROUTES --------------------
-@app.route('/signup', methods=['POST'])
+@api.route('/signup', methods=['POST'])
 def signup():
     data = request.get_json()
     username = data.get("username")
@@ -49,7 +121,7 @@ def signup():
     return jsonify({"status": "success", "message": "Signup successful"}), 201
 
 
-@app.route('/signin', methods=['POST'])
+@api.route('/signin', methods=['POST'])
 def signin():
     data = request.get_json()
     username = data.get("username")
@@ -63,7 +135,7 @@ def signin():
         return jsonify({"status": "fail", "message": "Invalid credentials"}), 401
 
 
-@app.route('/session-check', methods=['GET'])
+@api.route('/session-check', methods=['GET'])
 def session_check():
     if 'username' in session:
         return jsonify({"logged_in": True, "username": session['username']})
@@ -71,14 +143,280 @@ def session_check():
         return jsonify({"logged_in": False})
 
 
-@app.route('/logout', methods=['POST'])
+@api.route('/logout', methods=['POST'])
 def logout():
     session.pop('username', None)
     return jsonify({"status": "success", "message": "Logged out"}), 200
 
 
 # -------------------- EXCEL UPLOAD + ANALYSIS --------------------
-@app.route('/upload-excel', methods=['POST'])
+PERIOD_RE = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+MIN_STEP_SIZE = 1_000
+
+
+def parse_period(value, name):
+    """A YYYY-MM period; fx_period also names an FX table file, so nothing else is accepted."""
+    value = str(value).strip()
+    if not PERIOD_RE.fullmatch(value):
+        raise ValueError(f"{name} must be a YYYY-MM period")
+    return value
+
+
+def analysis_params(data):
+    """
+    Analysis parameters from a request body / form, with GLAnalyzer defaults.
+    Detectors receive the ones their constructor accepts. Raises ValueError
+    on a malformed value (the routes answer 400).
+    """
+    data = data or {}
+    params = {
+        "step_size": int(data.get("step_size") or 10_000_000),
+        "z_threshold": float(data.get("z_threshold") or 3),
+    }
+    # every GL range is a scan of the sheet: tiny or negative steps never finish
+    if params["step_size"] < MIN_STEP_SIZE:
+        raise ValueError(f"step_size must be at least {MIN_STEP_SIZE:,}")
+    if not params["z_threshold"] > 0:
+        raise ValueError("z_threshold must be positive")
+    # optional subset of registered detectors: list (JSON) or "a,b" (form)
+    detectors = data.get("detectors")
+    if isinstance(detectors, str):
+        detectors = [d.strip() for d in detectors.split(",") if d.strip()]
+    if detectors:
+        params["detectors"] = list(detectors)
+    if str(data.get("enrich", "true")).lower() in ("0", "false", "no", "off"):
+        params["enrich"] = False
+    # reporting period of the sheet (YYYY-MM); defaults to the upload month
+    if data.get("period"):
+        params["period"] = parse_period(data["period"], "period")
+    # amounts are converted when the sheet has a Currency column
+    if data.get("reporting_currency"):
+        params["reporting_currency"] = str(data["reporting_currency"]).strip().upper()
+    if data.get("fx_period"):
+        params["fx_period"] = parse_period(data["fx_period"], "fx_period")
+    # sampled preview first: "true" / "false", default auto (large uploads only)
+    preview = str(data.get("preview", "auto")).lower()
+    if preview in ("1", "true", "yes", "on"):
+        params["preview"] = True
+    elif preview in ("0", "false", "no", "off"):
+        params["preview"] = False
+    return params
+
+
+def check_step_size(df, params):
+    """Process.RangeError when params["step_size"] cuts this sheet's GLs into too many ranges."""
+    from Team_Rocket_Modules.Process import check_ranges
+
+    gl = df["GL"] if "GL" in df.columns else None
+    if gl is not None and gl.notna().any():
+        check_ranges(gl.max(), params["step_size"])
+
+
+def normalize_currency(df, params):
+    """
+    Amounts in the reporting currency when the sheet has a Currency column
+    (FX table of params["fx_period"], default the reporting period); returns
+    (frame, report fields).
+    """
+    from Team_Rocket_Modules import Currency
+
+    if Currency.CURRENCY_COLUMN not in df.columns:
+        return df, {}
+    period = params.get("fx_period") or params.get("period") or datetime.now().strftime("%Y-%m")
+    df, summary = Currency.to_reporting_currency(df, period, params.get("reporting_currency"))
+    return df, {"currency": summary}
+
+
+def analyze_and_store(df, username, report_oid, source, params, report_filename=None):
+    """
+    Run the detectors on a parsed frame, store the z-scores and markdown report,
+    and insert the report document. source carries the dataset fields
+    (filename, dataset_key, columnar_key, ...) copied onto the document.
+    A provisional preview document with the same id is replaced, and its
+    markdown (report_filename) overwritten.
+    """
+    from Team_Rocket_Modules import Detectors, Diff, FaultCodec, ReportTemplate
+
+    report_id = str(report_oid)
+
+    # 3️⃣ Run every registered detector (sign ranges, z-scores, duplicates,
+    # Benford, reconciliation) concurrently over the one parsed frame
+    df, fx_fields = normalize_currency(df, params)
+    result = Detectors.run_detectors(df, params, params.get("detectors"))
+    report_text = result["text"]
+    fields = result["fields"]
+    fields.update(fx_fields)
+
+    fault = Diff.sorted_fault(result["fault"])   # sorted int arrays for /fault-diff
+    fault_gls = {gl for codes in fault.values() for gl in codes}
+    cube_cells = Rollup.cells(df, fault_gls)     # computed before anything is written
+    zscore_key = None
+    if "z_score" in fields:
+        zscore_key = f"{ZSCORE_FOLDER}/{report_id}.json"
+        storage.save(zscore_key, json.dumps(fields.pop("z_score")).encode("utf-8"))
+
+    # 4️⃣ Render the template Markdown report and store it right away
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    period = params.get("period") or timestamp[:GLIndex.PERIOD_LENGTH]
+    markdown_text = ReportTemplate.render(result, {"filename": source.get("filename"),
+                                                   "generated_at": timestamp, "params": params})
+    report_filename = report_filename or f"GL_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{report_id}.md"
+    report_path = storage.save(f"{REPORT_FOLDER}/{username}/{report_filename}", markdown_text.encode("utf-8"))
+    enrich = REPORT_ENRICHMENT and params.get("enrich", True)
+
+    # 6️⃣ Store metadata in MongoDB (same schema)
+
+    report_entry = {
+        "_id": report_oid,
+        "username": username,
+        **source,
+        "report_filename": report_filename,  # generated markdown
+        "report_path": report_path,       # storage key of the markdown
+        "zscore_key": zscore_key,
+        "params": params,
+        "uploaded_at": timestamp,
+        "period": period,
+        **FaultCodec.encode_fault(fault),  # fault, fault_counts, fault_schema
+        **fields,                          # z_outliers, benford, reconciliation totals, ...
+        "detector_timings": result["timings"],
+        "report_source": "template",
+        "enrichment": "pending" if enrich else "off",
+        "analysis": "complete",
+        "provisional": [],                 # no estimated fields left
+    }
+
+    reports_collection.replace_one({"_id": report_oid}, report_entry, upsert=True)
+    GLIndex.index_report(gl_index_collection, report_id, username, timestamp, fault, period=period)
+    # dashboard cube: replaces only the uploaded entities' cells for the period.
+    # It is derived data (Rollup.rebuild repairs it), so a failure is recorded
+    # on the report instead of failing an upload that is already stored.
+    try:
+        Rollup.update(rollup_collection, username, period, cube_cells, report_id)
+    except Exception as e:
+        reports_collection.update_one({"_id": report_oid}, {"$set": {"rollup": "failed", "rollup_error": str(e)}})
+        report_entry.update(rollup="failed", rollup_error=str(e))
+    Trends.invalidate(trend_cache_collection, username)
+
+    # 5️⃣ Gemini narrative replaces the template report when it is ready
+    if enrich:
+        enricher.submit(enrich_report, report_oid, report_path, report_text)
+    return report_entry
+
+
+def enrich_report(report_oid, report_key, report_text):
+    """
+    Background step: generate the Gemini report from the analysis text and
+    overwrite the template Markdown in place. On failure the template
+    report stays and the error is recorded on the document.
+    """
+    try:
+        markdown_text = reporter.generate_markdown(report_text)
+        storage.save(report_key, markdown_text.encode("utf-8"))
+        reports_collection.update_one({"_id": report_oid}, {"$set": {
+            "report_source": "llm",
+            "enrichment": "done",
+            "enriched_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }})
+    except Exception as e:
+        reports_collection.update_one({"_id": report_oid}, {"$set": {
+            "enrichment": "failed",
+            "enrichment_error": str(e),
+        }})
+
+
+def store_preview(df, username, report_oid, source, params):
+    """
+    Sampled preview of a large upload: store a provisional report (fields
+    listed in "provisional" are estimates with 95% bounds under
+    "confidence") and queue the full analysis, which replaces it. df is
+    the fully parsed sheet (analyze_upload has read and cached it), so only
+    the analysis is shortened, not the parse.
+    """
+    from Team_Rocket_Modules import FaultCodec, ReportTemplate
+    from Team_Rocket_Modules.Preview import PreviewAnalyzer, PROVISIONAL_FIELDS
+
+    report_id = str(report_oid)
+    converted, fx_fields = normalize_currency(df, params)
+    preview = PreviewAnalyzer(converted, params["step_size"], params["z_threshold"])
+    preview.run()
+    result = preview.getResult()
+    result["fields"].update(fx_fields)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    markdown_text = ReportTemplate.render(result, {"filename": source.get("filename"), "generated_at": timestamp,
+                                                   "params": params, "provisional": True})
+    report_filename = f"GL_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{report_id}.md"
+    report_path = storage.save(f"{REPORT_FOLDER}/{username}/{report_filename}", markdown_text.encode("utf-8"))
+
+    report_entry = {
+        "_id": report_oid,
+        "username": username,
+        **source,
+        "report_filename": report_filename,
+        "report_path": report_path,
+        "zscore_key": None,
+        "params": params,
+        "uploaded_at": timestamp,
+        **FaultCodec.encode_fault(result["fault"]),   # GLs seen in the sample only
+        **result["fields"],                           # stats, sign_ranges, z_outliers, confidence
+        "detector_timings": result["timings"],
+        "report_source": "preview",
+        "enrichment": "off",
+        "analysis": "running",
+        "provisional": PROVISIONAL_FIELDS,
+    }
+    reports_collection.insert_one(report_entry)
+    analyzer.submit(complete_analysis, df, username, report_oid, source, params, report_filename)
+    return report_entry
+
+
+def complete_analysis(df, username, report_oid, source, params, report_filename):
+    """Background step: full analysis over the preview; on failure the preview stays, marked failed."""
+    try:
+        analyze_and_store(df, username, report_oid, source, params, report_filename)
+    except Exception as e:
+        reports_collection.update_one({"_id": report_oid}, {"$set": {
+            "analysis": "failed",
+            "analysis_error": str(e),
+        }})
+
+
+def analyze_upload(username, report_oid, filename, dataset_key, params):
+    """
+    Parse a stored workbook, cache the parsed frame for /reanalyze and run
+    the analysis on it; large frames get a sampled preview first.
+    """
+    from Team_Rocket_Modules import Dataset
+
+    # 2️⃣ Read Excel data and cache the parsed frame for /reanalyze
+    with storage.open(dataset_key) as f:
+        df = Dataset.read_excel(f)
+    check_step_size(df, params)
+    columnar_key = Dataset.save_columnar(storage, f"{COLUMNAR_FOLDER}/{report_oid}.arrow", df)
+
+    source = {
+        "filename": filename,             # uploaded file name
+        "dataset_key": dataset_key,       # storage key of the upload
+        "columnar_key": columnar_key,     # parsed Arrow copy of the upload
+    }
+    if params.get("preview", len(df) >= PREVIEW_MIN_ROWS):
+        return store_preview(df, username, report_oid, source, params)
+    return analyze_and_store(df, username, report_oid, source, params)
+
+
+def preview_payload(report_entry):
+    """Preview findings for the upload response; empty once the analysis is complete."""
+    if not report_entry.get("provisional"):
+        return {}
+    return {"preview": {
+        "stats": report_entry["stats"],
+        "confidence": report_entry["confidence"],
+        "sign_ranges": report_entry["sign_ranges"],
+        "z_outliers": report_entry["z_outliers"][:100],
+    }}
+
+
+@api.route('/upload-excel', methods=['POST'])
 def upload_excel():
     """
     Upload Excel → Run GLAnalyzer & GLReportGenerator → Save Markdown path in DB + Return summary to frontend.
@@ -92,44 +430,24 @@ def upload_excel():
 
     if 'username' not in session:
         return jsonify({"status": "fail", "message": "User not logged in"}), 401
+    from Team_Rocket_Modules.Process import RangeError
+    try:
+        params = analysis_params(request.form)
+    except ValueError as e:
+        return jsonify({"status": "fail", "message": str(e)}), 400
 
     try:
-        # 1️⃣ Save uploaded file
-        file_path = os.path.join(DATASET_FOLDER, file.filename)
-        os.makedirs(DATASET_FOLDER, exist_ok=True)
-        file.save(file_path)
-
-        # 2️⃣ Read Excel data
-        raw = pd.read_excel(file_path, skiprows=2)
-        columns = raw.columns
-        df = raw[columns[:7]]
-
-        # 3️⃣ Run Analyzer to process GL data
-        analyzer = GLAnalyzer(df)
-        report_text = analyzer.run_analysis()
-
-        fault = analyzer.getFault()
-        z_score = analyzer.getZscore()
-        # 4️⃣ Generate Markdown report file (returns .md file path)
-        reporter = GLReportGenerator(api_key)
-        report_path = reporter.generate_report(report_text, session['username'])
-        report_filename = os.path.basename(report_path)
-
-        # 6️⃣ Store metadata in MongoDB (same schema)
         username = session['username']
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        report_oid = ObjectId()
+        report_id = str(report_oid)
 
-        report_entry = {
-            "username": username,
-            "filename": file.filename,        # uploaded file name
-            "report_filename": report_filename,  # generated markdown
-            "report_path": report_path,       # path to file
-            "uploaded_at": timestamp,
-            "fault": fault,
-        }
+        # 1️⃣ Save uploaded file (keyed by report id so concurrent uploads never collide)
+        dataset_key = f"{DATASET_FOLDER}/{report_id}_{os.path.basename(file.filename)}"
+        storage.save(dataset_key, file.stream)
 
-        result = reports_collection.insert_one(report_entry)
-        report_id = str(result.inserted_id)
+        report_entry = analyze_upload(username, report_oid, file.filename, dataset_key, params)
+        report_filename = report_entry["report_filename"]
+        report_path = report_entry["report_path"]
 
         # 7️⃣ Return metadata + preview to frontend
         return jsonify({
@@ -138,18 +456,350 @@ def upload_excel():
             "report_id": report_id,
             "username": username,
             "report_file": report_filename,
-            "report_path": report_path
+            "report_path": report_path,
+            "analysis": report_entry["analysis"],
+            "provisional": report_entry["provisional"],
+            **preview_payload(report_entry)
+        }), 200
+
+    except RangeError as e:
+        storage.delete(dataset_key)
+        return jsonify({"status": "fail", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            "status": "fail",
+            "message": f"Error processing file: {str(e)}"
+        }), 500
+
+
+# -------------------- CHUNKED UPLOAD --------------------
+def upload_summary(upload):
+    return {
+        "upload_id": str(upload["_id"]),
+        "filename": upload["filename"],
+        "size": upload["size"],
+        "chunk_size": upload["chunk_size"],
+        "n_chunks": upload["n_chunks"],
+        "received": sorted(upload.get("received", [])),
+        "upload_status": upload["status"],
+        "report_id": upload.get("report_id"),
+    }
+
+
+def find_upload(upload_id, **query):
+    try:
+        oid = ObjectId(upload_id)
+    except Exception:
+        return None
+    return uploads_collection.find_one({"_id": oid, "username": session['username'], **query})
+
+
+def purge_expired_uploads(username):
+    """Drop the user's unfinished uploads (and their staged bytes) older than UPLOAD_TTL."""
+    cutoff = datetime.utcnow() - UPLOAD_TTL
+    for old in uploads_collection.find({"username": username, "status": {"$ne": "complete"},
+                                        "created_at": {"$lt": cutoff}}, {"_id": 1}):
+        staging.discard(str(old["_id"]))
+        uploads_collection.delete_one({"_id": old["_id"]})
+
+
+@api.route('/upload/init', methods=['POST'])
+def upload_init():
+    """
+    Start (or resume) a chunked upload.
+    Body: {"filename", "size", "sha256" (whole file), "chunk_size" (optional)}.
+    An unfinished upload of the same file by the same user is resumed: the
+    response lists the chunks already received.
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    data = request.get_json(silent=True) or {}
+    filename = os.path.basename(data.get("filename") or "")
+    sha256 = str(data.get("sha256") or "").lower()
+    if not filename:
+        return jsonify({"status": "fail", "message": "Missing filename"}), 400
+    if len(sha256) != 64:
+        return jsonify({"status": "fail", "message": "sha256 must be a hex digest of the whole file"}), 400
+    try:
+        size = int(data.get("size"))
+        chunk_size, n_chunks = Upload.plan(size, data.get("chunk_size"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "fail", "message": str(e)}), 400
+
+    username = session['username']
+    purge_expired_uploads(username)
+
+    existing = uploads_collection.find_one({"username": username, "filename": filename, "size": size,
+                                            "sha256": sha256, "status": "open"})
+    if existing and staging.exists(str(existing["_id"])):
+        return jsonify({"status": "success", "resumed": True, **upload_summary(existing)}), 200
+
+    upload = {
+        "_id": ObjectId(),
+        "username": username,
+        "filename": filename,
+        "size": size,
+        "sha256": sha256,
+        "chunk_size": chunk_size,
+        "n_chunks": n_chunks,
+        "received": [],
+        "chunk_sha256": {},
+        "status": "open",
+        "created_at": datetime.utcnow(),
+    }
+    staging.create(str(upload["_id"]), size, chunk_size)
+    uploads_collection.insert_one(upload)
+    return jsonify({"status": "success", "resumed": False, **upload_summary(upload)}), 201
+
+
+@api.route('/upload/<upload_id>/chunk/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """
+    Store chunk `index` (raw request body) with its sha256 in the
+    X-Chunk-SHA256 header. Re-sending a chunk overwrites it.
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    upload = find_upload(upload_id, status="open")
+    if not upload:
+        return jsonify({"status": "fail", "message": "Upload not found or already completed"}), 404
+    if not 0 <= index < upload["n_chunks"]:
+        return jsonify({"status": "fail", "message": f"Chunk index out of range 0-{upload['n_chunks'] - 1}"}), 400
+
+    length = Upload.chunk_length(upload["size"], upload["chunk_size"], index)
+    if request.content_length != length:
+        return jsonify({"status": "fail", "message": f"Chunk {index} must be exactly {length} bytes"}), 400
+    chunk_sha = request.headers.get("X-Chunk-SHA256")
+    if not chunk_sha:
+        return jsonify({"status": "fail", "message": "Missing X-Chunk-SHA256 header"}), 400
+
+    try:
+        digest = staging.write_chunk(upload_id, index * upload["chunk_size"], length, request.stream, chunk_sha)
+    except Upload.UploadError as e:
+        # the chunk's bytes on disk are no longer trustworthy
+        uploads_collection.update_one({"_id": upload["_id"]}, {"$pull": {"received": index}})
+        return jsonify({"status": "fail", "message": str(e)}), 400
+
+    upload = uploads_collection.find_one_and_update(
+        {"_id": upload["_id"]},
+        {"$addToSet": {"received": index},
+         "$set": {f"chunk_sha256.{index}": digest, "last_updated": datetime.utcnow()}},
+        return_document=True   # ReturnDocument.AFTER
+    )
+    return jsonify({"status": "success", "index": index,
+                    "received": len(upload["received"]), "n_chunks": upload["n_chunks"]}), 200
+
+
+@api.route('/upload/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Progress of an upload; a client reconnecting re-sends the chunks not in `received`."""
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    upload = find_upload(upload_id)
+    if not upload:
+        return jsonify({"status": "fail", "message": "Upload not found"}), 404
+    return jsonify({"status": "success", **upload_summary(upload)}), 200
+
+
+@api.route('/upload/<upload_id>/complete', methods=['POST'])
+def upload_complete(upload_id):
+    """
+    Verify that every chunk arrived and the whole-file sha256 matches, move
+    the staged file into storage (a rename on local storage) and analyze it
+    like /upload-excel. Body: optional {"step_size", "z_threshold"}.
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    from Team_Rocket_Modules.Process import RangeError
+    try:
+        oid = ObjectId(upload_id)
+    except Exception:
+        return jsonify({"status": "fail", "message": "Upload not found"}), 404
+    try:
+        params = analysis_params(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"status": "fail", "message": str(e)}), 400
+
+    username = session['username']
+    # claim the upload so a repeated /complete cannot analyze it twice
+    upload = uploads_collection.find_one_and_update(
+        {"_id": oid, "username": username, "status": "open"},
+        {"$set": {"status": "assembling"}},
+        return_document=True   # ReturnDocument.AFTER
+    )
+    if not upload:
+        return jsonify({"status": "fail", "message": "Upload not found or already completed"}), 404
+
+    missing = sorted(set(range(upload["n_chunks"])) - set(upload.get("received", [])))
+    if missing:
+        uploads_collection.update_one({"_id": oid}, {"$set": {"status": "open"}})
+        return jsonify({"status": "fail", "message": f"{len(missing)} chunk(s) missing",
+                        "missing": missing[:1000]}), 409
+
+    if staging.sha256(upload_id) != upload["sha256"]:
+        staging.discard(upload_id)
+        uploads_collection.update_one({"_id": oid}, {"$set": {"status": "failed"}})
+        return jsonify({"status": "fail", "message": "File sha256 mismatch, start a new upload"}), 400
+
+    try:
+        report_oid = ObjectId()
+        report_id = str(report_oid)
+        dataset_key = f"{DATASET_FOLDER}/{report_id}_{upload['filename']}"
+        staging.commit(upload_id, storage, dataset_key)
+
+        report_entry = analyze_upload(username, report_oid, upload["filename"], dataset_key, params)
+        uploads_collection.update_one({"_id": oid}, {"$set": {"status": "complete", "report_id": report_id},
+                                                     "$unset": {"chunk_sha256": ""}})
+
+        return jsonify({
+            "status": "success",
+            "message": "Report generated successfully",
+            "report_id": report_id,
+            "username": username,
+            "report_file": report_entry["report_filename"],
+            "report_path": report_entry["report_path"],
+            "analysis": report_entry["analysis"],
+            "provisional": report_entry["provisional"],
+            **preview_payload(report_entry)
         }), 200
 
+    except RangeError as e:
+        storage.delete(dataset_key)
+        uploads_collection.update_one({"_id": oid}, {"$set": {"status": "failed"}})
+        return jsonify({"status": "fail", "message": str(e)}), 400
     except Exception as e:
+        uploads_collection.update_one({"_id": oid}, {"$set": {"status": "failed"}})
         return jsonify({
             "status": "fail",
             "message": f"Error processing file: {str(e)}"
         }), 500
 
 
+@api.route('/upload/<upload_id>', methods=['DELETE'])
+def upload_abort(upload_id):
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    upload = find_upload(upload_id, status={"$ne": "assembling"})
+    if not upload:
+        return jsonify({"status": "fail", "message": "Upload not found"}), 404
+    staging.discard(upload_id)
+    uploads_collection.delete_one({"_id": upload["_id"]})
+    return jsonify({"status": "success", "message": "Upload discarded"}), 200
+
+
+# -------------------- RE-ANALYSIS FROM CACHED DATASET --------------------
+def inherit_params(params, report):
+    """
+    Fill in what a reanalysis keeps from its source report unless the body
+    sets it: the reporting period, so the new report replaces the source's
+    slice of the rollup instead of adding one for the current month, and
+    the reporting currency and FX table the source was converted with.
+    """
+    if "period" not in params:
+        period = report.get("period") or str(report.get("uploaded_at") or "")[:GLIndex.PERIOD_LENGTH]
+        if PERIOD_RE.fullmatch(period):
+            params["period"] = period
+    source_params = report.get("params") or {}
+    currency = report.get("currency") or {}
+    for key in ("reporting_currency", "fx_period"):
+        value = source_params.get(key) or currency.get(key)
+        if key not in params and value:
+            params[key] = value
+    return params
+
+
+@api.route('/reanalyze/<report_id>', methods=['POST'])
+def reanalyze(report_id):
+    """
+    Re-run the analysis of an earlier upload with new parameters
+    ({"step_size": ..., "z_threshold": ...}) using its cached columnar copy.
+    Creates a new report linked to the original one.
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+    try:
+        params = analysis_params(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"status": "fail", "message": str(e)}), 400
+
+    from Team_Rocket_Modules.Process import RangeError
+    try:
+        from Team_Rocket_Modules import Dataset
+
+        report = reports_collection.find_one({"_id": ObjectId(report_id)})
+        if not report:
+            return jsonify({"status": "fail", "message": "Report not found"}), 404
+
+        columnar_key = report.get("columnar_key")
+        if not columnar_key or not storage.exists(columnar_key):
+            # older report: parse the stored upload once and cache it
+            dataset_key = report.get("dataset_key")
+            if not dataset_key or not storage.exists(dataset_key):
+                return jsonify({"status": "fail", "message": "Original dataset not available"}), 404
+            with storage.open(dataset_key) as f:
+                df = Dataset.read_excel(f)
+            columnar_key = Dataset.save_columnar(storage, f"{COLUMNAR_FOLDER}/{report_id}.arrow", df)
+            reports_collection.update_one({"_id": report["_id"]}, {"$set": {"columnar_key": columnar_key}})
+        else:
+            df = Dataset.load_columnar(storage, columnar_key)
+        check_step_size(df, params)
+
+        username = session['username']
+        inherit_params(params, report)
+        source = {
+            "filename": report.get("filename"),
+            "dataset_key": report.get("dataset_key"),
+            "columnar_key": columnar_key,
+            "source_report_id": report_id,
+        }
+        report_entry = analyze_and_store(df, username, ObjectId(), source, params)
+
+        return jsonify({
+            "status": "success",
+            "message": "Report re-analyzed successfully",
+            "report_id": str(report_entry["_id"]),
+            "source_report_id": report_id,
+            "params": report_entry["params"],
+            "username": username,
+            "report_file": report_entry["report_filename"],
+            "report_path": report_entry["report_path"]
+        }), 200
+
+    except RangeError as e:
+        return jsonify({"status": "fail", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({
+            "status": "fail",
+            "message": f"Error re-analyzing report: {str(e)}"
+        }), 500
+
+
 # -------------------- FETCH USER DASHBOARD REPORTS --------------------
-@app.route('/user-reports', methods=['GET'])
+# skip fault lists etc.
+REPORT_SUMMARY_FIELDS = {"filename": 1, "uploaded_filename": 1, "report_filename": 1, "uploaded_at": 1}
+
+
+def report_summary(r):
+    return {
+        "id": str(r["_id"]),
+        # ✅ safe fallback for different key names
+        "filename": (
+            r.get("filename")
+            or r.get("uploaded_filename")
+            or r.get("report_filename")
+            or "Unknown"
+        ),
+        # ✅ safe fallback if uploaded_at is missing
+        "uploaded_at": r.get("uploaded_at", "Unknown")
+    }
+
+
+@api.route('/user-reports', methods=['GET'])
 def get_user_reports():
     """
     Fetch all reports generated by the logged-in user (dashboard preview).
@@ -159,22 +809,9 @@ def get_user_reports():
         return jsonify({"status": "fail", "message": "User not logged in"}), 401
 
     username = session['username']
-    reports = list(reports_collection.find({"username": username}, {"report": 0}))  # exclude full report text
-
-    formatted_reports = []
-    for r in reports:
-        formatted_reports.append({
-            "id": str(r["_id"]),
-            # ✅ safe fallback for different key names
-            "filename": (
-                r.get("filename")
-                or r.get("uploaded_filename")
-                or r.get("report_filename")
-                or "Unknown"
-            ),
-            # ✅ safe fallback if uploaded_at is missing
-            "uploaded_at": r.get("uploaded_at", "Unknown")
-        })
+    reports = list(reports_collection.find({"username": username}, REPORT_SUMMARY_FIELDS))
+
+    formatted_reports = [report_summary(r) for r in reports]
     return jsonify({
         "status": "success",
         "count": len(formatted_reports),
@@ -182,103 +819,409 @@ def get_user_reports():
     }), 200
 
 
+# -------------------- FAULT TRENDS --------------------
+@api.route('/trends', methods=['GET'])
+def get_trends():
+    """
+    Faulty-GL counts per user, period and GL range over the last ?days=365,
+    bucketed by ?period=month|day|year. ?scope=all covers every user.
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    try:
+        days = int(request.args.get("days", 365))
+    except ValueError:
+        return jsonify({"status": "fail", "message": "days must be an integer"}), 400
+    period = request.args.get("period", "month")
+    if period not in Trends.PERIOD_LENGTH:
+        return jsonify({"status": "fail", "message": f"Unknown period: {period}"}), 400
+    username = None if request.args.get("scope") == "all" else session['username']
+
+    rows, cached = Trends.get_trends(reports_collection, trend_cache_collection, username, days, period)
+    return jsonify({
+        "status": "success",
+        "cached": cached,
+        "days": days,
+        "period": period,
+        "count": len(rows),
+        "trends": rows
+    }), 200
+
+
+# -------------------- CROSS-PERIOD FAULT DIFF --------------------
+def carry_forward_reviews(prev_id, curr_id, persisting, username):
+    """
+    Copy open reviews of prev_id onto curr_id for GLs that are still faulty.
+    Idempotent: GLs that already have a review on curr_id are skipped.
+    """
+    import numpy as np
+    from Team_Rocket_Modules import Diff
+
+    open_reviews = list(reviews_collection.find(
+        {"report_id": prev_id, "status": {"$in": list(Diff.OPEN_REVIEW_STATUSES)}}, {"_id": 0}
+    ))
+    if not open_reviews:
+        return 0
+
+    codes = np.array([Diff.to_gl(r.get("gl_code")) for r in open_reviews], dtype=np.int64)
+    still_faulty = Diff.member(codes, persisting)
+    existing = Diff.sorted_codes([
+        Diff.to_gl(r.get("gl_code")) for r in reviews_collection.find({"report_id": curr_id}, {"gl_code": 1})
+    ])
+    still_faulty &= ~Diff.member(codes, existing)
+
+    timestamp = datetime.utcnow().isoformat()
+    carried = []
+    for review, keep in zip(open_reviews, still_faulty):
+        if not keep:
+            continue
+        review = dict(review, report_id=curr_id, last_updated=timestamp, carried_from=prev_id)
+        review["gl_code"] = Diff.to_gl(review["gl_code"])
+        review["logs"] = review.get("logs", []) + [
+            {"timestamp": timestamp, "action": "carried_forward", "by": username, "from_report": prev_id}
+        ]
+        carried.append(review)
+
+    if carried:
+        reviews_collection.insert_many(carried)
+        for status in {r["status"] for r in carried}:
+            GLIndex.set_status(gl_index_collection, curr_id,
+                               [r["gl_code"] for r in carried if r["status"] == status], status)
+    return len(carried)
+
+
+DIFF_FIELDS = {"fault": 1, "fault_schema": 1, "username": 1, "uploaded_at": 1, "dataset_key": 1}
+
+
+def diff_reports(report_id, against=None):
+    """
+    The session user's report and the one it is compared with: ?against=
+    (also the user's own) or the user's latest complete report uploaded
+    before it, skipping previews and other analyses of the same upload.
+    Returns (report, previous, error response).
+    """
+    username = session['username']
+    report = reports_collection.find_one({"_id": ObjectId(report_id)}, DIFF_FIELDS)
+    if not report or report.get("username") != username:
+        return None, None, (jsonify({"status": "fail", "message": "Report not found"}), 404)
+
+    if against:
+        prev = reports_collection.find_one({"_id": ObjectId(against), "username": username}, DIFF_FIELDS)
+    else:
+        uploaded_at = report.get("uploaded_at")
+        query = {
+            "username": username,
+            # strictly earlier: a report from the same second counts only if created first
+            "$or": [{"uploaded_at": {"$lt": uploaded_at}},
+                    {"uploaded_at": uploaded_at, "_id": {"$lt": report["_id"]}}],
+            # provisional previews are "running"; older reports have no analysis field
+            "analysis": {"$nin": ["running", "failed"]},
+        }
+        if report.get("dataset_key"):
+            # reanalyses share their upload's dataset_key: not an earlier period
+            query["dataset_key"] = {"$ne": report["dataset_key"]}
+        prev = reports_collection.find_one(query, DIFF_FIELDS, sort=[("uploaded_at", -1), ("_id", -1)])
+    if not prev:
+        return report, None, (jsonify({"status": "fail", "message": "No earlier report to compare with"}), 404)
+    return report, prev, None
+
+
+def fault_diff(prev, report):
+    """(range → new / persisting / resolved GL lists, sorted array of every persisting GL)."""
+    import numpy as np
+    from Team_Rocket_Modules import Diff, FaultCodec
+
+    diff = Diff.diff_faults(FaultCodec.decode_arrays(prev), FaultCodec.decode_arrays(report))
+    persisting = Diff.sorted_codes(np.concatenate(
+        [np.asarray(d["persisting"], dtype=np.int64) for d in diff.values()] or [np.empty(0, dtype=np.int64)]
+    ))
+    return diff, persisting
+
+
+@api.route('/fault-diff/<report_id>', methods=['GET'])
+def get_fault_diff(report_id):
+    """
+    New / persisting / resolved faulty GLs per range against ?against=<report_id>
+    (default: the same user's previous complete upload). Read-only; see
+    POST /fault-diff/<report_id>/carry-forward for the reviews.
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    try:
+        report, prev, error = diff_reports(report_id, request.args.get("against"))
+        if error:
+            return error
+        diff, _ = fault_diff(prev, report)
+
+        return jsonify({
+            "status": "success",
+            "report_id": report_id,
+            "against": str(prev["_id"]),
+            "diff": diff,
+            "totals": {k: sum(len(d[k]) for d in diff.values()) for k in ("new", "persisting", "resolved")},
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "status": "fail",
+            "message": f"Error computing fault diff: {str(e)}"
+        }), 500
+
+
+@api.route('/fault-diff/<report_id>/carry-forward', methods=['POST'])
+def carry_forward(report_id):
+    """
+    Copy the open reviews of the earlier report (body {"against": ...},
+    default as for GET /fault-diff) onto report_id for GLs that are still
+    faulty. Safe to repeat.
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    try:
+        data = request.get_json(silent=True) or {}
+        report, prev, error = diff_reports(report_id, data.get("against"))
+        if error:
+            return error
+        prev_id = str(prev["_id"])
+        _, persisting = fault_diff(prev, report)
+        carried = carry_forward_reviews(prev_id, report_id, persisting, session['username'])
+
+        return jsonify({
+            "status": "success",
+            "report_id": report_id,
+            "against": prev_id,
+            "carried_reviews": carried
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "status": "fail",
+            "message": f"Error carrying reviews forward: {str(e)}"
+        }), 500
+
+
 # -------------------- FETCH SINGLE REPORT (ON CLICK) --------------------
-@app.route('/get-report/<report_id>', methods=['GET'])
+def read_report_markdown(report):
+    """
+    Markdown for a report document, or None if missing. Older documents hold an
+    absolute local report_path instead of a storage key.
+    """
+    key = report.get("report_path", "")
+    if os.path.isabs(key):
+        if not os.path.exists(key):
+            return None
+        with open(key, "r", encoding="utf-8") as f:
+            return f.read()
+    if not key or not storage.exists(key):
+        return None
+    return storage.read(key).decode("utf-8")
+
+
+def read_report_files(report):
+    """(markdown or None, z-scores) of a report document, from storage."""
+    markdown_content = read_report_markdown(report)
+    z_score = []
+    if markdown_content is not None and report.get("zscore_key") and storage.exists(report["zscore_key"]):
+        z_score = json.loads(storage.read(report["zscore_key"]))
+    return markdown_content, z_score
+
+
+def report_projection(counts_only):
+    projection = {"z_outliers": 0}
+    if counts_only:
+        projection["fault"] = 0
+    return projection
+
+
+def needs_fault_lists(report, counts_only):
+    """Schema-1 reports store no fault_counts: their counts view is computed from the fault lists."""
+    return counts_only and "fault_counts" not in report
+
+
+def report_payload(report, markdown_content, z_score, counts_only):
+    """/get-report response body for a report document and its stored files."""
+    from Team_Rocket_Modules import FaultCodec
+
+    if counts_only:
+        fault_payload = {"fault_counts": FaultCodec.fault_counts(report)}
+    else:
+        fault_payload = {"fault": FaultCodec.decode_fault(report)}
+
+    return {
+        "status": "success",
+        "markdown": markdown_content,
+        **fault_payload,
+        "z_score": z_score,
+        "meta": {
+            "filename": report.get("filename"),
+            "uploaded_at": report.get("uploaded_at"),
+            "report_source": report.get("report_source", "llm"),
+            "enrichment": report.get("enrichment"),
+            "analysis": report.get("analysis", "complete"),
+            "provisional": report.get("provisional", [])
+        }
+    }
+
+
+@api.route('/get-report/<report_id>', methods=['GET'])
 def get_report_by_id(report_id):
     """
     Fetch and render a specific Markdown report by report_id.
-    Returns Markdown content, fault dict, z_score (from memory), and metadata.
+    Returns Markdown content, fault dict, z_score (from storage), and metadata.
+    ?fault=counts returns only per-range fault counts instead of the GL lists.
     """
     if 'username' not in session:
         return jsonify({"status": "fail", "message": "User not logged in"}), 401
 
+    counts_only = request.args.get("fault") == "counts"
+
     try:
-        # ✅ Get the report as before
-        report = reports_collection.find_one({"_id": ObjectId(report_id)})
+        # ✅ Get the report as before (skip the fault lists when only counts are wanted)
+        report = reports_collection.find_one({"_id": ObjectId(report_id)}, report_projection(counts_only))
         if not report:
             return jsonify({"status": "fail", "message": "Report not found"}), 404
+        if needs_fault_lists(report, counts_only):
+            report.update(reports_collection.find_one({"_id": report["_id"]}, {"fault": 1}) or {})
 
-        file_path = os.path.normpath(os.path.abspath(report.get("report_path", "")))
-        if not os.path.exists(file_path):
-            return jsonify({"status": "fail", "message": f"File not found at {file_path}"}), 404
+        markdown_content, z_score = read_report_files(report)
+        if markdown_content is None:
+            return jsonify({"status": "fail", "message": f"File not found at {report.get('report_path')}"}), 404
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            markdown_content = f.read()
+        return jsonify(report_payload(report, markdown_content, z_score, counts_only)), 200
 
+    except Exception as e:
         return jsonify({
-            "status": "success",
-            "markdown": markdown_content,
-            "fault": report.get("fault", {}),
-            "z_score": z_score,  # 🧠 use directly from memory
-            "meta": {
-                "filename": report.get("filename"),
-                "uploaded_at": report.get("uploaded_at")
-            }
-        }), 200
+            "status": "fail",
+            "message": f"Error fetching report file: {str(e)}"
+        }), 500
+
+
+
+
+# -------------------- EXPORT REPORT TABLES --------------------
+@api.route('/export/<report_id>/<table>', methods=['GET'])
+def export_report_table(report_id, table):
+    """
+    Stream a report's fault list (table=fault) or z-score outliers (table=zscore)
+    as ?format=csv|xlsx|parquet, chunk by chunk.
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    from Team_Rocket_Modules import Export, FaultCodec
+
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in Export.FORMATS:
+        return jsonify({"status": "fail", "message": f"Unsupported format: {fmt}"}), 400
+    if table not in ("fault", "zscore"):
+        return jsonify({"status": "fail", "message": f"Unknown table: {table}"}), 400
+
+    try:
+        fields = {"fault": 1, "fault_schema": 1} if table == "fault" else {"z_outliers": 1}
+        report = reports_collection.find_one({"_id": ObjectId(report_id)}, {**fields, "filename": 1})
+        if not report:
+            return jsonify({"status": "fail", "message": "Report not found"}), 404
+
+        if table == "fault":
+            frames = Export.iter_fault_frames(FaultCodec.decode_arrays(report))
+        else:
+            frames = Export.iter_outlier_frames(report.get("z_outliers", []))
+
+        mimetype, ext = Export.FORMATS[fmt]
+        body = Export.stream_export(frames, fmt)
+        stem = os.path.splitext(report.get("filename") or report_id)[0]
+        response = Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f'attachment; filename="{stem}_{table}.{ext}"'}
+        )
+        # removes the temp file even if the client goes away before the body is read
+        response.call_on_close(body.close)
+        return response
 
     except Exception as e:
         return jsonify({
             "status": "fail",
-            "message": f"Error fetching report file: {str(e)}"
+            "message": f"Error exporting report: {str(e)}"
         }), 500
 
 
+def new_review(report_id, username, gl_range, gl_code, remark, timestamp):
+    return {
+        "report_id": report_id,
+        "username": username,
+        "gl_range": gl_range,
+        "gl_code": gl_code,
+        "remark": remark,
+        "status": "waiting",
+        "logs": [
+            {"timestamp": timestamp, "action": "ask_for_review", "by": username}
+        ],
+        "review_image": None,
+        "message": "Inconsistency found in GL code",
+        "last_updated": timestamp
+    }
+
+
+def review_status_update(status, action, by, gl_code, timestamp):
+    """Set a review's status and append the matching log entry."""
+    return {
+        "$set": {
+            "status": status,
+            "gl_code": gl_code,
+            "last_updated": timestamp
+        },
+        "$push": {
+            "logs": {"timestamp": timestamp, "action": action, "by": by}
+        }
+    }
 
 
-@app.route('/request-review', methods=['POST'])
+@api.route('/request-review', methods=['POST'])
 def request_review():
     """
     Create or update a review record for a specific GL code under a report.
     """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
     data = request.get_json()
     report_id = data.get("report_id")
     gl_code = data.get("gl_code")
     gl_range = data.get("gl_range")
     remark = data.get("remark", "Inconsistency in Value")
-    username = session.get("username", "unknown_user")
+    username = session['username']
 
-    if not report_id or not gl_code:
+    if not report_id or gl_code is None:
         return jsonify({"status": "fail", "message": "Missing report_id or gl_code"}), 400
+    # GL codes are stored as int, whatever type the client sends
+    gl_code = GLIndex.to_gl(gl_code)
+    if gl_code < 0:
+        return jsonify({"status": "fail", "message": "gl_code must be a number"}), 400
 
-    existing = reviews_collection.find_one({"report_id": report_id, "gl_code": gl_code})
+    existing = reviews_collection.find_one({"report_id": report_id, "gl_code": GLIndex.gl_query(gl_code)})
     timestamp = datetime.utcnow().isoformat()
 
     if existing:
         # Already exists, just update status and append log
         reviews_collection.update_one(
             {"_id": existing["_id"]},
-            {
-                "$set": {
-                    "status": "waiting",
-                    "last_updated": timestamp
-                },
-                "$push": {
-                    "logs": {"timestamp": timestamp, "action": "ask_for_review", "by": username}
-                }
-            }
+            review_status_update("waiting", "ask_for_review", username, gl_code, timestamp)
         )
     else:
         # New review entry
-        review = {
-            "report_id": report_id,
-            "username": session['username'],
-            "gl_range": gl_range,
-            "gl_code": gl_code,
-            "remark": remark,
-            "status": "waiting",
-            "logs": [
-                {"timestamp": timestamp, "action": "ask_for_review", "by": username}
-            ],
-            "review_image": None,
-            "message": "Inconsistency found in GL code",
-            "last_updated": timestamp
-        }
-        reviews_collection.insert_one(review)
+        reviews_collection.insert_one(
+            new_review(report_id, username, gl_range, gl_code, remark, timestamp)
+        )
 
+    GLIndex.set_status(gl_index_collection, report_id, [gl_code], "waiting")
     return jsonify({"status": "success", "gl_code": gl_code, "new_status": "waiting"}), 200
 
 
-@app.route('/my-reviews', methods=['GET'])
+@api.route('/my-reviews', methods=['GET'])
 def get_my_reviews():
     if 'username' not in session:
         return jsonify({"status": "fail", "message": "User not logged in"}), 401
@@ -293,7 +1236,7 @@ def get_my_reviews():
 
 
 
-@app.route('/update-review-status', methods=['POST'])
+@api.route('/update-review-status', methods=['POST'])
 def update_review_status():
     """
     Update review status (granted or rejected) for a GL code.
@@ -305,27 +1248,34 @@ def update_review_status():
     reviewer = session.get("username", "reviewer")
 
     timestamp = datetime.utcnow().isoformat()
+    gl_code = GLIndex.to_gl(gl_code)
 
     result = reviews_collection.update_one(
-        {"report_id": report_id, "gl_code": gl_code},
-        {
-            "$set": {
-                "status": decision,
-                "last_updated": timestamp
-            },
-            "$push": {
-                "logs": {"timestamp": timestamp, "action": decision, "by": reviewer}
-            }
-        }
+        {"report_id": report_id, "gl_code": GLIndex.gl_query(gl_code)},
+        review_status_update(decision, decision, reviewer, gl_code, timestamp)
     )
 
     if result.modified_count == 0:
         return jsonify({"status": "fail", "message": "Review not found"}), 404
 
+    GLIndex.set_status(gl_index_collection, report_id, [gl_code], decision)
     return jsonify({"status": "success", "decision": decision}), 200
 
 
-@app.route('/submit-review/<review_id>', methods=['POST'])
+class ApiRequest(Request):
+    """
+    Request whose multipart parser writes a proof upload straight into a
+    Proofs.HashingFile, so it is hashed on its one trip to disk. Every
+    other upload gets Werkzeug's default temp file.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint == "api.submit_review" and filename is not None:
+            return Proofs.HashingFile(tmp_dir=staging.root)
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+@api.route('/submit-review/<review_id>', methods=['POST'])
 def submit_review(review_id):
     if 'username' not in session:
         return jsonify({"status": "fail", "message": "User not logged in"}), 401
@@ -339,14 +1289,28 @@ def submit_review(review_id):
     if review["assigned_to"] != username:
         return jsonify({"status": "fail", "message": "Unauthorized"}), 403
 
-    text_proof = request.form.get("text")
-    file = request.files.get("file")
+    # refuse oversized bodies before the multipart parser reads (and buffers) them:
+    # by Content-Length up front, or by Werkzeug once a chunked body passes the limit
+    too_large = jsonify({"status": "fail", "message": f"Proof file exceeds {Proofs.MAX_PROOF_BYTES} bytes"}), 413
+    request.max_content_length = Proofs.MAX_PROOF_BYTES + PROOF_FORM_OVERHEAD
+    if request.content_length and request.content_length > request.max_content_length:
+        return too_large
+    try:
+        text_proof = request.form.get("text")
+        file = request.files.get("file")
+    except RequestEntityTooLarge:
+        return too_large
     file_path = None
+    proof = None
 
     if file:
-        os.makedirs("./Proofs", exist_ok=True)
-        file_path = os.path.join("./Proofs", f"{review_id}_{file.filename}")
-        file.save(file_path)
+        # stored once per distinct content, hashed while the form parser wrote it (ApiRequest)
+        try:
+            proof = Proofs.store(storage, proof_blobs_collection, file.stream, file.mimetype, tmp_dir=staging.root)
+        except Proofs.ProofTooLarge as e:
+            return jsonify({"status": "fail", "message": str(e)}), 413
+        proof["filename"] = os.path.basename(file.filename)
+        file_path = proof["key"]
 
     reviews_collection.update_one(
         {"_id": ObjectId(review_id)},
@@ -354,22 +1318,79 @@ def submit_review(review_id):
             "status": "submitted",
             "review_text": text_proof,
             "review_file": file_path,
+            "proof": proof,
             "submitted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }}
     )
+    # the review no longer points at its previous proof
+    previous = review.get("proof")
+    if previous:
+        Proofs.release(proof_blobs_collection, previous["sha256"])
+        Proofs.collect_garbage(storage, proof_blobs_collection)
+    GLIndex.set_status(gl_index_collection, review["report_id"], [GLIndex.to_gl(review["gl_code"])], "submitted")
 
     return jsonify({"status": "success", "message": "Proof submitted successfully"}), 200
 
 
 
 
-@app.route('/review-log/<report_id>/<gl_code>', methods=['GET'])
+@api.route('/proof/<review_id>', methods=['GET'])
+def download_proof(review_id):
+    """
+    Proof file of a review, for its requester or reviewer. Supports Range
+    requests and If-None-Match (the ETag is the content hash).
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    try:
+        review = reviews_collection.find_one({"_id": ObjectId(review_id)},
+                                             {"proof": 1, "review_file": 1, "username": 1, "assigned_to": 1})
+    except Exception:
+        review = None
+    if not review or not review.get("review_file"):
+        return jsonify({"status": "fail", "message": "Proof not found"}), 404
+    if session['username'] not in (review.get("username"), review.get("assigned_to")):
+        return jsonify({"status": "fail", "message": "Unauthorized"}), 403
+
+    proof = review.get("proof") or {}
+    key = review["review_file"]
+    name = proof.get("filename") or os.path.basename(key).split("_", 1)[-1]
+    if not proof and os.path.isabs(key):
+        # proof saved before the storage backend existed
+        return send_file(key, download_name=name, conditional=True)
+    if not storage.exists(key):
+        return jsonify({"status": "fail", "message": "Proof file missing"}), 404
+
+    path = storage.local_path(key)
+    options = {"mimetype": proof.get("content_type"), "download_name": name}
+    if not options["mimetype"]:
+        options.pop("mimetype")
+    if path is not None:
+        response = send_file(path, conditional=True, etag=proof.get("sha256", True), **options)
+    else:
+        f = storage.open(key)
+        response = send_file(f, etag=proof.get("sha256", False), **options)
+        response.content_length = f.length
+        response = response.make_conditional(request, accept_ranges=True, complete_length=f.length)
+
+    if proof:
+        response.cache_control.no_cache = None
+        response.cache_control.public = None
+        response.cache_control.private = True
+        response.cache_control.max_age = PROOF_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
+@api.route('/review-log/<report_id>/<gl_code>', methods=['GET'])
 def get_review_log(report_id, gl_code):
     """
     Fetch full review history for a GL code.
     """
+    gl_code = GLIndex.to_gl(gl_code)
     review = reviews_collection.find_one(
-        {"report_id": report_id, "gl_code": int(gl_code)},
+        {"report_id": report_id, "gl_code": GLIndex.gl_query(gl_code)},
         {"_id": 0}
     )
     if not review:
@@ -384,7 +1405,7 @@ def get_review_log(report_id, gl_code):
 
 
 
-@app.route('/report-reviews/<report_id>', methods=['GET'])
+@api.route('/report-reviews/<report_id>', methods=['GET'])
 def get_report_reviews(report_id):
     """
     Fetch all review statuses for a given report.
@@ -395,6 +1416,97 @@ def get_report_reviews(report_id):
 
 
 
+# -------------------- GL HISTORY --------------------
+@api.route('/gl/<gl_code>/history', methods=['GET'])
+def get_gl_history(gl_code):
+    """
+    Every report that flagged a GL code, newest first, with the fault range,
+    period and current review status (one indexed query on gl_index).
+    ?scope=all covers every user's reports.
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    gl = GLIndex.to_gl(gl_code)
+    if gl < 0:
+        return jsonify({"status": "fail", "message": "gl_code must be a number"}), 400
+    username = None if request.args.get("scope") == "all" else session['username']
+
+    entries = GLIndex.history(gl_index_collection, gl, username)
+    by_status = {}
+    for entry in entries:
+        by_status[entry["status"]] = by_status.get(entry["status"], 0) + 1
+
+    return jsonify({
+        "status": "success",
+        "gl_code": gl,
+        "count": len(entries),
+        "reports": len({e["report_id"] for e in entries}),
+        "by_status": by_status,
+        "history": entries
+    }), 200
+
+
+# -------------------- ROLLUP CUBE --------------------
+@api.route('/rollup', methods=['GET'])
+def get_rollup():
+    """
+    Dashboard aggregates from the materialized cube (indexed reads only).
+    ?level=entity|region|department|category|total|cell (default entity)
+    &period=YYYY-MM          all keys of that period
+    &key=<value>             or the periods of one key
+    &compare=YYYY-MM         with period: variance against that period
+    """
+    if 'username' not in session:
+        return jsonify({"status": "fail", "message": "User not logged in"}), 401
+
+    level = request.args.get("level", "entity")
+    if level not in Rollup.LEVELS and level != "cell":
+        return jsonify({"status": "fail", "message": f"level must be one of {list(Rollup.LEVELS) + ['cell']}"}), 400
+    period = request.args.get("period")
+    key = request.args.get("key")
+    compare = request.args.get("compare")
+    if compare and not period:
+        return jsonify({"status": "fail", "message": "compare needs a period"}), 400
+
+    try:
+        username = session['username']
+        rows = Rollup.read(rollup_collection, username, level, period, key)
+        if compare:
+            rows = Rollup.variance(rows, Rollup.read(rollup_collection, username, level, compare, key))
+        return jsonify({
+            "status": "success",
+            "level": level,
+            "period": period,
+            "compare": compare,
+            "count": len(rows),
+            "rows": rows
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            "status": "fail",
+            "message": f"Error reading rollups: {str(e)}"
+        }), 500
+
+
+# -------------------- APP FACTORY --------------------
+def create_app():
+    """
+    Build the Flask app. Cheap: Mongo, indexes, storage and the Gemini model
+    are set up on first use, not here.
+    """
+    app = Flask(__name__)
+    app.request_class = ApiRequest
+    app.secret_key = os.getenv("SECRET_KEY", "default-secret")
+    CORS(app, supports_credentials=True)
+    app.register_blueprint(api)
+    return app
+
+
+app = create_app()
+
+
 # -------------------- MAIN --------------------
 if __name__ == '__main__':
     app.run(debug=True)
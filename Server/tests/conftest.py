@@ -0,0 +1,71 @@
+import os
+import sys
+import importlib.util
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(SERVER_DIR, "Dataset")
+sys.path.insert(0, SERVER_DIR)
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """
+    One in-memory mongomock client handed to every MongoClient() call, so
+    several app instances share one database as workers share a server.
+    """
+    mongomock = pytest.importorskip("mongomock")
+    import mongomock.collection
+    import pymongo
+
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, "MongoClient", lambda *args, **kwargs: client)
+    # pymongo's UpdateOne passes sort= to bulk builders; mongomock's does not take it
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+    monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, "add_update",
+                        lambda self, *args, sort=None, **kwargs: add_update(self, *args, **kwargs))
+    return client
+
+
+@pytest.fixture
+def storage_root(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_ROOT", str(tmp_path))
+    monkeypatch.setenv("STORAGE_BACKEND", "local")
+    monkeypatch.setenv("REPORT_ENRICHMENT", "off")
+    return tmp_path
+
+
+def load_worker(name: str):
+    """
+    A fresh import of server.py under its own module name: its own app,
+    lazy connections, storage handle and executors, like a gunicorn worker.
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SERVER_DIR, "server.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def make_worker(mongo, storage_root):
+    workers = []
+
+    def make(username=None):
+        worker = load_worker(f"server_worker_{len(workers)}")
+        workers.append(worker)
+        client = worker.app.test_client()
+        if username:
+            with client.session_transaction() as session:
+                session["username"] = username
+        return worker, client
+
+    yield make
+    for worker in workers:
+        for executor in (worker.enricher, worker.analyzer):
+            if executor.ready():
+                executor.shutdown(wait=True)
+
+
+def upload(client, filename="data.xlsx", **form):
+    with open(os.path.join(DATASET_DIR, filename), "rb") as f:
+        return client.post("/upload-excel", data={"file": (f, filename), "enrich": "false", **form})
@@ -0,0 +1,38 @@
+import pytest
+import pandas as pd
+from conftest import upload
+
+from Team_Rocket_Modules.Process import GLAnalyzer, RangeError, MAX_RANGES
+
+
+@pytest.mark.parametrize("form", [{"step_size": "-5"}, {"step_size": "1"}, {"z_threshold": "-1"},
+                                  {"z_threshold": "0"}, {"step_size": "ten"}])
+def test_upload_rejects_bad_params(make_worker, form):
+    worker, client = make_worker("alice")
+    response = upload(client, **form)
+    assert response.status_code == 400, response.get_json()
+    assert worker.reports_collection.count_documents({}) == 0
+
+
+def test_step_size_giving_too_many_ranges(make_worker, storage_root):
+    worker, client = make_worker("alice")
+    # data.xlsx GLs run up to 58,001,000: 58,001 ranges of 1,000
+    response = upload(client, step_size="1000")
+    assert response.status_code == 400
+    assert "ranges" in response.get_json()["message"]
+    assert worker.reports_collection.count_documents({}) == 0
+    assert not list((storage_root / worker.DATASET_FOLDER).glob("*"))
+
+    report_id = upload(client).get_json()["report_id"]
+    for body in ({"step_size": -5}, {"z_threshold": -1}, {"step_size": 2000}):
+        assert client.post(f"/reanalyze/{report_id}", json=body).status_code == 400
+    response = client.post(f"/reanalyze/{report_id}", json={"step_size": 10_000})
+    assert response.status_code == 200, response.get_json()
+
+
+def test_analyzer_refuses_endless_ranges():
+    df = pd.DataFrame({"GL": [10_000_000, 20_000_000], "Amount": [1.0, -1.0],
+                       "FS Grouping Main Head": ["A", "B"]})
+    for step_size in (-5, 0, 20_000_000 // (MAX_RANGES + 1)):
+        with pytest.raises(RangeError):
+            GLAnalyzer(df, step_size=step_size).run_analysis()
@@ -0,0 +1,105 @@
+"""
+The async routes of asgi.py answer exactly like their Flask counterparts
+(status and JSON body), over one shared in-memory database.
+"""
+import json
+import sys
+import asyncio
+
+import pytest
+from conftest import upload
+
+pytest.importorskip("starlette")
+pytest.importorskip("a2wsgi")
+
+
+def call_asgi(app, method, path, body=None, cookie=None):
+    """One HTTP request straight into an ASGI app; returns (status, JSON body)."""
+    path, _, query = path.partition("?")
+    headers = [(b"host", b"test")]
+    payload = b""
+    if body is not None:
+        payload = json.dumps(body).encode()
+        headers.append((b"content-type", b"application/json"))
+    if cookie:
+        headers.append((b"cookie", f"session={cookie}".encode()))
+    scope = {"type": "http", "http_version": "1.1", "method": method, "scheme": "http", "path": path,
+             "raw_path": path.encode(), "query_string": query.encode(), "root_path": "", "headers": headers,
+             "server": ("test", 80), "client": ("127.0.0.1", 1)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+    data = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return status, json.loads(data)
+
+
+@pytest.fixture
+def modes(mongo, storage_root, monkeypatch):
+    """(server module, asgi module, Flask client, session cookie) for user alice."""
+    import pymongo
+    from benchmarks import mock_mongo
+
+    # restored after the test; install() replaces them
+    monkeypatch.setattr(pymongo, "MongoClient", pymongo.MongoClient)
+    monkeypatch.setattr(pymongo, "AsyncMongoClient", pymongo.AsyncMongoClient)
+    mock_mongo.install()
+    for name in ("server", "asgi"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    import server
+    import asgi
+
+    client = server.app.test_client()
+    with client.session_transaction() as session:
+        session["username"] = "alice"
+    return server, asgi, client, client.get_cookie("session").value
+
+
+def both(modes, method, path, body=None, logged_in=True):
+    _, asgi, client, cookie = modes
+    flask_client = client if logged_in else modes[0].app.test_client()
+    response = flask_client.open(path, method=method, json=body)
+    flask = (response.status_code, response.get_json())
+    return flask, call_asgi(asgi.app, method, path, body, cookie if logged_in else None)
+
+
+def test_unauthenticated_requests_match(modes):
+    for method, path, body in [("POST", "/request-review", {"report_id": "r", "gl_code": 1}),
+                               ("GET", "/my-reviews", None), ("GET", "/user-reports", None),
+                               ("GET", "/get-report/0123456789abcdef01234567", None),
+                               ("GET", "/session-check", None)]:
+        flask, asgi = both(modes, method, path, body, logged_in=False)
+        assert flask == asgi, path
+    assert both(modes, "POST", "/request-review", {"report_id": "r", "gl_code": 1}, logged_in=False)[1][0] == 401
+
+
+def test_report_and_review_routes_match(modes):
+    server, asgi, client, cookie = modes
+    report_id = upload(client).get_json()["report_id"]
+
+    for path in ("/session-check", "/user-reports", f"/get-report/{report_id}",
+                 f"/get-report/{report_id}?fault=counts"):
+        flask, asgi_response = both(modes, "GET", path)
+        assert flask == asgi_response and flask[0] == 200, path
+
+    fault = client.get(f"/get-report/{report_id}").get_json()["fault"]
+    (gl_range, codes), = [(r, c) for r, c in fault.items() if len(c) >= 2][:1]
+    status, _ = call_asgi(asgi.app, "POST", "/request-review",
+                          {"report_id": report_id, "gl_code": codes[0], "gl_range": gl_range}, cookie)
+    assert status == 200
+    assert client.post("/request-review", json={"report_id": report_id, "gl_code": codes[1],
+                                                "gl_range": gl_range}).status_code == 200
+    status, _ = call_asgi(asgi.app, "POST", "/update-review-status",
+                          {"report_id": report_id, "gl_code": codes[1], "decision": "granted"}, cookie)
+    assert status == 200
+
+    for path in (f"/report-reviews/{report_id}", f"/review-log/{report_id}/{codes[0]}",
+                 f"/review-log/{report_id}/{codes[1]}", "/my-reviews"):
+        flask, asgi_response = both(modes, "GET", path)
+        assert flask == asgi_response and flask[0] == 200, path
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+from conftest import upload
+
+from Team_Rocket_Modules.Benford import BenfordDetector, benford_table, leading_digits
+
+
+def test_leading_digits():
+    values = [1, 9.99, 10, 0.0123, 999.9999, -45, 0, np.nan, np.inf]
+    assert leading_digits(values).tolist() == [1, 9, 1, 1, 9, 4, 0, 0, 0]
+    assert leading_digits(values, 2).tolist() == [10, 99, 10, 12, 99, 45, 0, 0, 0]
+    # exact powers of ten, where log10 rounding is most likely to land a decade off
+    assert (leading_digits(10.0 ** np.arange(-12, 16)) == 1).all()
+    for mantissa, expected in (("9.9", 99), ("1.5", 15)):
+        values = [float(f"{mantissa}e{k}") for k in range(-12, 16)]
+        assert (leading_digits(values, 2) == expected).all(), mantissa
+
+
+def test_leading_digits_of_cent_amounts():
+    # 0.29, 1.2, 4.1, ... are stored a hair below their decimal value
+    cents = np.arange(10, 1_000_000)
+    text = cents.astype(str)
+    assert (leading_digits(cents / 100.0) == text.astype("U1").astype(int)).all()
+    assert (leading_digits(cents / 100.0, 2) == text.astype("U2").astype(int)).all()
+
+
+def benford_amounts(n, rng):
+    # log-uniform over whole decades follows Benford's law
+    return 10 ** rng.uniform(0, 6, n)
+
+
+def test_conforming_and_nonconforming_samples():
+    rng = np.random.default_rng(0)
+    for n_digits in (1, 2):
+        good = benford_table(benford_amounts(50_000, rng), n_digits=n_digits).iloc[0]
+        assert good["conformity"] == "close" and not good["chi2_reject"]
+        bad = benford_table(rng.uniform(100, 1000, 50_000), n_digits=n_digits).iloc[0]
+        assert bad["conformity"] == "nonconformity" and bad["chi2_reject"]
+
+
+def test_per_entity_table_matches_one_entity_at_a_time():
+    rng = np.random.default_rng(1)
+    amounts = np.concatenate([benford_amounts(5000, rng), rng.uniform(500, 600, 3000), benford_amounts(40, rng),
+                              [123.0, 456.0]])
+    entities = np.array(["A"] * 5000 + ["B"] * 3000 + ["C"] * 40 + [None, None], dtype=object)
+    table = benford_table(amounts, entities, min_count=50).set_index("entity")
+
+    assert sorted(table.index) == ["A", "B"]   # C has too few rows, missing entities are dropped
+    for entity in ("A", "B"):
+        alone = benford_table(amounts[entities == entity]).iloc[0]
+        assert table.loc[entity, "n"] == alone["n"]
+        assert np.isclose(table.loc[entity, "chi2"], alone["chi2"]) and np.isclose(table.loc[entity, "mad"], alone["mad"])
+
+    detector = BenfordDetector(pd.DataFrame({"Amount": amounts, "Entity": entities}))
+    detector.run()
+    assert detector.getFlagged() == ["B"]
+    assert "1 of 2 entities" in detector.text
+
+
+def test_small_sheet_is_skipped():
+    detector = BenfordDetector(pd.DataFrame({"Amount": [12.0, 30.0, 4.5]}))
+    assert "skipped" in detector.run()
+    assert detector.getFlagged() == []
+
+
+def test_upload_stores_the_screening(make_worker):
+    from Team_Rocket_Modules import Dataset
+
+    worker, client = make_worker("alice")
+    report_id = upload(client).get_json()["report_id"]
+    report = worker.reports_collection.find_one({"_id": ObjectId(report_id)})
+    amounts = Dataset.load_columnar(worker.storage, report["columnar_key"])["Amount"].to_numpy()
+
+    first = report["benford"]["first_digit"]
+    assert [row["entity"] for row in first] == ["all"]   # data.xlsx has no Entity column
+    assert first[0]["n"] == (leading_digits(amounts) > 0).sum()
+    assert report["benford"]["first_two_digits"][0]["n"] == (np.abs(amounts) >= 10).sum()
@@ -0,0 +1,59 @@
+import os
+import hashlib
+
+import pytest
+from conftest import DATASET_DIR
+
+from Team_Rocket_Modules import Upload
+
+CHUNK = 4096
+
+
+@pytest.fixture(params=["local", "storage"])
+def workers(request, make_worker, monkeypatch):
+    """Two workers staging chunks under the shared root (local) or through the storage backend."""
+    monkeypatch.setenv("UPLOAD_STAGING", request.param)
+    monkeypatch.setattr(Upload, "MIN_CHUNK_BYTES", 1024)
+    a, b = make_worker("alice"), make_worker("alice")
+    staging_class = Upload.StorageStaging if request.param == "storage" else Upload.UploadStaging
+    assert isinstance(a[0].staging.get(), staging_class)
+    return a, b
+
+
+def put_chunk(client, upload_id, index, data):
+    return client.put(f"/upload/{upload_id}/chunk/{index}", data=data,
+                      headers={"X-Chunk-SHA256": hashlib.sha256(data).hexdigest()})
+
+
+def test_chunks_and_complete_on_different_workers(workers):
+    (a, client_a), (b, client_b) = workers
+    with open(os.path.join(DATASET_DIR, "data.xlsx"), "rb") as f:
+        data = f.read()
+    chunks = [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+    body = {"filename": "data.xlsx", "size": len(data), "sha256": hashlib.sha256(data).hexdigest(),
+            "chunk_size": CHUNK}
+
+    response = client_a.post("/upload/init", json=body)
+    assert response.status_code == 201, response.get_json()
+    upload_id = response.get_json()["upload_id"]
+
+    # the first half alternates between the workers, then the client "reconnects" to B
+    half = len(chunks) // 2
+    for index in range(half):
+        assert put_chunk((client_a, client_b)[index % 2], upload_id, index, chunks[index]).status_code == 200
+    resumed = client_b.post("/upload/init", json=body).get_json()
+    assert resumed["resumed"] and resumed["upload_id"] == upload_id
+    assert resumed["received"] == list(range(half))
+
+    assert put_chunk(client_b, upload_id, half, chunks[half][:-1]).status_code == 400   # short chunk
+    for index in range(half, len(chunks)):
+        assert put_chunk(client_b, upload_id, index, chunks[index]).status_code == 200
+
+    response = client_a.post(f"/upload/{upload_id}/complete", json={"enrich": "false"})
+    assert response.status_code == 200, response.get_json()
+    report_id = response.get_json()["report_id"]
+    assert client_b.get(f"/get-report/{report_id}").get_json()["status"] == "success"
+    report = b.reports_collection.find_one({"_id": a.reports_collection.find_one()["_id"]})
+    assert b.storage.read(report["dataset_key"]) == data
+    # nothing left staged
+    assert not a.staging.exists(upload_id) and not b.staging.exists(upload_id)
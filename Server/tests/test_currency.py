@@ -0,0 +1,28 @@
+import pytest
+from conftest import upload
+
+from Team_Rocket_Modules import Currency
+
+
+@pytest.mark.parametrize("field, value", [
+    ("fx_period", "../../x"),
+    ("fx_period", "2025-10/../../etc/passwd"),
+    ("period", "2025-13"),
+    ("period", "October"),
+])
+def test_malformed_periods_are_rejected(make_worker, field, value):
+    worker, client = make_worker("alice")
+    response = upload(client, **{field: value})
+    assert response.status_code == 400
+    assert "YYYY-MM" in response.get_json()["message"]
+    assert worker.reports_collection.count_documents({}) == 0
+    response = client.post("/reanalyze/0123456789abcdef01234567", json={field: value})
+    assert response.status_code == 400
+
+
+def test_rates_for_only_reads_period_files(tmp_path):
+    (tmp_path / "2025-09.csv").write_text("currency,rate\nUSD,1\nEUR,1.1\n")
+    (tmp_path.parent / "secret.csv").write_text("currency,rate\nUSD,1\n")
+    assert Currency.rates_for("2025-10", str(tmp_path)).period == "2025-09"
+    with pytest.raises(Currency.FxError):
+        Currency.rates_for("../secret", str(tmp_path))
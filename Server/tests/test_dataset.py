@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from Team_Rocket_Modules import Dataset
+from Team_Rocket_Modules.Storage import LocalStorage
+
+
+def mapped_regions(path):
+    """Address ranges at which this process has path memory-mapped (Linux)."""
+    regions = []
+    with open("/proc/self/maps") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 6 and fields[5] == os.path.realpath(path):
+                start, end = (int(a, 16) for a in fields[0].split("-"))
+                regions.append((start, end))
+    return regions
+
+
+def test_columnar_round_trip_maps_numeric_columns(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    n = 200_000   # more than Feather's default batch of 64K rows
+    df = Dataset.normalize(pd.DataFrame({
+        "GL": np.arange(10_000_000, 10_000_000 + n),
+        "Amount": np.linspace(-1e6, 1e6, n),
+        "FS Grouping Main Head": np.where(np.arange(n) % 2, "Current Assets", "Current Liabilities"),
+    }))
+    key = Dataset.save_columnar(storage, "Columnar/x.arrow", df)
+    assert os.listdir(tmp_path / "Columnar") == ["x.arrow"]   # no temp file left behind
+
+    loaded = Dataset.load_columnar(storage, key)
+    pd.testing.assert_frame_equal(loaded, df)
+    # GL and Amount point into the memory-mapped file instead of a copy
+    if os.path.exists("/proc/self/maps"):
+        regions = mapped_regions(storage.local_path(key))
+        for column in ("GL", "Amount"):
+            address = loaded[column].to_numpy().__array_interface__["data"][0]
+            assert any(start <= address < end for start, end in regions), column
+
+
+def test_failed_write_leaves_no_object(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    try:
+        with storage.writer("Columnar/y.arrow") as f:
+            f.write(b"partial")
+            raise RuntimeError("writer failed")
+    except RuntimeError:
+        pass
+    assert not storage.exists("Columnar/y.arrow")
+    assert os.listdir(tmp_path / "Columnar") == []
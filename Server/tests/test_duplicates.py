@@ -0,0 +1,18 @@
+import pandas as pd
+import pytest
+
+from Team_Rocket_Modules.Duplicates import DuplicateDetector
+
+
+@pytest.mark.parametrize("dtype", [object, "category"])
+def test_missing_grouping_is_its_own_bucket(dtype):
+    df = pd.DataFrame({
+        "GL": [10000001, 10000001, 20000002, 20000002],
+        "Amount": [5.00, 4.99, 7.00, 7.00],
+        "FS Grouping Main Head": pd.Series([None, "B", None, None], dtype=dtype),
+    })
+    detector = DuplicateDetector(df)
+    detector.run()
+    # 5.00 without a grouping and 4.99 in "B" are not an exact duplicate;
+    # two ungrouped 7.00 postings are
+    assert detector.getDuplicates() == [20000002]
@@ -0,0 +1,45 @@
+import io
+
+import pytest
+from conftest import upload
+
+from Team_Rocket_Modules import Export
+
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("xlsxwriter")
+
+
+def read_sheets(stream):
+    workbook = openpyxl.load_workbook(io.BytesIO(b"".join(stream)), read_only=True)
+    return {sheet.title: [list(r) for r in sheet.iter_rows(values_only=True)] for sheet in workbook.worksheets}
+
+
+def test_xlsx_continues_on_new_sheets_at_the_row_limit():
+    fault = {"10000000": list(range(10_000_001, 10_000_008)), "20000000": [20_000_001, 20_000_002, 20_000_003]}
+    stream = Export.stream_xlsx(Export.iter_fault_frames(fault, chunk_rows=4), max_rows=4)
+    sheets = read_sheets(stream)
+
+    assert list(sheets) == ["Export", "Export (2)", "Export (3)", "Export (4)"]
+    assert all(rows[0] == ["Range", "GL"] for rows in sheets.values())
+    assert [len(rows) - 1 for rows in sheets.values()] == [3, 3, 3, 1]
+    gls = [gl for rows in sheets.values() for _, gl in rows[1:]]
+    assert gls == [gl for codes in fault.values() for gl in codes]
+
+
+def test_xlsx_of_an_empty_table_has_the_header():
+    sheets = read_sheets(Export.stream_xlsx(Export.iter_outlier_frames([])))
+    assert sheets == {"Export": [["GL", "Z_score"]]}
+
+
+def test_export_route_formats(make_worker):
+    worker, client = make_worker("alice")
+    report_id = upload(client).get_json()["report_id"]
+    fault = client.get(f"/get-report/{report_id}").get_json()["fault"]
+
+    csv = client.get(f"/export/{report_id}/fault?format=csv").get_data(as_text=True).splitlines()
+    assert csv[0] == "Range,GL" and len(csv) - 1 == sum(len(codes) for codes in fault.values())
+
+    response = client.get(f"/export/{report_id}/fault?format=xlsx")
+    assert response.status_code == 200
+    rows = read_sheets([response.get_data()])["Export"]
+    assert rows[0] == ["Range", "GL"] and len(rows) == len(csv)
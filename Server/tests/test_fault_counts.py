@@ -0,0 +1,23 @@
+from conftest import upload
+
+
+def test_counts_view_of_legacy_and_current_reports(make_worker):
+    worker, client = make_worker("alice")
+    storage_key = "Report/alice/legacy.md"
+    worker.storage.save(storage_key, b"# Legacy report")
+    # schema-1 document: plain GL lists, no fault_schema / fault_counts
+    legacy_id = worker.reports_collection.insert_one({
+        "username": "alice", "report_path": storage_key,
+        "fault": {"10000000": [10000005, 10000007], "20000000": [20000001]},
+    }).inserted_id
+
+    full = client.get(f"/get-report/{legacy_id}").get_json()
+    counts = client.get(f"/get-report/{legacy_id}?fault=counts").get_json()
+    assert full["fault"] == {"10000000": [10000005, 10000007], "20000000": [20000001]}
+    assert counts["fault_counts"] == {"10000000": 2, "20000000": 1}
+
+    report_id = upload(client).get_json()["report_id"]
+    full = client.get(f"/get-report/{report_id}").get_json()
+    counts = client.get(f"/get-report/{report_id}?fault=counts").get_json()
+    assert "fault" not in counts
+    assert counts["fault_counts"] == {r: len(codes) for r, codes in full["fault"].items()}
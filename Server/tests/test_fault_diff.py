@@ -0,0 +1,51 @@
+from bson import ObjectId
+from conftest import upload
+
+
+def test_diff_baseline_and_carry_forward(make_worker):
+    worker, client = make_worker("alice")
+    reports = worker.reports_collection
+    first = upload(client).get_json()["report_id"]
+    reports.update_one({"_id": ObjectId(first)}, {"$set": {"uploaded_at": "2024-01-01 00:00:00"}})
+    second = upload(client).get_json()["report_id"]
+    rerun = client.post(f"/reanalyze/{second}", json={"z_threshold": 2}).get_json()["report_id"]
+
+    # never a baseline: a provisional preview, or another analysis of the same upload
+    fault = {k: v for k, v in reports.find_one({"_id": ObjectId(first)}).items() if k.startswith("fault")}
+    reports.insert_one({"username": "alice", "uploaded_at": "2024-06-01 00:00:00", "analysis": "running",
+                        "dataset_key": "Datasets/x.xlsx", **fault})
+    for report_id in (second, rerun):
+        assert client.get(f"/fault-diff/{report_id}").get_json()["against"] == first, report_id
+
+    # nor a report created after `second` within the same second
+    uploaded_at = reports.find_one({"_id": ObjectId(second)})["uploaded_at"]
+    reports.insert_one({"username": "alice", "uploaded_at": uploaded_at, "analysis": "complete",
+                        "dataset_key": "Datasets/y.xlsx", **fault})
+    assert client.get(f"/fault-diff/{second}").get_json()["against"] == first
+    body = client.get(f"/fault-diff/{second}").get_json()
+    assert body["totals"]["new"] == body["totals"]["resolved"] == 0 < body["totals"]["persisting"]
+
+    # an open review on the earlier report; GET does not copy it
+    gl_range, codes = next(iter(client.get(f"/get-report/{first}").get_json()["fault"].items()))
+    client.post("/request-review", json={"report_id": first, "gl_code": codes[0], "gl_range": gl_range})
+    client.get(f"/fault-diff/{second}")
+    assert worker.reviews_collection.count_documents({"report_id": second}) == 0
+
+    assert client.post(f"/fault-diff/{second}/carry-forward").get_json()["carried_reviews"] == 1
+    assert client.post(f"/fault-diff/{second}/carry-forward").get_json()["carried_reviews"] == 0
+    carried = worker.reviews_collection.find_one({"report_id": second})
+    assert carried["gl_code"] == codes[0] and carried["carried_from"] == first
+    assert worker.gl_index_collection.find_one({"report_id": second, "gl_code": codes[0]})["status"] == "waiting"
+
+
+def test_diff_is_limited_to_the_users_own_reports(make_worker):
+    worker, alice = make_worker("alice")
+    _, bob = make_worker("bob")
+    alices = upload(alice).get_json()["report_id"]
+    bobs = upload(bob).get_json()["report_id"]
+
+    assert bob.get(f"/fault-diff/{alices}").status_code == 404
+    assert bob.post(f"/fault-diff/{alices}/carry-forward", json={"against": bobs}).status_code == 404
+    assert alice.get(f"/fault-diff/{alices}?against={bobs}").status_code == 404
+    assert alice.post(f"/fault-diff/{alices}/carry-forward", json={"against": bobs}).status_code == 404
+    assert worker.reviews_collection.count_documents({}) == 0
@@ -0,0 +1,21 @@
+from conftest import upload
+
+from Team_Rocket_Modules import GLIndex
+
+
+def test_index_entries_carry_the_report_period(make_worker):
+    worker, client = make_worker("alice")
+    report_id = upload(client, period="2024-01").get_json()["report_id"]
+    fault = client.get(f"/get-report/{report_id}").get_json()["fault"]
+    gl = next(code for codes in fault.values() for code in codes)
+
+    assert worker.gl_index_collection.distinct("period", {"report_id": report_id}) == ["2024-01"]
+    history = client.get(f"/gl/{gl}/history").get_json()["history"]
+    assert [(e["report_id"], e["period"]) for e in history] == [(report_id, "2024-01")]
+    # the index and the rollup file the upload under the same period
+    assert worker.rollup_collection.distinct("period", {"username": "alice"}) == ["2024-01"]
+
+    # a rebuilt index agrees
+    worker.gl_index_collection.delete_many({})
+    assert GLIndex.backfill(worker.reports_collection, worker.reviews_collection, worker.gl_index_collection) == 1
+    assert worker.gl_index_collection.distinct("period") == ["2024-01"]
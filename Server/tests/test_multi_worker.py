@@ -0,0 +1,114 @@
+"""
+Two app instances (separate imports of server.py, as two gunicorn workers
+or nodes) sharing one database and one storage root: whatever one worker
+writes, the other serves.
+"""
+import io
+import threading
+
+from bson import ObjectId
+from conftest import upload
+
+from Team_Rocket_Modules.Storage import LocalStorage
+
+
+def first_fault_gl(payload):
+    for gl_range, codes in payload["fault"].items():
+        if codes:
+            return gl_range, codes[0]
+    raise AssertionError("data.xlsx should have sign faults")
+
+
+def test_report_and_review_flow_across_workers(make_worker):
+    a, alice_a = make_worker("alice")
+    b, alice_b = make_worker("alice")
+    _, bob_b = make_worker("bob")
+    assert a is not b and a.storage is not b.storage
+
+    response = upload(alice_a)
+    assert response.status_code == 200, response.get_json()
+    report_id = response.get_json()["report_id"]
+
+    # listing, report, z-scores and exports from the other worker
+    listed = alice_b.get("/user-reports").get_json()
+    assert [r["id"] for r in listed["reports"]] == [report_id]
+    report = alice_b.get(f"/get-report/{report_id}").get_json()
+    assert report["status"] == "success" and report["markdown"]
+    assert report["z_score"] == alice_a.get(f"/get-report/{report_id}").get_json()["z_score"]
+    export = alice_b.get(f"/export/{report_id}/fault?format=csv")
+    assert export.status_code == 200 and export.data.startswith(b"Range,GL")
+
+    # re-analysis on B from the columnar copy A cached
+    response = alice_b.post(f"/reanalyze/{report_id}", json={"z_threshold": 2})
+    assert response.status_code == 200, response.get_json()
+    second_id = response.get_json()["report_id"]
+    assert alice_a.get(f"/get-report/{second_id}").get_json()["status"] == "success"
+
+    # review requested on A, assigned, answered with a proof on B, downloaded on A
+    gl_range, gl = first_fault_gl(report)
+    response = alice_a.post("/request-review", json={"report_id": report_id, "gl_code": gl, "gl_range": gl_range})
+    assert response.status_code == 200
+    review = a.reviews_collection.find_one({"report_id": report_id, "gl_code": gl})
+    a.reviews_collection.update_one({"_id": review["_id"]}, {"$set": {"assigned_to": "bob"}})
+
+    assert [r["gl_code"] for r in bob_b.get("/my-reviews").get_json()["reviews"]] == [gl]
+    proof = b"%PDF-1.4 bank confirmation"
+    response = bob_b.post(f"/submit-review/{review['_id']}",
+                          data={"text": "confirmed", "file": (io.BytesIO(proof), "confirmation.pdf")})
+    assert response.status_code == 200, response.get_json()
+    download = alice_a.get(f"/proof/{review['_id']}")
+    assert download.status_code == 200 and download.data == proof
+
+    response = bob_b.post("/update-review-status", json={"report_id": report_id, "gl_code": gl, "decision": "granted"})
+    assert response.status_code == 200
+    log = alice_a.get(f"/review-log/{report_id}/{gl}").get_json()
+    assert log["current_status"] == "granted"
+    assert [entry["action"] for entry in log["logs"]] == ["ask_for_review", "granted"]
+    history = alice_a.get(f"/gl/{gl}/history").get_json()
+    assert history["by_status"].get("granted") == 1
+
+
+def test_concurrent_uploads_on_both_workers(make_worker):
+    workers = [make_worker("alice") for _ in range(2)]
+    results = []
+
+    def run(client):
+        response = upload(client)
+        results.append((response.status_code, response.get_json()))
+
+    threads = [threading.Thread(target=run, args=(workers[i % 2][1],)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [status for status, _ in results] == [200] * 4, results
+    report_ids = {body["report_id"] for _, body in results}
+    assert len(report_ids) == 4
+    for report_id in report_ids:
+        for _, client in workers:
+            assert client.get(f"/get-report/{report_id}").get_json()["status"] == "success"
+    assert workers[0][0].reports_collection.count_documents({"_id": {"$in": [ObjectId(r) for r in report_ids]}}) == 4
+
+
+def test_local_storage_concurrent_saves_to_one_key(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    payloads = [bytes([i]) * 200_000 for i in range(8)]
+    errors = []
+
+    def save(data):
+        try:
+            for _ in range(5):
+                storage.save("Report/alice/same.md", data)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(p,)) for p in payloads]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert storage.read("Report/alice/same.md") in payloads
+    assert [p.name for p in (tmp_path / "Report" / "alice").iterdir()] == ["same.md"]
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from Team_Rocket_Modules.Preview import PreviewAnalyzer
+
+
+def frame(n=556, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "GL": rng.integers(10_000_000, 60_000_000, n),
+        "Amount": rng.standard_t(3, n) * 1e6,
+        "FS Grouping Main Head": "Current Assets",
+    })
+
+
+def test_blank_gl_rows_are_skipped():
+    df = frame()
+    # a blank total row leaves GL as a float column with a NaN
+    df = pd.concat([df, pd.DataFrame({"GL": [np.nan], "Amount": [df["Amount"].sum()]})], ignore_index=True)
+    preview = PreviewAnalyzer(df)
+    preview.run()
+    assert preview.sampled == len(df) - 1
+    assert preview.sign_ranges
+
+
+def test_full_sample_gives_exact_bounds():
+    df = frame()
+    preview = PreviewAnalyzer(df)
+    preview.run()
+    assert preview.sampled == len(df)   # small sheet: every row is sampled
+
+    amount = df["Amount"]
+    assert np.allclose(preview.bounds["mean"], amount.mean())
+    assert np.allclose(preview.bounds["std"], amount.std(ddof=0))
+    assert preview.bounds["median"][0] == preview.bounds["median"][1] == preview.stats["median"]
+    counts = preview.outlier_counts
+    assert counts["low"] == counts["estimate"] == counts["high"] < len(df)
+
+
+def test_fault_lists_are_sorted_and_unique():
+    from Team_Rocket_Modules import Diff
+
+    df = frame(2000)
+    # repeated postings to the same GLs, in no particular order
+    df = pd.concat([df, df.sample(frac=1, random_state=1)], ignore_index=True)
+    preview = PreviewAnalyzer(df)
+    preview.run()
+    assert preview.fault
+    for codes in preview.fault.values():
+        assert codes == Diff.sorted_codes(codes).tolist() == sorted(set(codes))
@@ -0,0 +1,100 @@
+import io
+import os
+
+import pytest
+from bson import ObjectId
+
+from Team_Rocket_Modules import Proofs
+
+LIMIT = 64 << 10
+
+
+class CountingStream(io.BytesIO):
+    """Request body that records how many bytes the server read from it."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.consumed = 0
+
+    def read(self, size=-1):
+        block = super().read(size)
+        self.consumed += len(block)
+        return block
+
+    def readline(self, size=-1):
+        line = super().readline(size)
+        self.consumed += len(line)
+        return line
+
+
+def multipart(payload: bytes, boundary="proofboundary"):
+    return (f"--{boundary}\r\nContent-Disposition: form-data; name=\"text\"\r\n\r\nok\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"p.pdf\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+
+
+@pytest.fixture
+def review(make_worker, monkeypatch):
+    worker, client = make_worker("bob")
+    monkeypatch.setattr(Proofs, "MAX_PROOF_BYTES", LIMIT)
+    monkeypatch.setattr(worker, "PROOF_FORM_OVERHEAD", 1024)
+    review_id = worker.reviews_collection.insert_one(
+        {"report_id": str(ObjectId()), "gl_code": 1, "assigned_to": "bob", "username": "alice"}).inserted_id
+    return worker, client, review_id
+
+
+def post(client, review_id, body, **environ):
+    return client.post(f"/submit-review/{review_id}", input_stream=body,
+                       content_type="multipart/form-data; boundary=proofboundary", **environ)
+
+
+def test_small_proof_is_stored(review):
+    worker, client, review_id = review
+    payload = b"x" * 1000
+    response = post(client, review_id, io.BytesIO(multipart(payload)), content_length=len(multipart(payload)))
+    assert response.status_code == 200
+    assert worker.storage.read(worker.reviews_collection.find_one({"_id": review_id})["review_file"]) == payload
+
+
+def test_oversized_proof_refused_before_reading(review):
+    _, client, review_id = review
+    data = multipart(b"x" * (LIMIT + 4096))
+    body = CountingStream(data)
+    response = post(client, review_id, body, content_length=len(data))
+    assert response.status_code == 413
+    assert body.consumed == 0
+
+
+def test_oversized_chunked_proof_stops_at_the_limit(review):
+    _, client, review_id = review
+    data = multipart(b"x" * (8 * LIMIT))
+    body = CountingStream(data)
+    # no Content-Length (chunked transfer): Werkzeug cuts the body off at the limit
+    response = post(client, review_id, body, environ_overrides={"wsgi.input_terminated": True})
+    assert response.status_code == 413
+    assert body.consumed < 2 * LIMIT
+
+
+def test_proof_is_hashed_as_it_is_parsed(review, monkeypatch):
+    import hashlib
+
+    worker, client, review_id = review
+    # store() must not copy the parsed upload a second time
+    monkeypatch.setattr(Proofs, "_spool", lambda *args, **kwargs: pytest.fail("proof copied twice"))
+    payload = bytes(range(256)) * 200
+    data = multipart(payload)
+    assert post(client, review_id, io.BytesIO(data), content_length=len(data)).status_code == 200
+
+    proof = worker.reviews_collection.find_one({"_id": review_id})["proof"]
+    assert proof["sha256"] == hashlib.sha256(payload).hexdigest() and proof["size"] == len(payload)
+    assert worker.storage.read(proof["key"]) == payload
+    assert not [p for p in os.listdir(worker.staging.root) if p.startswith("proof-")]
+
+
+def test_proof_just_over_the_limit_leaves_no_temp_file(review):
+    worker, client, review_id = review
+    # within the form overhead, so it is parsed and refused by its size afterwards
+    data = multipart(b"x" * (LIMIT + 100))
+    assert post(client, review_id, io.BytesIO(data), content_length=len(data)).status_code == 413
+    assert worker.reviews_collection.find_one({"_id": review_id}).get("proof") is None
+    assert not [p for p in os.listdir(worker.staging.root) if p.startswith("proof-")]
@@ -0,0 +1,61 @@
+from bson import ObjectId
+from conftest import upload
+
+
+def test_reanalysis_keeps_the_source_period(make_worker):
+    worker, client = make_worker("alice")
+    report_id = upload(client, period="2024-01").get_json()["report_id"]
+    total = worker.rollup_collection.find_one({"username": "alice", "level": "total", "period": "2024-01"})
+
+    response = client.post(f"/reanalyze/{report_id}", json={"z_threshold": 2.5})
+    assert response.status_code == 200, response.get_json()
+    new_id = response.get_json()["report_id"]
+    assert response.get_json()["params"]["period"] == "2024-01"
+
+    assert worker.reports_collection.find_one({"_id": ObjectId(new_id)})["period"] == "2024-01"
+    # the same upload is counted once, under its own period
+    assert worker.rollup_collection.distinct("period", {"username": "alice"}) == ["2024-01"]
+    again = worker.rollup_collection.find_one({"username": "alice", "level": "total", "period": "2024-01"})
+    assert again["rows"] == total["rows"]
+
+    # an explicit period in the body still wins
+    response = client.post(f"/reanalyze/{new_id}", json={"period": "2024-02"})
+    assert response.get_json()["params"]["period"] == "2024-02"
+
+
+def test_reanalysis_converts_with_the_source_fx_table(make_worker, storage_root, monkeypatch):
+    import pandas as pd
+    from conftest import DATASET_DIR
+    from Team_Rocket_Modules import Currency, Dataset
+
+    fx_root = storage_root / "FX"
+    fx_root.mkdir()
+    monkeypatch.setattr(Currency, "FX_ROOT", str(fx_root))
+    (fx_root / "2024-01.csv").write_text("currency,rate\nUSD,1\nEUR,1.25\nINR,0.012\n")
+    # what a reanalysis would pick up without the source's settings
+    (fx_root / "2024-03.csv").write_text("currency,rate\nUSD,1\nEUR,2\nINR,0.5\n")
+    (fx_root / f"{pd.Timestamp.now():%Y-%m}.csv").write_text("currency,rate\nUSD,1\nEUR,3\nINR,1\n")
+
+    with open(f"{DATASET_DIR}/data.xlsx", "rb") as f:
+        df = Dataset.read_excel(f)
+    df["Currency"] = ["INR" if i % 2 else "EUR" for i in range(len(df))]
+    path = storage_root / "fx.xlsx"
+    df.to_excel(path, index=False, startrow=2)   # below the two banner rows read_excel skips
+
+    worker, client = make_worker("alice")
+    with open(path, "rb") as f:
+        response = client.post("/upload-excel", data={"file": (f, "fx.xlsx"), "enrich": "false", "period": "2024-03",
+                                                      "fx_period": "2024-01", "reporting_currency": "eur"})
+    assert response.status_code == 200, response.get_json()
+    report_id = response.get_json()["report_id"]
+    source = worker.reports_collection.find_one({"_id": ObjectId(report_id)})
+    assert source["currency"]["fx_period"] == "2024-01"
+
+    new_id = client.post(f"/reanalyze/{report_id}", json={}).get_json()["report_id"]
+    report = worker.reports_collection.find_one({"_id": ObjectId(new_id)})
+    assert report["currency"] == source["currency"]
+    assert report["fault_counts"] == source["fault_counts"]
+
+    # the body can still pick another table
+    new_id = client.post(f"/reanalyze/{report_id}", json={"fx_period": "2024-03"}).get_json()["report_id"]
+    assert worker.reports_collection.find_one({"_id": ObjectId(new_id)})["currency"]["fx_period"] == "2024-03"
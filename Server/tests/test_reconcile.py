@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+from conftest import upload
+
+from Team_Rocket_Modules.Reconcile import BalanceReconciler
+
+
+def test_out_of_balance_entity_and_attribution():
+    df = pd.DataFrame({
+        "GL": [10_000_001, 20_000_001, 10_000_002, 20_000_002, 30_000_001, 40_000_001, np.nan, 10_000_003],
+        "Amount": [500.0, -500.0, 300.0, -250.0, 80.0, -10.0, 999.0, 7.0],
+        "Entity": ["E1", "E1", "E2", "E2", "E2", "E2", "E2", None],
+        "FS Grouping Main Head": ["Assets", "Liabilities", "Assets", "Liabilities", None, "Assets", "Assets", "Assets"],
+    })
+    reconciler = BalanceReconciler(df, top_n=2)
+    reconciler.run()
+
+    entities = reconciler.getEntities().set_index("entity")
+    assert entities.loc["E1", "balanced"] and entities.loc["E1", "rows"] == 2
+    # blank GL row and the row without an entity are left out
+    assert entities.loc["E2", "rows"] == 4
+    assert entities.loc["E2", "debits"] == 380.0 and entities.loc["E2", "credits"] == 260.0
+    assert reconciler.getFlagged() == ["E2"]
+    assert reconciler.getTotals() == {"total_debits": 880.0, "total_credits": 760.0, "balance_difference": 120.0}
+
+    # +120 is explained by the ranges with the largest positive net, largest first
+    assert reconciler.getAttribution() == {"E2": [
+        {"range": "10000000", "net": 300.0, "share": 2.5},
+        {"range": "30000000", "net": 80.0, "share": 80.0 / 120.0},
+    ]}
+    groupings = {(g["entity"], g["grouping"]): g["net"] for g in reconciler.getGroupings().to_dict("records")}
+    assert groupings == {("E1", "Assets"): 500.0, ("E1", "Liabilities"): -500.0, ("E2", "Assets"): 290.0,
+                         ("E2", "Liabilities"): -250.0, ("E2", "(none)"): 80.0}
+    assert "Out of balance: 1 of 2 entities" in reconciler.text
+
+
+def test_bincount_totals_match_groupby():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = pd.DataFrame({
+        "GL": rng.integers(10_000_000, 60_000_000, n),
+        "Amount": np.round(rng.normal(0, 1e4, n), 2),
+        "Entity": pd.Categorical(rng.choice(["A", "B", "C"], n)),
+        "FS Grouping Main Head": rng.choice(["Assets", "Liabilities", "Equity"], n),
+    })
+    reconciler = BalanceReconciler(df)
+    reconciler.run()
+
+    reference = df.assign(debit=df["Amount"].clip(lower=0), credit=(-df["Amount"]).clip(lower=0))
+    by_entity = reference.groupby("Entity", observed=True)[["debit", "credit"]].sum()
+    entities = reconciler.getEntities().set_index("entity")
+    assert np.allclose(entities.loc[by_entity.index, "debits"], by_entity["debit"])
+    assert np.allclose(entities.loc[by_entity.index, "credits"], by_entity["credit"])
+    by_group = reference.groupby(["Entity", "FS Grouping Main Head"], observed=True)["Amount"].sum()
+    groupings = reconciler.getGroupings().set_index(["entity", "grouping"])["net"]
+    assert np.allclose(groupings.loc[by_group.index], by_group)
+
+
+def test_upload_stores_the_totals(make_worker):
+    from Team_Rocket_Modules import Dataset
+
+    worker, client = make_worker("alice")
+    report_id = upload(client).get_json()["report_id"]
+    report = worker.reports_collection.find_one({"_id": ObjectId(report_id)})
+    amount = Dataset.load_columnar(worker.storage, report["columnar_key"])["Amount"].dropna()
+
+    assert np.isclose(report["total_debits"], amount[amount > 0].sum())
+    assert np.isclose(report["total_credits"], -amount[amount < 0].sum())
+    assert [e["entity"] for e in report["reconciliation"]["entities"]] == ["all"]   # no Entity column
@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+from bson import ObjectId
+from conftest import upload
+
+from Team_Rocket_Modules import ReportTemplate
+
+
+def result(**fields):
+    return {"fault": {"10000000": list(range(10_000_001, 10_000_031))}, "fields": {
+        "stats": {"total_gl": 30, "rows": 40, "mean": float("nan"), "median": 1.0, "std": 2.0, "nulls": 0},
+        "sign_ranges": [{"range": "10000000", "start": 10_000_000, "end": 19_999_999, "grouping": "Assets",
+                         "expected": "positive", "positives": 10, "negatives": 30, "faults": 30}],
+        **fields,
+    }}
+
+
+def test_render_sections():
+    md = ReportTemplate.render(result(z_outliers=[]), {"filename": "tb.xlsx", "generated_at": "2025-01-01 00:00:00",
+                                                      "params": {"z_threshold": 2.5}})
+    assert md.startswith("# GL Balance Sheet Assurance Report")
+    assert "**File:** tb.xlsx" in md
+    assert "Sign anomalies: **30** in 1 GL range(s)" in md
+    assert "| Mean | N/A |" in md
+    # long GL lists are cut at MAX_LISTED
+    assert f"and {30 - ReportTemplate.MAX_LISTED} more" in md
+    assert "All amounts are within ±2.5 standard deviations." in md
+    assert "Provisional" not in md and "Benford" not in md
+
+    outliers = [[10_000_000 + i, float(i)] for i in range(40)]
+    md = ReportTemplate.render(result(z_outliers=outliers, confidence={"sample_rows": 10, "rows": 40}),
+                               {"provisional": True})
+    assert "**Provisional:** estimated from a stratified sample of 10 of 40 rows" in md
+    assert f"40 posting(s); largest {ReportTemplate.MAX_LISTED} by |z|" in md
+    assert "| 10000039 | 39.000 |" in md and "| 10000000 | 0.000 |" not in md
+
+
+class Reporter:
+    """Gemini stand-in: returns (or raises) once released."""
+
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.error = error
+
+    def generate_markdown(self, text):
+        self.release.wait(10)
+        if self.error:
+            raise self.error
+        return "# Narrative report\n\n" + text
+
+
+@pytest.fixture
+def enriching(make_worker, monkeypatch):
+    def make(reporter):
+        worker, client = make_worker("alice")
+        monkeypatch.setattr(worker, "REPORT_ENRICHMENT", True)
+        monkeypatch.setattr(worker, "reporter", reporter)
+        return worker, client
+    return make
+
+
+def stored(worker, client, report_id):
+    report = worker.reports_collection.find_one({"_id": ObjectId(report_id)})
+    return report, client.get(f"/get-report/{report_id}").get_json()["markdown"]
+
+
+def test_template_first_then_narrative(enriching):
+    reporter = Reporter()
+    worker, client = enriching(reporter)
+    report_id = upload(client, enrich="true").get_json()["report_id"]
+
+    # answered before the model returns, with the template report
+    report, content = stored(worker, client, report_id)
+    assert (report["report_source"], report["enrichment"]) == ("template", "pending")
+    assert content.startswith("# GL Balance Sheet Assurance Report")
+
+    reporter.release.set()
+    worker.enricher.shutdown(wait=True)
+    report, content = stored(worker, client, report_id)
+    assert (report["report_source"], report["enrichment"]) == ("llm", "done")
+    assert content.startswith("# Narrative report") and report["report_path"].endswith(report["report_filename"])
+
+
+def test_failed_enrichment_keeps_the_template(enriching):
+    reporter = Reporter(RuntimeError("quota exceeded"))
+    reporter.release.set()
+    worker, client = enriching(reporter)
+    report_id = upload(client, enrich="true").get_json()["report_id"]
+    worker.enricher.shutdown(wait=True)
+
+    report, content = stored(worker, client, report_id)
+    assert (report["report_source"], report["enrichment"]) == ("template", "failed")
+    assert report["enrichment_error"] == "quota exceeded"
+    assert content.startswith("# GL Balance Sheet Assurance Report")
+
+    # enrich=false skips the model for that upload
+    report_id = upload(client).get_json()["report_id"]
+    assert stored(worker, client, report_id)[0]["enrichment"] == "off"
@@ -0,0 +1,48 @@
+from conftest import upload
+
+from Team_Rocket_Modules import Rollup
+
+
+def cube(collection, username, period):
+    docs = collection.find({"username": username, "period": period}, {"_id": 0, "updated_at": 0, "report_id": 0})
+    # sums are compared to the cent: incremental $inc and a rebuild add in different orders
+    return sorted(tuple(sorted((k, round(v, 2) if isinstance(v, float) else v) for k, v in d.items()))
+                  for d in docs)
+
+
+def test_upload_with_padded_category_labels(make_worker):
+    # data.xlsx has both " Current Liabilities" and "Current Liabilities"
+    worker, client = make_worker("alice")
+    for _ in range(2):   # the re-upload replaces the slice instead of colliding with it
+        response = upload(client, period="2025-10")
+        assert response.status_code == 200, response.get_json()
+
+    rollups = worker.rollup_collection
+    categories = [d["key"] for d in rollups.find({"username": "alice", "level": "category"})]
+    assert len(categories) == len(set(categories))
+    assert all(key == key.strip() for key in categories)
+
+    total = rollups.find_one({"username": "alice", "period": "2025-10", "level": "total"})
+    cells = list(rollups.find({"username": "alice", "period": "2025-10", "level": "cell"}))
+    assert total["rows"] == sum(c["rows"] for c in cells) > 0
+    assert worker.reports_collection.count_documents({"rollup": "failed"}) == 0
+
+    # the incrementally maintained levels equal a rebuild from the cells
+    before = cube(rollups, "alice", "2025-10")
+    Rollup.rebuild(rollups, "alice", "2025-10")
+    assert cube(rollups, "alice", "2025-10") == before
+
+
+def test_cells_merge_labels_that_differ_only_in_whitespace():
+    import pandas as pd
+
+    df = pd.DataFrame({
+        "GL": [1, 2, 3, 4],
+        "Amount": [10.0, -5.0, 7.0, 1.0],
+        "FS Grouping Main Head": [" Current Liabilities", "Current Liabilities", None, "  "],
+    })
+    cells = {c["category"]: c for c in Rollup.cells(df)}
+    assert sorted(cells) == ["Current Liabilities", Rollup.UNASSIGNED]
+    assert cells["Current Liabilities"]["rows"] == 2
+    assert cells["Current Liabilities"]["net"] == 5.0
+    assert cells[Rollup.UNASSIGNED]["rows"] == 2
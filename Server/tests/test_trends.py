@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from conftest import upload
+
+
+def trend(client, **args):
+    response = client.get("/trends", query_string=args)
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    return {(r["username"], r["range"]): (r["faults"], r["reports"]) for r in body["trends"]}, body["cached"]
+
+
+def test_trends_count_faults_and_follow_new_uploads(make_worker):
+    worker, alice = make_worker("alice")
+    _, bob = make_worker("bob")
+    first = upload(alice).get_json()["report_id"]
+    counts = alice.get(f"/get-report/{first}?fault=counts").get_json()["fault_counts"]
+    upload(alice)
+    upload(bob)
+    # a schema-1 report: plain GL lists, counted by their length
+    worker.reports_collection.insert_one({"username": "alice", "uploaded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                          "fault": {"90000000": [90000005, 90000007]}})
+
+    rows, cached = trend(alice)
+    assert not cached
+    assert rows == {**{("alice", r): (2 * n, 2) for r, n in counts.items()}, ("alice", "90000000"): (2, 1)}
+    assert trend(alice) == (rows, True)
+
+    everyone, _ = trend(alice, scope="all")
+    assert {user for user, _ in everyone} == {"alice", "bob"}
+    assert trend(bob)[1] is False
+    assert trend(bob)[1] is True
+
+    # a new upload by alice drops her cached windows and the all-users ones, not bob's
+    upload(alice)
+    rows, cached = trend(alice)
+    assert not cached and all(n == 3 for (_, r), (_, n) in rows.items() if r != "90000000")
+    assert trend(alice, scope="all")[1] is False
+    assert trend(bob)[1] is True
+
+
+def test_trends_buckets_and_bad_arguments(make_worker):
+    worker, client = make_worker("alice")
+    worker.reports_collection.insert_many([
+        {"username": "alice", "uploaded_at": "2000-01-15 10:00:00", "fault_counts": {"10000000": 4}, "fault": {}},
+        {"username": "alice", "uploaded_at": "2000-02-15 10:00:00", "fault_counts": {"10000000": 1}, "fault": {}},
+    ])
+    body = client.get("/trends", query_string={"days": 365 * 100, "period": "month"}).get_json()
+    assert [(r["period"], r["faults"]) for r in body["trends"]] == [("2000-01", 4), ("2000-02", 1)]
+    body = client.get("/trends", query_string={"days": 365 * 100, "period": "year"}).get_json()
+    assert [(r["period"], r["faults"], r["reports"]) for r in body["trends"]] == [("2000", 5, 2)]
+    # outside the window
+    assert client.get("/trends", query_string={"days": 30}).get_json()["count"] == 0
+
+    assert client.get("/trends?days=soon").status_code == 400
+    assert client.get("/trends?period=week").status_code == 400